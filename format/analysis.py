@@ -0,0 +1,51 @@
+"""
+MovieAnalysis - tokenization and part-of-speech tagging of a movie's text, done once and shared by feature extractors
+"""
+from nltk import wordpunct_tokenize, word_tokenize, pos_tag, pos_tag_sents
+
+
+class MovieAnalysis(object):
+    # first_position: position in the whole movie of movie's first scene, when movie is a window of a longer one
+    def __init__(self, movie, first_position=0):
+        self.movie = movie
+        self.first_position = first_position
+        # keyed by text so that repeated element texts are only analysed once
+        self.word_tokens = {}  # text: wordpunct tokens
+        self.tagged_tokens = {}  # text: (word, part of speech tag) pairs over word_tokenize tokens
+        self.arrays = {}  # name: numpy arrays over the whole movie, see feature_matrix
+
+    def words(self, visual_scene_element):
+        text = visual_scene_element.text_string
+        if text not in self.word_tokens:
+            self.word_tokens[text] = wordpunct_tokenize(text)
+        return self.word_tokens[text]
+
+    def pos_tags(self, visual_scene_element):
+        text = visual_scene_element.text_string
+        if text not in self.tagged_tokens:
+            self.tagged_tokens[text] = pos_tag(word_tokenize(text))
+        return self.tagged_tokens[text]
+
+    def untagged_texts(self):
+        texts = []
+        for visual_scene in self.movie.visual_scenes:
+            for visual_scene_element in visual_scene.visual_scene_elements:
+                if visual_scene_element.text_string not in self.tagged_tokens:
+                    texts.append(visual_scene_element.text_string)
+        return list(dict.fromkeys(texts))  # unique, in movie order
+
+    # tags every element of the movie in a single tagger call
+    def tag_all(self):
+        tag_movies([self])
+
+
+# tags all elements of many movies in one batch: the tagger is set up once instead of once per element
+def tag_movies(analyses):
+    texts_by_analysis = [analysis.untagged_texts() for analysis in analyses]
+    tokenized_texts = [word_tokenize(text) for texts in texts_by_analysis for text in texts]
+    if not tokenized_texts:
+        return
+    tagged_texts = iter(pos_tag_sents(tokenized_texts))
+    for analysis, texts in zip(analyses, texts_by_analysis):
+        for text in texts:
+            analysis.tagged_tokens[text] = next(tagged_texts)
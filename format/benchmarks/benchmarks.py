@@ -0,0 +1,331 @@
+"""
+Benchmarks - timings and memory of the optimized code paths against the ones they replaced
+These assert on wall-clock time, so they are kept out of the tests; run them on a quiet machine from format/ with
+python -m unittest benchmarks.benchmarks
+"""
+import json
+import os
+import random
+import re
+import tempfile
+import textwrap
+import time
+import tracemalloc
+import unittest
+import uuid
+
+import numpy as np
+from nltk import Tree, pos_tag, word_tokenize
+
+from analysis import MovieAnalysis
+from binary import dump, open_binary
+from blockers import BasicBlocker
+from decorators import FirstLastSceneAddDecorator
+from document import Sentence
+from feature_extractors import AverageWordLengthFeatureExtractor, MultiFeatureExtractor, \
+    OverallLengthFeatureExtractor, SceneWidthFeatureExtractor, WordEntropyFeatureExtractor
+from feature_matrix import FeatureMatrix
+from movie import Movie, MovieJSONEncoder, StyledMovieJSONEncoder, VisualScene, VisualSceneElement
+from pipeline import Pipeline, StreamedDocument
+from raw_converters import WikiTextNormalizer
+from screenplay import Screenplay
+from screenwriters import FixedDimensionScreenwriter
+from tree_analysis import TreeAnalysis
+from wrapping import wrap_sentences
+
+TAYLOR_SWIFT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../output/Taylor_Swift.json")
+
+
+# one scene per sentence of output/Taylor_Swift.json, one line per sentence part
+def taylor_swift_movie():
+    with open(TAYLOR_SWIFT_JSON) as document_json:
+        document = json.load(document_json)
+
+    texts = []
+
+    def collect(node):
+        if isinstance(node, dict):
+            if "sentence_parts" in node:
+                texts.append("\n".join(part["text"] for part in node["sentence_parts"]) + "\n")
+            for value in node.values():
+                collect(value)
+        elif isinstance(node, list):
+            for value in node:
+                collect(value)
+
+    collect(document)
+    return Movie([VisualScene([VisualSceneElement(text_string=text)], 1.0, identifier)
+                  for identifier, text in enumerate(texts)], None)
+
+
+# the speedup of tagging a whole movie in one batch over tagging element by element, on output/Taylor_Swift.json;
+# it was first added as tests/tests_benchmarks.py and moved here with the other timing assertions
+class BatchedPosTaggingBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.movie = taylor_swift_movie()
+        self.sample_size = 50  # tagging element by element is slow enough that a sample gives the rate
+
+    def testBatchedTaggingIsFaster(self):
+        start = time.perf_counter()
+        analysis = MovieAnalysis(self.movie)
+        analysis.tag_all()
+        batched_seconds = time.perf_counter() - start
+
+        sample = self.movie.visual_scenes[:self.sample_size]
+        start = time.perf_counter()
+        per_element_tags = [pos_tag(word_tokenize(scene.visual_scene_elements[0].text_string)) for scene in sample]
+        per_element_seconds = (time.perf_counter() - start) * len(self.movie.visual_scenes) / len(sample)
+
+        print("POS tagging %d scenes: %.2fs batched, ~%.2fs element by element (%.1fx)" %
+              (len(self.movie.visual_scenes), batched_seconds, per_element_seconds,
+               per_element_seconds / batched_seconds))
+        self.assertEquals(per_element_tags, [analysis.pos_tags(scene.visual_scene_elements[0]) for scene in sample])
+        self.assertLess(batched_seconds, per_element_seconds)
+
+
+class WikiTextNormalizerBenchmark(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        words = ["the", "star", "[3]", "collapses", " into", "a\n", "white", "  dwarf", "[12]", "after", "[]"]
+        self.sentences = [" ".join(random.choice(words) for _ in range(25)) for _ in range(20000)]
+
+    @staticmethod
+    def best_of(repeats, function):
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = function()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        return result, best
+
+    # per-sentence regexes, the way tidyText and convertToXml used to normalize text
+    def normalize_one_by_one(self):
+        tidy = []
+        for sentence in self.sentences:
+            citation_regex = re.compile(r'\s*\[\d*\]\s*')
+            tidy.append(citation_regex.sub("", re.sub(r"\s\s+", " ", sentence)))
+        return tidy
+
+    def testSinglePassIsFaster(self):
+        normalizer = WikiTextNormalizer()
+        batched, batched_seconds = self.best_of(
+            5, lambda: normalizer.strip_citations(normalizer.collapse_whitespace(self.sentences)))
+        one_by_one, one_by_one_seconds = self.best_of(5, self.normalize_one_by_one)
+
+        print("Normalizing %d sentences: %.3fs in one pass, %.3fs one by one" %
+              (len(self.sentences), batched_seconds, one_by_one_seconds))
+        self.assertEquals(batched, one_by_one)
+        self.assertLess(batched_seconds, one_by_one_seconds)
+
+
+class StreamingWrapBenchmark(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        words = ["the", "star", "collapses", "into", "a", "white", "dwarf", "after", "burning", "its", "hydrogen"]
+        # about the size of a novel from BookNewlineFileRawConverter
+        self.sentences = [" ".join(random.choice(words) for _ in range(20)) + "." for _ in range(50000)]
+
+    def testStreamingWrapIsFaster(self):
+        start = time.perf_counter()
+        streamed = list(wrap_sentences(self.sentences, 70))
+        streamed_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        wrapped = textwrap.wrap(" ".join(self.sentences), 70)
+        wrapped_seconds = time.perf_counter() - start
+
+        print("Wrapping %d sentences: %.2fs streamed, %.2fs with textwrap (%.1fx)" %
+              (len(self.sentences), streamed_seconds, wrapped_seconds, wrapped_seconds / streamed_seconds))
+        self.assertEquals(streamed, wrapped)
+        self.assertLess(streamed_seconds * 2, wrapped_seconds)
+
+
+class PlainObject(object):
+    pass
+
+
+# the way Movie.fromDict built a movie before its classes had __slots__: one attribute dict per object
+def plain_movie(dict_object):
+    movie = PlainObject()
+    movie.visual_scenes = []
+    for scene_dict in dict_object["visual_scenes"]:
+        scene = PlainObject()
+        scene.visual_scene_elements = []
+        for element_dict in scene_dict["visual_scene_elements"]:
+            element = PlainObject()
+            for key, value in element_dict.items():
+                setattr(element, key, tuple(value) if isinstance(value, list) else value)
+            scene.visual_scene_elements.append(element)
+        scene.duration = scene_dict["duration"]
+        scene.identifier = scene_dict["identifier"]
+        movie.visual_scenes.append(scene)
+    movie.screenplay_id = uuid.UUID(dict_object["screenplay_id"])
+    return movie
+
+
+class MovieMemoryBenchmark(unittest.TestCase):
+    def setUp(self):
+        movie = Movie([VisualScene([VisualSceneElement(text_string="scene %d element %d" % (i, j),
+                                                       relative_Y_position=-50.0 * j) for j in range(4)], 1.0, i)
+                       for i in range(10000)], uuid.uuid1())
+        self.element_count = sum(len(scene.visual_scene_elements) for scene in movie.visual_scenes)
+        self.movie_json = json.dumps(movie, cls=MovieJSONEncoder)
+
+    @staticmethod
+    def allocated_bytes(load):
+        tracemalloc.start()
+        try:
+            loaded = load()
+            allocated, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return loaded, allocated
+
+    def testSlottedMovieIsSmaller(self):
+        # parsing the JSON isn't counted, only what the loaded movie keeps alive
+        slotted, slotted_bytes = self.allocated_bytes(lambda: Movie.fromDict(json.loads(self.movie_json)))
+        plain, plain_bytes = self.allocated_bytes(lambda: plain_movie(json.loads(self.movie_json)))
+
+        print("Loading a movie of %d elements: %.1fMB slotted, %.1fMB with attribute dicts (%.1fx)" %
+              (self.element_count, slotted_bytes / 2 ** 20, plain_bytes / 2 ** 20, plain_bytes / slotted_bytes))
+        self.assertEquals(json.dumps(slotted, cls=MovieJSONEncoder), self.movie_json)
+        self.assertLess(slotted_bytes * 2, plain_bytes)
+
+
+class StyledMovieBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.movie = taylor_swift_movie()
+        self.movie.screenplay_id = uuid.uuid1()
+
+    def testStyledMovieFileIsSmaller(self):
+        full_json = json.dumps(self.movie, cls=MovieJSONEncoder, indent=4)
+        styled_json = json.dumps(self.movie, cls=StyledMovieJSONEncoder, indent=4)
+
+        print("Writing a movie of %d scenes: %.0fKB styled, %.0fKB in full (%.1fx)" %
+              (len(self.movie.visual_scenes), len(styled_json) / 1024, len(full_json) / 1024,
+               len(full_json) / len(styled_json)))
+        self.assertEquals(json.dumps(Movie.fromDict(json.loads(styled_json)), cls=MovieJSONEncoder, indent=4),
+                          full_json)
+        self.assertLess(len(styled_json) * 3, len(full_json))
+
+
+class BinaryMovieBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.movie = taylor_swift_movie()
+        self.movie.screenplay_id = uuid.uuid1()
+        self.movie_json = json.dumps(self.movie, cls=MovieJSONEncoder, indent=4)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "movie.bin")
+        with open(self.path, "wb") as output_file:
+            dump(self.movie, output_file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testSceneLookupIsFaster(self):
+        scene = len(self.movie.visual_scenes) // 2
+        start = time.perf_counter()
+        json_scene = Movie.fromDict(json.loads(self.movie_json)).visual_scenes[scene]
+        json_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open_binary(self.path) as movie_file:
+            binary_scene = movie_file[scene]
+        binary_seconds = time.perf_counter() - start
+
+        self.assertEquals(binary_scene, json_scene)
+        self.assertLess(binary_seconds * 10, json_seconds)
+        self.assertLess(os.path.getsize(self.path) * 3, len(self.movie_json))
+
+
+class FeatureMatrixBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.movie = taylor_swift_movie()
+        self.analysis = MovieAnalysis(self.movie)
+        for scene in self.movie.visual_scenes:
+            self.analysis.words(scene.visual_scene_elements[0])
+
+    def extractor(self):
+        return MultiFeatureExtractor([OverallLengthFeatureExtractor(), AverageWordLengthFeatureExtractor(),
+                                      WordEntropyFeatureExtractor(), SceneWidthFeatureExtractor()])
+
+    def testVectorizedColumnsAreFaster(self):
+        start = time.perf_counter()
+        extractor = self.extractor()
+        features = FeatureMatrix.from_features(extractor.get_features(self.movie, self.analysis),
+                                               extractor.missing_values())
+        per_word_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matrix = self.extractor().get_feature_matrix(self.movie, self.analysis)
+        vectorized_seconds = time.perf_counter() - start
+
+        self.assertTrue(np.allclose(matrix.values, features.values))
+        self.assertLess(vectorized_seconds, per_word_seconds)
+
+
+class TreeAnalysisBenchmark(unittest.TestCase):
+    def setUp(self):
+        # a balanced parse of a 300 word sentence
+        def balanced_tree(words):
+            if words == 1:
+                return Tree("NN", ["word"])
+            return Tree("NP", [balanced_tree(words // 2), balanced_tree(words - words // 2)])
+
+        self.tree = balanced_tree(300)
+
+    def testSinglePassIsFaster(self):
+        start = time.perf_counter()
+        max_height = max(subtree.height() for subtree in self.tree.subtrees())
+        by_subtrees = [" ".join(subtree.leaves()) for height in range(max_height)
+                       for subtree in self.tree.subtrees(lambda t: t.height() == height)]
+        subtrees_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analysis = TreeAnalysis(self.tree)
+        by_analysis = [analysis.text(constituent) for height in range(analysis.height)
+                       for constituent in analysis.constituents(height)]
+        analysis_seconds = time.perf_counter() - start
+
+        self.assertEquals(by_analysis, by_subtrees)
+        self.assertLess(analysis_seconds * 3, subtrees_seconds)
+
+
+class PipelineMemoryBenchmark(unittest.TestCase):
+    @staticmethod
+    def pipeline():
+        return Pipeline(FixedDimensionScreenwriter(5, 60), [FirstLastSceneAddDecorator(stream_placeholder=True)],
+                        BasicBlocker(),
+                        MultiFeatureExtractor([OverallLengthFeatureExtractor(), AverageWordLengthFeatureExtractor()]))
+
+    @staticmethod
+    def texts(count):
+        return ["Supernova number %d is %s times as bright as the Sun." % (i, "very " * (i % 5)) for i in range(count)]
+
+    # peak bytes allocated while writing the movie and features of count sentences, the sentences themselves aside
+    def peak_bytes(self, count, streamed):
+        texts = self.texts(count)
+        pipeline = self.pipeline()
+        with open(os.devnull, "w") as movie_file, open(os.devnull, "w") as features_file:
+            tracemalloc.start()
+            try:
+                document = StreamedDocument("Supernovas", (Sentence(text, i) for i, text in enumerate(texts)))
+                if streamed:
+                    pipeline.run(document, movie_file, features_file)
+                else:
+                    screenplay = Screenplay(list(pipeline.screenwriter.iter_scenes(document)), doc_id=document.doc_id)
+                    screenplay = FirstLastSceneAddDecorator().decorate_screenplay(screenplay)
+                    movie = pipeline.blocker.block_screenplay(screenplay)
+                    json.dump(movie, movie_file, cls=MovieJSONEncoder, indent=4)
+                    json.dump({"screenplay_id": str(movie.screenplay_id),
+                               "features": pipeline.extractor.get_features(movie)}, features_file, indent=4)
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    def testPeakMemoryDoesNotGrowWithDocument(self):
+        streamed = [self.peak_bytes(count, True) for count in (1000, 8000)]
+        whole = self.peak_bytes(8000, False)
+        self.assertLess(streamed[1], streamed[0] * 2)  # eight times the sentences
+        self.assertLess(streamed[1] * 3, whole)
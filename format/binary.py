@@ -0,0 +1,460 @@
+"""
+Binary - a compact columnar container for Screenplays, Movies and extracted features
+A file is a header, a table of named sections and the sections themselves, each 8-byte aligned. Strings are stored
+once in a string table and referred to by index; durations, identifiers, positions and feature values are fixed-width
+little-endian columns, with the elements of scene i at rows element_starts[i] to element_starts[i + 1] of the element
+columns. Files are read through mmap, so opening one only reads the section table, and any single scene can be
+decoded on its own.
+"""
+import abc
+from array import array
+import json
+import mmap
+import numbers
+import struct
+import sys
+import uuid
+
+from movie import Movie, VisualScene, VisualSceneElement, VisualStyle, style_key, styles_fromList
+from screenplay import Scene, SceneElement, Screenplay
+
+MAGIC = b"OMBC"
+VERSION = 1
+
+# kinds of file
+SCREENPLAY = 1
+MOVIE = 2
+FEATURES = 3
+INDEX = 4  # scene_index.SceneIndex
+
+_HEADER = struct.Struct("<4sHHI")  # magic, version, kind, number of sections
+_SECTION = struct.Struct("<4sQQ")  # name, offset, length
+_LENGTH = struct.Struct("<I")  # prefix of a record
+_ALIGNMENT = 8
+
+NO_STRING = 0xFFFFFFFF  # string index of None
+
+# flags of a movie element, set when a position is an int rather than a float
+_INT_X = 1
+_INT_Y = 2
+_INT_Z = 4
+
+# types of a feature column; int and bool columns are stored in FINT, float columns in FVAL
+_INT_COLUMN = 0
+_FLOAT_COLUMN = 1
+_BOOL_COLUMN = 2
+
+
+def little_endian(column):
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def records_section(values):
+    parts = [_LENGTH.pack(len(values))]
+    for value in values:
+        encoded = json.dumps(value).encode("utf-8")
+        parts.append(_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+class StringTable(object):
+    def __init__(self):
+        self.indices = {}  # string: index
+        self.strings = []
+
+    def index(self, string):
+        if string is None:
+            return NO_STRING
+        index = self.indices.get(string)
+        if index is None:
+            index = self.indices[string] = len(self.strings)
+            self.strings.append(string)
+        return index
+
+    def section(self):
+        encoded = [string.encode("utf-8", "surrogatepass") for string in self.strings]
+        offsets = array("Q", [0])
+        for string in encoded:
+            offsets.append(offsets[-1] + len(string))
+        return _LENGTH.pack(len(encoded)) + b"\0" * (_ALIGNMENT - _LENGTH.size) + little_endian(offsets) + \
+            b"".join(encoded)
+
+
+# sections: (four-letter name, bytes) pairs
+def write_container(fp, kind, sections):
+    table = [_HEADER.pack(MAGIC, VERSION, kind, len(sections))]
+    body = []
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    for name, data in sections:
+        padding = -offset % _ALIGNMENT
+        body.append(b"\0" * padding)
+        body.append(data)
+        table.append(_SECTION.pack(name.encode("ascii"), offset + padding, len(data)))
+        offset += padding + len(data)
+    fp.write(b"".join(table))
+    for data in body:
+        fp.write(data)
+
+
+def _scene_sections(scenes, elements_of):
+    identifiers = array("q")
+    durations = array("d")
+    element_starts = array("I", [0])
+    for scene in scenes:
+        identifiers.append(scene.identifier)
+        durations.append(scene.duration)
+        element_starts.append(element_starts[-1] + len(elements_of(scene)))
+    return [("SIDS", little_endian(identifiers)), ("SDUR", little_endian(durations)),
+            ("SELS", little_endian(element_starts))]
+
+
+def dump_screenplay(screenplay, fp):
+    strings = StringTable()
+    contents = array("I")
+    names = array("I")
+    priorities = array("q")
+    for scene in screenplay.scenes:
+        for element in scene.elements:
+            contents.append(strings.index(element.content))
+            names.append(strings.index(element.name))
+            priorities.append(element.priority)
+    meta = {"title": screenplay.title, "doc_id": str(screenplay.doc_id)}
+    write_container(fp, SCREENPLAY, [("META", records_section([meta]))] +
+                     _scene_sections(screenplay.scenes, lambda scene: scene.elements) +
+                     [("ECON", little_endian(contents)), ("ENAM", little_endian(names)),
+                      ("EPRI", little_endian(priorities)), ("STRS", strings.section())])
+
+
+def dump_movie(movie, fp):
+    strings = StringTable()
+    style_ids = {}  # style key: index in styles
+    styles = []
+    element_styles = array("I")
+    positions = [array("d"), array("d"), array("d")]
+    flags = array("B")
+    identifiers = array("I")
+    texts = array("I")
+    for scene in movie.visual_scenes:
+        for element in scene.visual_scene_elements:
+            style = element.style
+            key = style_key(style)
+            if key not in style_ids:
+                style_ids[key] = len(styles)
+                styles.append(dict(zip(VisualStyle._fields, style)))
+            element_styles.append(style_ids[key])
+            element_flags = 0
+            for column, flag, position in zip(positions, (_INT_X, _INT_Y, _INT_Z),
+                                              (element.relative_X_position, element.relative_Y_position,
+                                               element.relative_Z_position)):
+                column.append(position)
+                if isinstance(position, int):
+                    element_flags |= flag
+            flags.append(element_flags)
+            identifiers.append(strings.index(element.identifier))
+            texts.append(strings.index(element.text_string))
+    meta = {"screenplay_id": str(movie.screenplay_id)}
+    write_container(fp, MOVIE, [("META", records_section([meta])), ("STYL", records_section(styles))] +
+                     _scene_sections(movie.visual_scenes, lambda scene: scene.visual_scene_elements) +
+                     [("ESTY", little_endian(element_styles)), ("EXPS", little_endian(positions[0])),
+                      ("EYPS", little_endian(positions[1])), ("EZPS", little_endian(positions[2])),
+                      ("EFLG", little_endian(flags)), ("EIDS", little_endian(identifiers)),
+                      ("ETXT", little_endian(texts)), ("STRS", strings.section())])
+
+
+# the type of column a feature value needs; values that cannot be stored raise before anything is written
+def _feature_column_type(name, value, identifier):
+    if isinstance(value, bool):
+        return _BOOL_COLUMN
+    if isinstance(value, numbers.Integral):
+        if not -2 ** 63 <= value < 2 ** 63:
+            raise Exception("Feature %s of scene %s does not fit in 64 bits: %d" % (name, identifier, value))
+        return _INT_COLUMN
+    if isinstance(value, numbers.Real):
+        return _FLOAT_COLUMN
+    raise Exception("Feature %s of scene %s is not a number or bool: %r" % (name, identifier, value))
+
+
+# bool and int values share an int column; any float makes it a float column, which ints have to fit exactly
+def _merged_column_type(column_type, value_type):
+    if column_type is None or column_type == value_type:
+        return value_type
+    if _FLOAT_COLUMN in (column_type, value_type):
+        return _FLOAT_COLUMN
+    return _INT_COLUMN
+
+
+# column index: row of the column in the FINT or FVAL table of its type
+def _typed_slots(column_types):
+    slots = []
+    counts = {_INT_COLUMN: 0, _FLOAT_COLUMN: 0}
+    for column_type in column_types:
+        table = _FLOAT_COLUMN if column_type == _FLOAT_COLUMN else _INT_COLUMN
+        slots.append(counts[table])
+        counts[table] += 1
+    return slots, counts[_INT_COLUMN], counts[_FLOAT_COLUMN]
+
+
+# features: what MultiFeatureExtractor.get_features returns, one dict per scene with an "identifier"
+def dump_features(features, screenplay_id, fp):
+    columns = {}  # feature name: column index, in order of first appearance
+    types = []
+    for scene_features in features:
+        for name, value in scene_features.items():
+            if name == "identifier":
+                continue
+            if name not in columns:
+                columns[name] = len(columns)
+                types.append(None)
+            column = columns[name]
+            types[column] = _merged_column_type(types[column],
+                                                _feature_column_type(name, value, scene_features["identifier"]))
+    column_types = array("B", types)
+    slots, int_count, float_count = _typed_slots(column_types)
+    int_values = array("q", [0] * (len(features) * int_count))
+    float_values = array("d", [0.0] * (len(features) * float_count))
+    present = array("B", [0] * (len(features) * len(columns)))
+    identifiers = array("q")
+    for row, scene_features in enumerate(features):
+        identifiers.append(scene_features["identifier"])
+        for name, value in scene_features.items():
+            if name == "identifier":
+                continue
+            column = columns[name]
+            if column_types[column] == _FLOAT_COLUMN:
+                if not isinstance(value, float) and float(value) != value:
+                    raise Exception("Feature %s of scene %s is an int too large for its float column: %d" %
+                                    (name, scene_features["identifier"], value))
+                float_values[row * float_count + slots[column]] = value
+            else:
+                int_values[row * int_count + slots[column]] = value
+            present[row * len(columns) + column] = 1
+    strings = StringTable()
+    names = array("I", [strings.index(name) for name in columns])
+    write_container(fp, FEATURES, [("META", records_section([{"screenplay_id": str(screenplay_id)}])),
+                                    ("FIDS", little_endian(identifiers)), ("FCOL", little_endian(names)),
+                                    ("FTYP", little_endian(column_types)), ("FINT", little_endian(int_values)),
+                                    ("FVAL", little_endian(float_values)), ("FMSK", little_endian(present)),
+                                    ("STRS", strings.section())])
+
+
+def dump(obj, fp):
+    if isinstance(obj, Screenplay):
+        dump_screenplay(obj, fp)
+    elif isinstance(obj, Movie):
+        dump_movie(obj, fp)
+    else:
+        raise Exception("Cannot write non-Screenplay, non-Movie object to a binary file: " + str(type(obj)))
+
+
+class BinaryFile(object):
+    kind = None
+
+    def __init__(self, path):
+        with open(path, "rb") as fp:
+            self.map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self.views = []  # released on close, as the map cannot be closed while they exist
+        magic, version, kind, section_count = _HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise Exception("Not a version %d binary file: %s" % (VERSION, path))
+        if self.kind is not None and kind != self.kind:
+            self.map.close()
+            raise Exception("Binary file %s holds kind %d, not %d" % (path, kind, self.kind))
+        self.sections = {}  # name: (offset, length)
+        for section in range(section_count):
+            name, offset, length = _SECTION.unpack_from(self.map, _HEADER.size + section * _SECTION.size)
+            self.sections[name.decode("ascii")] = (offset, length)
+        self.meta = self.records("META")[0]
+        if "STRS" in self.sections:
+            string_count = _LENGTH.unpack_from(self.section("STRS"))[0]
+            self.string_offsets = self.column("STRS", "Q", _ALIGNMENT, string_count + 1)
+            self.string_data = self.section("STRS")[_ALIGNMENT + 8 * (string_count + 1):]
+            self.views.append(self.string_data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.map.close()
+
+    def section(self, name):
+        offset, length = self.sections[name]
+        view = memoryview(self.map)[offset:offset + length]
+        self.views.append(view)
+        return view
+
+    def column(self, name, typecode, start=0, count=None):
+        view = self.section(name)
+        if count is not None:
+            view = view[start:start + count * array(typecode).itemsize]
+            self.views.append(view)
+        view = view.cast(typecode)
+        self.views.append(view)
+        if sys.byteorder == "big":
+            swapped = array(typecode, view)
+            swapped.byteswap()
+            return swapped
+        return view
+
+    def records(self, name):
+        view = self.section(name)
+        count = _LENGTH.unpack_from(view)[0]
+        position = _LENGTH.size
+        records = []
+        for _ in range(count):
+            length = _LENGTH.unpack_from(view, position)[0]
+            position += _LENGTH.size
+            records.append(json.loads(bytes(view[position:position + length]).decode("utf-8")))
+            position += length
+        return records
+
+    def string(self, index):
+        if index == NO_STRING:
+            return None
+        return bytes(self.string_data[self.string_offsets[index]:self.string_offsets[index + 1]]).decode(
+            "utf-8", "surrogatepass")
+
+
+# the scenes of a screenplay or movie file; scene(index) decodes one scene without touching the others
+class SceneFile(BinaryFile, metaclass=abc.ABCMeta):
+    def __init__(self, path):
+        super(SceneFile, self).__init__(path)
+        self.scene_ids = self.column("SIDS", "q")
+        self.durations = self.column("SDUR", "d")
+        self.element_starts = self.column("SELS", "I")
+        self.indices = None  # scene identifier: index, built on the first lookup by identifier
+
+    def __len__(self):
+        return len(self.scene_ids)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.scene(index)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("scene index out of range")
+        return self.scene(index % len(self))
+
+    @abc.abstractmethod
+    # the scene at index, read from the file
+    def scene(self, index):
+        return
+
+    def index_of(self, identifier):
+        if self.indices is None:
+            self.indices = {}
+            for index, scene_id in enumerate(self.scene_ids):
+                self.indices.setdefault(scene_id, index)
+        return self.indices[identifier]
+
+
+class ScreenplayFile(SceneFile):
+    kind = SCREENPLAY
+
+    def __init__(self, path):
+        super(ScreenplayFile, self).__init__(path)
+        self.contents = self.column("ECON", "I")
+        self.names = self.column("ENAM", "I")
+        self.priorities = self.column("EPRI", "q")
+
+    def scene(self, index):
+        elements = [SceneElement(self.string(self.contents[element]), self.string(self.names[element]),
+                                 self.priorities[element])
+                    for element in range(self.element_starts[index], self.element_starts[index + 1])]
+        return Scene(elements, self.durations[index], self.scene_ids[index])
+
+    def load(self):
+        return Screenplay(list(self), self.meta["title"], uuid.UUID(self.meta["doc_id"]))
+
+
+class MovieFile(SceneFile):
+    kind = MOVIE
+
+    def __init__(self, path):
+        super(MovieFile, self).__init__(path)
+        self.styles = styles_fromList(self.records("STYL"))
+        self.element_styles = self.column("ESTY", "I")
+        self.positions = (self.column("EXPS", "d"), self.column("EYPS", "d"), self.column("EZPS", "d"))
+        self.flags = self.column("EFLG", "B")
+        self.identifiers = self.column("EIDS", "I")
+        self.texts = self.column("ETXT", "I")
+
+    def element(self, element):
+        flags = self.flags[element]
+        x, y, z = [int(column[element]) if flags & flag else column[element]
+                   for column, flag in zip(self.positions, (_INT_X, _INT_Y, _INT_Z))]
+        return VisualSceneElement(relative_X_position=x, relative_Y_position=y, relative_Z_position=z,
+                                  identifier=self.string(self.identifiers[element]),
+                                  text_string=self.string(self.texts[element]),
+                                  style=self.styles[self.element_styles[element]])
+
+    def scene(self, index):
+        elements = [self.element(element)
+                    for element in range(self.element_starts[index], self.element_starts[index + 1])]
+        return VisualScene(elements, self.durations[index], self.scene_ids[index])
+
+    def load(self):
+        return Movie(list(self), uuid.UUID(self.meta["screenplay_id"]))
+
+
+class FeaturesFile(BinaryFile):
+    kind = FEATURES
+
+    def __init__(self, path):
+        super(FeaturesFile, self).__init__(path)
+        self.scene_ids = self.column("FIDS", "q")
+        self.names = [self.string(index) for index in self.column("FCOL", "I")]
+        if "FINT" not in self.sections:
+            self.close()
+            raise Exception("Features file %s predates int columns, write it again with dump_features" % path)
+        self.column_types = self.column("FTYP", "B")
+        self.slots, self.int_count, self.float_count = _typed_slots(self.column_types)
+        self.int_values = self.column("FINT", "q")
+        self.float_values = self.column("FVAL", "d")
+        self.present = self.column("FMSK", "B")
+
+    def __len__(self):
+        return len(self.scene_ids)
+
+    def features(self, row):
+        start = row * len(self.names)
+        scene_features = {}
+        for column, name in enumerate(self.names):
+            if self.present[start + column]:
+                column_type = self.column_types[column]
+                if column_type == _FLOAT_COLUMN:
+                    scene_features[name] = self.float_values[row * self.float_count + self.slots[column]]
+                else:
+                    value = self.int_values[row * self.int_count + self.slots[column]]
+                    scene_features[name] = bool(value) if column_type == _BOOL_COLUMN else value
+        scene_features["identifier"] = self.scene_ids[row]
+        return scene_features
+
+    def load(self):
+        return [self.features(row) for row in range(len(self))]
+
+
+_FILE_CLASSES = {SCREENPLAY: ScreenplayFile, MOVIE: MovieFile, FEATURES: FeaturesFile}
+
+
+# the ScreenplayFile, MovieFile or FeaturesFile at path
+def open_binary(path):
+    with open(path, "rb") as fp:
+        header = fp.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise Exception("Not a binary file: " + path)
+    magic, version, kind, _ = _HEADER.unpack(header)
+    if kind not in _FILE_CLASSES:
+        raise Exception("Unknown kind of binary file %d: %s" % (kind, path))
+    return _FILE_CLASSES[kind](path)
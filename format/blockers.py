@@ -5,7 +5,7 @@ created by beth on 9/7/15
 """
 import abc
 
-from movie import VisualScene, VisualSceneElement, Movie
+from movie import VisualScene, VisualSceneElement, VisualStyle, Movie
 from screenplay import Screenplay
 
 
@@ -17,6 +17,10 @@ class Blocker(object):
             raise Exception("Yo, this is not a screenplay: " + str(screenplay))
         return
 
+    # yields the visual scene of each scene as it comes; blockers that block scenes one by one override this
+    def block_scenes(self, scenes):
+        return iter(self.block_screenplay(Screenplay(list(scenes))).visual_scenes)
+
 
 class BasicBlocker(Blocker):
     # Valid overflow_modes: [Overflow, Ellipsis, Masking, Truncate, ScrollRect, Page]
@@ -26,26 +30,29 @@ class BasicBlocker(Blocker):
         self.font_name = font_name
 
     def block_screenplay(self, screenplay):
-        visual_scenes = []
+        return Movie(list(self.block_scenes(screenplay.scenes)), screenplay.doc_id)
+
+    def block_scenes(self, scenes):
+        # every element is styled the same, so they all share this one style
+        style = VisualStyle(alignment="TopLeft",
+                            color=(1.0, 1.0, 1.0, 1.0),
+                            font_name=self.font_name,
+                            font_size=120.0,
+                            font_style="Normal",
+                            height=200.0,
+                            kerning=False,
+                            line_spacing=0.0,
+                            outline_color=(0.5, 0.5, 0.5, 1.0),
+                            outline_width=0.2,
+                            overflow_mode=self.overflow_mode,
+                            rotation=(0.0, 0.0, 0.0, 1.0),
+                            width=self.width,
+                            word_wrapping=False)
 
-        for scene in screenplay.scenes:
+        for scene in scenes:
             visual_scene = VisualScene()
 
-            visual_scene_element = VisualSceneElement()
-            visual_scene_element.overflow_mode = self.overflow_mode
-            visual_scene_element.width = self.width
-            visual_scene_element.alignment = "TopLeft"
-            visual_scene_element.color = (1.0, 1.0, 1.0, 1.0)
-            visual_scene_element.font_name = self.font_name
-            visual_scene_element.font_size = 120.0
-            visual_scene_element.font_style = "Normal"
-            visual_scene_element.height = 200.0
-            visual_scene_element.kerning = False
-            visual_scene_element.line_spacing = 0.0
-            visual_scene_element.outline_color = (0.5, 0.5, 0.5, 1.0)
-            visual_scene_element.outline_width = 0.2
-            visual_scene_element.rotation = (0.0, 0.0, 0.0, 1.0)
-            visual_scene_element.word_wrapping = False
+            visual_scene_element = VisualSceneElement(style=style)
 
             visual_scene_element.relative_X_position = 0.0
             visual_scene_element.relative_Y_position = 0.0
@@ -63,6 +70,4 @@ class BasicBlocker(Blocker):
             visual_scene.duration = scene.duration
             visual_scene.identifier = scene.identifier
 
-            visual_scenes.append(visual_scene)
-
-        return Movie(visual_scenes, screenplay.doc_id)
+            yield visual_scene
@@ -11,8 +11,18 @@ class Decorator(object):
             raise TypeError("Argument is not a screenplay.")
         return
 
+    # yields the decorated scenes one at a time; decorators that only need a bounded window of scenes override this,
+    # the rest decorate a whole screenplay of them
+    def decorate_scenes(self, scenes):
+        return iter(self.decorate_screenplay(Screenplay(list(scenes))).scenes)
+
 
 class FirstLastSceneAddDecorator(Decorator):
+    # stream_placeholder: decorate_scenes copies the first scene as the leading placeholder instead of the second to
+    # last, so that it holds one scene rather than all of them; the movie differs in that one scene, so it is opt-in
+    def __init__(self, stream_placeholder=False):
+        self.stream_placeholder = stream_placeholder
+
     def decorate_screenplay(self, screenplay):
         first_scene = copy(screenplay.scenes[len(screenplay.scenes) - 2]) # add second to last scene as placeholder
         last_scene = copy(screenplay.scenes[len(screenplay.scenes) - 1])
@@ -26,3 +36,30 @@ class FirstLastSceneAddDecorator(Decorator):
             scene_id += 1
 
         return screenplay
+
+    # without stream_placeholder the scenes are decorated as a whole screenplay, since the second to last scene is
+    # only known at the end
+    def decorate_scenes(self, scenes):
+        if not self.stream_placeholder:
+            return super(FirstLastSceneAddDecorator, self).decorate_scenes(scenes)
+        return self.stream_scenes(scenes)
+
+    # the leading placeholder is a copy of the first scene; only the latest scene is kept, to be copied as the
+    # trailing placeholder
+    def stream_scenes(self, scenes):
+        scene_id = 0
+        last_scene = None
+        for scene in scenes:
+            if last_scene is None:
+                first_scene = copy(scene)
+                first_scene.identifier = scene_id
+                scene_id += 1
+                yield first_scene
+            scene.identifier = scene_id
+            scene_id += 1
+            last_scene = scene
+            yield scene
+        if last_scene is not None:
+            last_scene = copy(last_scene)
+            last_scene.identifier = scene_id
+            yield last_scene
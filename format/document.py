@@ -8,6 +8,9 @@ from json import JSONEncoder
 import json
 import uuid
 
+from serialization import register_fields, to_json_tree
+from slots import slot_values
+
 
 class Document:
     def __init__(self, header=None, section=None):
@@ -18,6 +21,12 @@ class Document:
     def sentences(self):
         return self.section.sentences()
 
+    def iter_sentences(self):
+        return self.section.iter_sentences()
+
+    def walk(self, paths=True):
+        return self.section.walk(paths)
+
     def __repr__(self):
         return json.dumps(self, cls=DocumentJSONEncoder, indent=4)
 
@@ -57,16 +66,33 @@ class Section:
         return section
 
     def sentences(self):
-        all_sentences = []
-        if self.paragraphs:
-            for paragraph in self.paragraphs:
-                for sentence in paragraph.sentences:
-                    all_sentences.append(sentence)
-        if self.subsections:
-            for subsection in self.subsections:
-                for sentence in subsection.sentences():
-                    all_sentences.append(sentence)
-        return all_sentences
+        return list(self.iter_sentences())
+
+    def iter_sentences(self):
+        for path, sentence in self.walk(paths=False):
+            yield sentence
+
+    # yields (section path, sentence) in document order, the path being the tuple of sections from this one down
+    # to the one holding the sentence, or None without paths
+    # sections are visited from an explicit stack of subsection iterators, with one path list pushed and popped along
+    # the way; it is only copied to a tuple for sections that hold sentences
+    def walk(self, paths=True):
+        path = []
+        stack = [iter((self,))]
+        while stack:
+            section = next(stack[-1], None)
+            if section is None:
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+            path.append(section)
+            if section.paragraphs:
+                section_path = tuple(path) if paths else None
+                for paragraph in section.paragraphs:
+                    for sentence in paragraph.sentences:
+                        yield section_path, sentence
+            stack.append(iter(section.subsections or ()))
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
@@ -79,6 +105,8 @@ class Section:
 
 
 class Paragraph:
+    __slots__ = ("sentences", "position")
+
     def __init__(self, sentences=None, position=None):
         self.sentences = sentences
         self.position = position
@@ -95,7 +123,7 @@ class Paragraph:
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return slot_values(self) == slot_values(other)
         else:
             return False
 
@@ -104,6 +132,8 @@ class Paragraph:
 
 
 class Sentence:
+    __slots__ = ("text", "position")
+
     def __init__(self, text=None, position=None):
         self.text = text
         self.position = position
@@ -120,7 +150,7 @@ class Sentence:
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return slot_values(self) == slot_values(other)
         else:
             return False
 
@@ -131,53 +161,68 @@ class Sentence:
 # JSON encoding #######################################################################################################
 
 
+def document_fields(obj):
+    fields = {}
+    if obj.header:
+        fields["header"] = obj.header
+    if obj.section:
+        fields["section"] = obj.section
+    fields["doc_id"] = str(obj.doc_id)
+    return fields
+
+
+def section_fields(obj):
+    fields = {}
+    if obj.header:
+        fields["header"] = obj.header
+    if obj.paragraphs:
+        fields["paragraphs"] = obj.paragraphs
+    if obj.subsections:
+        fields["subsections"] = obj.subsections
+    return fields
+
+
+def paragraph_fields(obj):
+    fields = {}
+    if obj.sentences:
+        fields["sentences"] = obj.sentences
+    fields["position"] = obj.position
+    return fields
+
+
+def sentence_fields(obj):
+    return {"text": obj.text, "position": obj.position}
+
+
+register_fields(Document, document_fields)
+register_fields(Section, section_fields)
+register_fields(Paragraph, paragraph_fields)
+register_fields(Sentence, sentence_fields)
+
+
 class DocumentJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, Document):
             raise Exception("Cannot use this encoder to encode non-Document class.")
-        serialized_document = {}
-        if obj.header:
-            serialized_document["header"] = obj.header
-        if obj.section:
-            sect_encoder = SectionJSONEncoder()  # for serializing individual sections
-            serialized_document["section"] = sect_encoder.default(obj.section)
-        serialized_document["doc_id"] = str(obj.doc_id)
-        return serialized_document
+        return to_json_tree(obj)
 
 
 class SectionJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, Section):
             raise Exception("Cannot use this encoder to encode non-Section class.")
-        serialized_section = {}
-        if obj.header:
-            serialized_section["header"] = obj.header
-        if obj.paragraphs:
-            paragraph_encoder = ParagraphJSONEncoder()
-            serialized_section["paragraphs"] = [paragraph_encoder.default(paragraph)
-                                                for paragraph in obj.paragraphs]
-        if obj.subsections:
-            subsection_encoder = SectionJSONEncoder()
-            serialized_section["subsections"] = [subsection_encoder.default(subsection)
-                                                 for subsection in obj.subsections]
-        return serialized_section
+        return to_json_tree(obj)
 
 
 class ParagraphJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, Paragraph):
             raise Exception("Cannot use this encoder to encode non-Paragraph class.")
-        serialized_paragraph = {}
-        if obj.sentences:
-            sentence_encoder = SentenceJSONEncoder()  # for serializing individual sentences
-            serialized_paragraph["sentences"] = [sentence_encoder.default(sentence) for sentence in obj.sentences]
-        serialized_paragraph["position"] = obj.position
-        return serialized_paragraph
+        return to_json_tree(obj)
 
 
 class SentenceJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, Sentence):
             raise Exception("Cannot use this encoder to encode non-Sentence class.")
-        serialized_sentence = {"text": obj.text, "position": obj.position}
-        return serialized_sentence
+        return to_json_tree(obj)
@@ -1,29 +1,87 @@
 import abc
 from collections import defaultdict
-from math import log
+from itertools import islice
+from math import nan
 
-from nltk import wordpunct_tokenize, word_tokenize, pos_tag
-from nltk.parse.stanford import StanfordParser
+import numpy as np
 
+from analysis import MovieAnalysis
+from feature_matrix import ROLLING_AGGREGATES, FeatureMatrix, element_values, offset_rows, pos_tag_ids, rolling, \
+    scene_means, shift_column, take_rows, window_entropies, word_ids, word_lengths
 from movie import Movie
+from parsers import Parser, cached_parser, shared_parser
+
+# the tags of the Penn Treebank tagset that nltk's tagger uses, which are the columns of parts of speech features
+PENN_TREEBANK_TAGS = ("CC", "CD", "DT", "EX", "FW", "IN", "JJ", "JJR", "JJS", "LS", "MD", "NN", "NNS", "NNP", "NNPS",
+                      "PDT", "POS", "PRP", "PRP$", "RB", "RBR", "RBS", "RP", "SYM", "TO", "UH", "VB", "VBD", "VBG",
+                      "VBN", "VBP", "VBZ", "WDT", "WP", "WP$", "WRB", "#", "$", "''", "``", "(", ")", ",", ".", ":")
+
+
+# scene identifier: features, of the extractors a MultiFeatureExtractor has run so far
+class ExtractedFeatures(defaultdict):
+    def __init__(self):
+        super().__init__(dict)
+        self.missing_values = {}  # feature name: value of scenes without the feature, for each feature extracted
 
 
 class FeatureExtractor:
+    feature_names = ()  # the features every scene gets, in feature matrix column order
+    missing_value = nan  # feature matrix value of features a scene does not have
+
     def __init__(self):
         self.features = defaultdict(dict)
 
     @abc.abstractmethod
     # returns an array of features
-    def get_features(self, movie):
+    # extractors run together share one MovieAnalysis so that every text is only tokenized and tagged once
+    # previous_features: in a MultiFeatureExtractor, the ExtractedFeatures of the extractors before this one, for
+    # extractors that build on features already extracted rather than extracting them again
+    def get_features(self, movie, analysis=None, previous_features=None):
         if not isinstance(movie, Movie):
             raise Exception("Cannot extract features from non-movie object: " + str(movie))
-        return
+        if analysis is None:
+            analysis = MovieAnalysis(movie)
+        return analysis
+
+    # forgets the features of earlier movies
+    def reset(self):
+        self.features = defaultdict(dict)
+
+    # how many scenes before and after a scene its features are taken from
+    def scene_margin(self):
+        return 0
+
+    # feature name: feature matrix value of scenes without the feature
+    def missing_values(self):
+        return {name: self.missing_value for name in self.feature_names}
+
+    # feature name: numpy array of the feature for each scene of the movie, in scene order
+    # this goes through get_features; extractors with a vectorized form override it
+    # previous_columns: in a MultiFeatureExtractor, the columns of the extractors before this one
+    def get_feature_columns(self, movie, analysis=None, previous_columns=None):
+        self.reset()
+        features = self.get_features(movie, analysis)
+        columns = {name: np.full(len(movie.visual_scenes), missing_value)
+                   for name, missing_value in self.missing_values().items()}
+        for row, visual_scene in enumerate(movie.visual_scenes):
+            for name, value in features.get(visual_scene.identifier, {}).items():
+                if name not in columns:
+                    columns[name] = np.full(len(movie.visual_scenes), self.missing_value)
+                columns[name][row] = value
+        self.reset()
+        return columns
 
 
 class DocumentPositionFeatureExtractor(FeatureExtractor):
-    def get_features(self, movie):
-        super(DocumentPositionFeatureExtractor, self).get_features(movie)
-        position = 0
+    feature_names = ("position",)
+
+    def get_feature_columns(self, movie, analysis=None, previous_columns=None):
+        analysis = super(DocumentPositionFeatureExtractor, self).get_features(movie, analysis)
+        return {"position": np.arange(len(movie.visual_scenes), dtype=np.float64) + analysis.first_position}
+
+    def get_features(self, movie, analysis=None, previous_features=None):
+        analysis = super(DocumentPositionFeatureExtractor, self).get_features(movie, analysis)
+        position = analysis.first_position
         for visual_scene in movie.visual_scenes:
             self.features[visual_scene.identifier] = {"position": position}
             position += 1
@@ -32,12 +90,19 @@ class DocumentPositionFeatureExtractor(FeatureExtractor):
 
 
 class OverallLengthFeatureExtractor(FeatureExtractor):
-    def get_features(self, movie):
-        super(OverallLengthFeatureExtractor, self).get_features(movie)
+    feature_names = ("overall_length",)
+
+    def get_feature_columns(self, movie, analysis=None, previous_columns=None):
+        analysis = super(OverallLengthFeatureExtractor, self).get_features(movie, analysis)
+        rows, _ = word_lengths(movie, analysis)
+        return {"overall_length": np.bincount(rows, minlength=len(movie.visual_scenes)).astype(np.float64)}
+
+    def get_features(self, movie, analysis=None, previous_features=None):
+        analysis = super(OverallLengthFeatureExtractor, self).get_features(movie, analysis)
         for visual_scene in movie.visual_scenes:
             scene_length = 0
             for visual_scene_element in visual_scene.visual_scene_elements:
-                words = wordpunct_tokenize(visual_scene_element.text_string)
+                words = analysis.words(visual_scene_element)
                 scene_length += len(words)
             self.features[visual_scene.identifier] = {"overall_length": scene_length}
             print("OverallLengthFeatureExtractor scene ", visual_scene.identifier)
@@ -45,13 +110,20 @@ class OverallLengthFeatureExtractor(FeatureExtractor):
 
 
 class AverageWordLengthFeatureExtractor(FeatureExtractor):
-    def get_features(self, movie):
-        super(AverageWordLengthFeatureExtractor, self).get_features(movie)
+    feature_names = ("avg_word_length",)
+
+    def get_feature_columns(self, movie, analysis=None, previous_columns=None):
+        analysis = super(AverageWordLengthFeatureExtractor, self).get_features(movie, analysis)
+        rows, lengths = word_lengths(movie, analysis)
+        return {"avg_word_length": scene_means(rows, lengths, len(movie.visual_scenes))}
+
+    def get_features(self, movie, analysis=None, previous_features=None):
+        analysis = super(AverageWordLengthFeatureExtractor, self).get_features(movie, analysis)
         for visual_scene in movie.visual_scenes:
             total_word_length = 0
             total_num_words = 0
             for visual_scene_element in visual_scene.visual_scene_elements:
-                words = wordpunct_tokenize(visual_scene_element.text_string)
+                words = analysis.words(visual_scene_element)
                 for word in words:
                     total_word_length += len(word)
                     total_num_words += 1
@@ -60,68 +132,104 @@ class AverageWordLengthFeatureExtractor(FeatureExtractor):
         return self.features
 
 
-class WordEntropyFeatureExtractor(FeatureExtractor):
-    def get_features(self, movie):
-        super(WordEntropyFeatureExtractor, self).get_features(movie)
+# the entropy of a scene's tokens, or with a window, of the tokens of the scene and the window scenes either side of it
+class EntropyFeatureExtractor(FeatureExtractor):
+    name = None  # of the feature without a window
 
-        for visual_scene in movie.visual_scenes:
-            word_frequencies = defaultdict(int)
-            total_words = 0
-            for visual_scene_element in visual_scene.visual_scene_elements:
-                words = wordpunct_tokenize(visual_scene_element.text_string)
-                for word in words:
-                    word_frequencies[word] += 1
-                    total_words += 1
-            entropy = 0.0
-            for word in word_frequencies:
-                p = float(word_frequencies[word]) / total_words
-                entropy += p * log(p)
-            self.features[visual_scene.identifier] = {"word_entropy": -1.0 * entropy}
-            print("WordEntropyFeatureExtractor scene ", visual_scene.identifier)
+    def __init__(self, window=0):
+        super().__init__()
+        self.window = window
+
+    @property
+    def feature_names(self):
+        return (self.name + "_window_" + str(self.window) if self.window else self.name,)
+
+    def scene_margin(self):
+        return self.window
 
+    @abc.abstractmethod
+    # (row of the scene, integer id) of every token of the movie
+    def token_ids(self, movie, analysis):
+        return
+
+    # window_entropies with no window is scene_entropies, the entropy of each scene's own tokens
+    def get_feature_columns(self, movie, analysis=None, previous_columns=None):
+        analysis = super(EntropyFeatureExtractor, self).get_features(movie, analysis)
+        rows, ids = self.token_ids(movie, analysis)
+        return {self.feature_names[0]: window_entropies(rows, ids, len(movie.visual_scenes), self.window)}
+
+    def get_features(self, movie, analysis=None, previous_features=None):
+        analysis = super(EntropyFeatureExtractor, self).get_features(movie, analysis)
+        name, = self.feature_names
+        for visual_scene, entropy in zip(movie.visual_scenes,
+                                         self.get_feature_columns(movie, analysis)[name].tolist()):
+            self.features[visual_scene.identifier] = {name: entropy}
         return self.features
 
 
-class ParseTreeFeatureExtractor(FeatureExtractor):
-    def __init__(self, parser):
-        super().__init__()
-        if not isinstance(parser, StanfordParser):
-            raise Exception("Argument for parser is not a StanfordParser object.")
-        self.parser = parser  # converts string to tree
+class WordEntropyFeatureExtractor(EntropyFeatureExtractor):
+    name = "word_entropy"
+
+    def token_ids(self, movie, analysis):
+        return word_ids(movie, analysis)
 
-    def get_features(self, movie):
-        super(ParseTreeFeatureExtractor, self).get_features(movie)
 
+class ParseTreeFeatureExtractor(FeatureExtractor):
+    feature_names = ("max_tree_length", "max_tree_height")
+
+    def __init__(self, parser=None, chunk_size=100):
+        super().__init__()
+        if parser is None:
+            parser = shared_parser()
+        if not hasattr(parser, "raw_parse_sents"):
+            raise Exception("Argument for parser is not a parser backend with raw_parse_sents.")
+        self.parser = cached_parser(parser)  # converts string to tree
+        self.chunk_size = chunk_size  # sentences sent to the parser per raw_parse_sents call
+
+    def get_features(self, movie, analysis=None, previous_features=None):
+        super(ParseTreeFeatureExtractor, self).get_features(movie, analysis)
+
+        # raw_parse on an element only ever returned the tree of its first line, so that is what gets parsed
+        scene_sentences = []  # (scene identifier, sentence) for the whole movie
         for visual_scene in movie.visual_scenes:
-            max_tree_len = 0
-            max_tree_height = 0
+            self.features[visual_scene.identifier] = {"max_tree_length": 0, "max_tree_height": 0}
             for visual_scene_element in visual_scene.visual_scene_elements:
-                input_trees = self.parser.raw_parse(visual_scene_element.text_string)
+                for line in Parser.lines([visual_scene_element.text_string]):
+                    scene_sentences.append((visual_scene.identifier, line))
+                    break
+            print("ParseTreeFeatureExtractor scene ", visual_scene.identifier)
+
+        for chunk_start in range(0, len(scene_sentences), self.chunk_size):
+            chunk = scene_sentences[chunk_start:chunk_start + self.chunk_size]
+            parsed_chunk = self.parser.raw_parse_sents([sentence for _, sentence in chunk])
+            for (identifier, _), input_trees in zip(chunk, parsed_chunk):
+                features = self.features[identifier]
                 for tree_set in input_trees:
                     for tree in tree_set:
-                        if len(tree) > max_tree_len:
-                            max_tree_len = len(tree)  # The length of a tree is the number of children it has.
-                        if tree.height() > max_tree_height:
-                            max_tree_height = tree.height()  # The height of a tree
+                        if len(tree) > features["max_tree_length"]:
+                            # The length of a tree is the number of children it has.
+                            features["max_tree_length"] = len(tree)
+                        if tree.height() > features["max_tree_height"]:
+                            features["max_tree_height"] = tree.height()  # The height of a tree
                             # containing no children is 1; the height of a tree
                             # containing only leaves is 2; and the height of any other
                             # tree is one plus the maximum of its children's
                             # heights.
-            self.features[visual_scene.identifier] = {"max_tree_length": max_tree_len,
-                                                      "max_tree_height": max_tree_height}
-            print("ParseTreeFeatureExtractor scene ", visual_scene.identifier)
         return self.features
 
 
 class PartsOfSpeechFeatureExtractor(FeatureExtractor):
-    def get_features(self, movie):
-        super(PartsOfSpeechFeatureExtractor, self).get_features(movie)
+    feature_names = PENN_TREEBANK_TAGS
+    missing_value = 0.0  # tags are counted
+
+    def get_features(self, movie, analysis=None, previous_features=None):
+        analysis = super(PartsOfSpeechFeatureExtractor, self).get_features(movie, analysis)
+        analysis.tag_all()
 
         for visual_scene in movie.visual_scenes:
             pos_tag_features = defaultdict(int)
             for visual_scene_element in visual_scene.visual_scene_elements:
-                words = word_tokenize(visual_scene_element.text_string)
-                pos_tags = pos_tag(words)
+                pos_tags = analysis.pos_tags(visual_scene_element)
                 for tag in pos_tags:
                     pos_tag_features[tag[1]] += 1
             self.features[visual_scene.identifier] = pos_tag_features
@@ -129,27 +237,11 @@ class PartsOfSpeechFeatureExtractor(FeatureExtractor):
         return self.features
 
 
-class POSEntropyFeatureExtractor(FeatureExtractor):
-    def get_features(self, movie):
-        super(POSEntropyFeatureExtractor, self).get_features(movie)
+class POSEntropyFeatureExtractor(EntropyFeatureExtractor):
+    name = "pos_entropy"
 
-        for visual_scene in movie.visual_scenes:
-            pos_tag_features = defaultdict(int)
-            total_features = 0
-            for visual_scene_element in visual_scene.visual_scene_elements:
-                words = word_tokenize(visual_scene_element.text_string)
-                pos_tags = pos_tag(words)
-                for tag in pos_tags:
-                    pos_tag_features[tag[1]] += 1
-                    total_features += 1
-            # calculate entropy
-            entropy = 0.0
-            for tag in pos_tag_features:
-                p = float(pos_tag_features[tag]) / total_features
-                entropy += p * log(p)
-            self.features[visual_scene.identifier] = {"pos_entropy": -1.0 * entropy}
-            print("POSEntropyFeatureExtractor scene ", visual_scene.identifier)
-        return self.features
+    def token_ids(self, movie, analysis):
+        return pos_tag_ids(movie, analysis)
 
 
 class NeighboringSceneFeatureExtractor(FeatureExtractor):
@@ -158,9 +250,9 @@ class NeighboringSceneFeatureExtractor(FeatureExtractor):
         self.relative_position = relative_position
         self.base_feature_extractor = base_feature_extractor
 
-    def get_features(self, movie):
-        super(NeighboringSceneFeatureExtractor, self).get_features(movie)
-        features = self.base_feature_extractor.get_features(movie)
+    def get_features(self, movie, analysis=None, previous_features=None):
+        analysis = super(NeighboringSceneFeatureExtractor, self).get_features(movie, analysis)
+        features = self.base_feature_extractor.get_features(movie, analysis)
         shifted_features = defaultdict(lambda: defaultdict())
         for identifier in features:
             shifted_identifier = identifier - self.relative_position
@@ -169,17 +261,120 @@ class NeighboringSceneFeatureExtractor(FeatureExtractor):
                 shifted_features[shifted_identifier][shifted_key] = features[identifier][key]
         return shifted_features
 
+    def reset(self):
+        super(NeighboringSceneFeatureExtractor, self).reset()
+        self.base_feature_extractor.reset()
+
+    def scene_margin(self):
+        return abs(self.relative_position) + self.base_feature_extractor.scene_margin()
+
+    def shifted_name(self, name):
+        return name + "_" + str(self.relative_position)
+
+    @property
+    def feature_names(self):
+        return tuple(self.shifted_name(name) for name in self.base_feature_extractor.feature_names)
+
+    def missing_values(self):
+        return {self.shifted_name(name): missing_value
+                for name, missing_value in self.base_feature_extractor.missing_values().items()}
+
+    # unlike get_features, which also gives features to identifiers past either end of the movie, this only has rows
+    # for the movie's scenes
+    def get_feature_columns(self, movie, analysis=None, previous_columns=None):
+        analysis = super(NeighboringSceneFeatureExtractor, self).get_features(movie, analysis)
+        missing_values = self.base_feature_extractor.missing_values()
+        return {self.shifted_name(name): shift_column(column, movie, self.relative_position,
+                                                      missing_values.get(name,
+                                                                         self.base_feature_extractor.missing_value))
+                for name, column in self.base_feature_extractor.get_feature_columns(movie, analysis).items()}
+
+
+# features of neighbouring scenes, taken from the base features that earlier extractors of a MultiFeatureExtractor
+# already computed instead of running those extractors again: name_<offset> is the feature of the scene offset scenes
+# (by identifier) after a scene, like NeighboringSceneFeatureExtractor gives, and name_<aggregate>_<radius> the
+# aggregate of the feature over the scene and the radius scenes either side of it
+class SceneContextFeatureExtractor(FeatureExtractor):
+    def __init__(self, base_features, offsets=(-1,), windows=(), aggregates=("mean", "max")):
+        super().__init__()
+        for aggregate in aggregates:
+            if aggregate not in ROLLING_AGGREGATES:
+                raise Exception("Unknown aggregate " + aggregate + ", expecting one of " +
+                                str(list(ROLLING_AGGREGATES)))
+        self.base_features = tuple(base_features)
+        self.offsets = tuple(offsets)
+        self.windows = tuple(windows)
+        self.aggregates = tuple(aggregates)
+
+    @property
+    def feature_names(self):
+        names = []
+        for name in self.base_features:
+            names.extend(name + "_" + str(offset) for offset in self.offsets)
+            names.extend(name + "_" + aggregate + "_" + str(radius)
+                         for radius in self.windows for aggregate in self.aggregates)
+        return tuple(names)
+
+    def scene_margin(self):
+        return max([abs(offset) for offset in self.offsets] + list(self.windows), default=0)
+
+    # from the base features of previous_features, which a MultiFeatureExtractor gives
+    def get_features(self, movie, analysis=None, previous_features=None):
+        super(SceneContextFeatureExtractor, self).get_features(movie, analysis)
+        if previous_features is None:
+            previous_features = ExtractedFeatures()
+        columns = {}
+        value_types = {}  # context feature name: int or bool, when its base feature only has values of that type
+        for name in self.base_features:
+            if name in previous_features.missing_values:  # get_feature_columns reports the others
+                missing_value = previous_features.missing_values[name]
+                values = [previous_features.get(visual_scene.identifier, {}).get(name)
+                          for visual_scene in movie.visual_scenes]
+                types = set(type(value) for value in values if value is not None)
+                if len(types) == 1 and types <= {int, bool}:
+                    value_types.update((name + "_" + str(offset), list(types)[0]) for offset in self.offsets)
+                columns[name] = np.array([missing_value if value is None else value for value in values],
+                                         dtype=np.float64)
+        self.reset()
+        for name, column in self.get_feature_columns(movie, analysis, columns).items():
+            value_type = value_types.get(name, float)
+            for visual_scene, value in zip(movie.visual_scenes, column.tolist()):
+                if value == value:  # not NaN
+                    self.features[visual_scene.identifier][name] = value_type(value)
+        return self.features
+
+    # feature name: column over the movie's scenes, from previous_columns, which holds the base features
+    def get_feature_columns(self, movie, analysis=None, previous_columns=None):
+        if previous_columns is None:
+            previous_columns = {}
+        for name in self.base_features:
+            if name not in previous_columns:
+                raise Exception("Base feature " + name + " has not been extracted before SceneContextFeatureExtractor.")
+        identifiers = [visual_scene.identifier for visual_scene in movie.visual_scenes]
+        rows_by_offset = [(offset, offset_rows(identifiers, offset)) for offset in self.offsets]
+        context = {}
+        for name in self.base_features:
+            for offset, rows in rows_by_offset:
+                context[name + "_" + str(offset)] = take_rows(previous_columns[name], rows)
+            for radius in self.windows:
+                for aggregate in self.aggregates:
+                    context[name + "_" + aggregate + "_" + str(radius)] = rolling(previous_columns[name], radius,
+                                                                                  aggregate)
+        return context
+
 
 class MultiFeatureExtractor(FeatureExtractor):
     def __init__(self, list_of_feature_extractors):
         super().__init__()
         self.extractors = list_of_feature_extractors
 
-    def get_features(self, movie):
-        super(MultiFeatureExtractor, self).get_features(movie)
-        features_by_id_combined = defaultdict(dict)
+    def get_features(self, movie, analysis=None, previous_features=None):
+        analysis = super(MultiFeatureExtractor, self).get_features(movie, analysis)
+        features_by_id_combined = ExtractedFeatures()
         for extractor in self.extractors:
-            features_by_id = extractor.get_features(movie)  # dict of dicts scene_id:{features}
+            # dict of dicts scene_id:{features}
+            features_by_id = extractor.get_features(movie, analysis, features_by_id_combined)
+            features_by_id_combined.missing_values.update(extractor.missing_values())
             for feature_id in features_by_id:
                 features_by_id_combined[feature_id].update(features_by_id[feature_id])
 
@@ -191,10 +386,86 @@ class MultiFeatureExtractor(FeatureExtractor):
             features_combined.append(features)
         return features_combined
 
+    def reset(self):
+        super(MultiFeatureExtractor, self).reset()
+        for extractor in self.extractors:
+            extractor.reset()
+
+    def scene_margin(self):
+        return max([extractor.scene_margin() for extractor in self.extractors], default=0)
+
+    @property
+    def feature_names(self):
+        return tuple(self.missing_values())
+
+    def missing_values(self):
+        missing_values = {}
+        for extractor in self.extractors:
+            missing_values.update(extractor.missing_values())
+        return missing_values
+
+    def get_feature_columns(self, movie, analysis=None, previous_columns=None):
+        analysis = super(MultiFeatureExtractor, self).get_features(movie, analysis)
+        columns = {}
+        for extractor in self.extractors:
+            columns.update(extractor.get_feature_columns(movie, analysis, columns))
+        return columns
+
+    # the features of every scene of the movie as one FeatureMatrix, with the columns of feature_names first
+    def get_feature_matrix(self, movie, analysis=None):
+        columns = self.get_feature_columns(movie, analysis)
+        values = np.empty((len(movie.visual_scenes), len(columns)))
+        for column, name in enumerate(columns):
+            values[:, column] = columns[name]
+        return FeatureMatrix([visual_scene.identifier for visual_scene in movie.visual_scenes], list(columns), values)
+
+    # the features get_features gives for a movie with these scenes, worked out chunk_size scenes at a time so that
+    # visual_scenes can be read as they are needed, e.g. from a streaming.MovieReader
+    def iter_features(self, visual_scenes, chunk_size=100):
+        margin = self.scene_margin()
+        visual_scenes = iter(visual_scenes)
+        before = []  # the scenes preceding the chunk that its features depend on
+        window = list(islice(visual_scenes, chunk_size + margin))
+        position = 0  # of the chunk's first scene
+        scene_ids = []  # [first, last + 1] runs of consecutive identifiers, so a long movie is one run
+        phantom_features = {}  # identifier: features shifted past either end of the movie
+        while window:
+            chunk = window[:chunk_size]
+            after = window[chunk_size:]
+            movie = Movie(before + chunk + after)
+            self.reset()
+            features = self.get_features(movie, MovieAnalysis(movie, position - len(before)))
+            chunk_ids = set(visual_scene.identifier for visual_scene in chunk)
+            window_ids = set(visual_scene.identifier for visual_scene in movie.visual_scenes)
+            for visual_scene in chunk:
+                if scene_ids and visual_scene.identifier == scene_ids[-1][1]:
+                    scene_ids[-1][1] += 1
+                else:
+                    scene_ids.append([visual_scene.identifier, visual_scene.identifier + 1])
+            for scene_features in features:
+                if scene_features["identifier"] in chunk_ids:
+                    yield scene_features
+                elif scene_features["identifier"] not in window_ids:
+                    phantom_features[scene_features["identifier"]] = scene_features
+            before = (before + chunk)[-margin:] if margin else []
+            position += len(chunk)
+            window = after + list(islice(visual_scenes, chunk_size + margin - len(after)))
+        self.reset()
+        for identifier, scene_features in phantom_features.items():
+            if not any(first <= identifier < end for first, end in scene_ids):
+                yield scene_features
+
 
 class SceneWidthFeatureExtractor(FeatureExtractor):
-    def get_features(self, movie):
-        super(SceneWidthFeatureExtractor, self).get_features(movie)
+    feature_names = ("avg_visual_scene_element_width",)
+
+    def get_feature_columns(self, movie, analysis=None, previous_columns=None):
+        super(SceneWidthFeatureExtractor, self).get_features(movie, analysis)
+        rows, widths = element_values(movie, lambda visual_scene_element: visual_scene_element.width)
+        return {"avg_visual_scene_element_width": scene_means(rows, widths, len(movie.visual_scenes))}
+
+    def get_features(self, movie, analysis=None, previous_features=None):
+        super(SceneWidthFeatureExtractor, self).get_features(movie, analysis)
 
         for visual_scene in movie.visual_scenes:
             sum_of_scene_widths = 0
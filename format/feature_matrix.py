@@ -0,0 +1,208 @@
+"""
+FeatureMatrix - extracted features as a dense numpy array of scenes by features
+The columns are the feature names the extractors declare, in extractor order, so a matrix has the same schema
+whatever scenes went into it. Features a scene does not have are filled with the column's missing value: 0 for counts,
+NaN otherwise.
+"""
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class FeatureMatrix(object):
+    # identifiers: scene identifier of each row; columns: feature name of each column
+    def __init__(self, identifiers, columns, values):
+        self.identifiers = np.asarray(identifiers, dtype=np.int64)
+        self.columns = list(columns)
+        self.values = np.asarray(values, dtype=np.float64)
+
+    # missing_values: feature name: value of scenes without the feature
+    @staticmethod
+    def from_features(features, missing_values, identifiers=None):
+        columns = list(missing_values)
+        column_indices = {name: column for column, name in enumerate(columns)}
+        if identifiers is None:
+            identifiers = [scene_features["identifier"] for scene_features in features]
+        rows = {identifier: row for row, identifier in enumerate(identifiers)}
+        values = np.empty((len(rows), len(columns)))
+        values[:] = [missing_values[name] for name in columns]
+        for scene_features in features:
+            row = rows.get(scene_features["identifier"])
+            if row is None:
+                continue
+            for name, value in scene_features.items():
+                if name in column_indices:
+                    values[row, column_indices[name]] = value
+        return FeatureMatrix(identifiers, columns, values)
+
+    # the same scenes as a list of dicts, as MultiFeatureExtractor.get_features returns them; missing values are kept
+    def to_features(self):
+        return [dict(zip(self.columns, row.tolist()), identifier=identifier)
+                for identifier, row in zip(self.identifiers.tolist(), self.values)]
+
+    def column(self, name):
+        return self.values[:, self.columns.index(name)]
+
+    # .npz files hold the values, columns and identifiers; .npy files only the values
+    def save(self, path):
+        if path.endswith(".npy"):
+            np.save(path, self.values)
+        else:
+            np.savez(path, values=self.values, columns=np.array(self.columns, dtype=str),
+                     identifiers=self.identifiers)
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as arrays:
+            return FeatureMatrix(arrays["identifiers"], arrays["columns"].tolist(), arrays["values"])
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return self.columns == other.columns and np.array_equal(self.identifiers, other.identifiers) and \
+                np.array_equal(self.values, other.values, equal_nan=True)
+        else:
+            return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "FeatureMatrix(%d scenes, columns=%r)" % (len(self.identifiers), self.columns)
+
+
+# rows of a movie's scenes, keyed by scene identifier
+def scene_rows(movie):
+    rows = {}
+    for row, visual_scene in enumerate(movie.visual_scenes):
+        rows.setdefault(visual_scene.identifier, row)
+    return rows
+
+
+# (row of the scene, length) of every word token of the movie, from the analysis's wordpunct tokens
+def word_lengths(movie, analysis):
+    if "word_lengths" not in analysis.arrays:
+        lengths = []
+        rows = []
+        for row, visual_scene in enumerate(movie.visual_scenes):
+            for visual_scene_element in visual_scene.visual_scene_elements:
+                words = analysis.words(visual_scene_element)
+                lengths.extend(map(len, words))
+                rows.extend([row] * len(words))
+        analysis.arrays["word_lengths"] = (np.array(rows, dtype=np.intp), np.array(lengths, dtype=np.float64))
+    return analysis.arrays["word_lengths"]
+
+
+# (row of the scene, integer id) of every token of the movie, ids numbering distinct tokens in order of appearance
+# tokens: function giving an element's tokens
+def token_ids(movie, tokens):
+    vocabulary = {}
+    rows = []
+    ids = []
+    for row, visual_scene in enumerate(movie.visual_scenes):
+        for visual_scene_element in visual_scene.visual_scene_elements:
+            element_tokens = tokens(visual_scene_element)
+            ids.extend(vocabulary.setdefault(token, len(vocabulary)) for token in element_tokens)
+            rows.extend([row] * len(element_tokens))
+    return np.array(rows, dtype=np.intp), np.array(ids, dtype=np.intp)
+
+
+def word_ids(movie, analysis):
+    if "word_ids" not in analysis.arrays:
+        analysis.arrays["word_ids"] = token_ids(movie, analysis.words)
+    return analysis.arrays["word_ids"]
+
+
+def pos_tag_ids(movie, analysis):
+    if "pos_tag_ids" not in analysis.arrays:
+        analysis.tag_all()
+        analysis.arrays["pos_tag_ids"] = token_ids(
+            movie, lambda visual_scene_element: [tag for _, tag in analysis.pos_tags(visual_scene_element)])
+    return analysis.arrays["pos_tag_ids"]
+
+
+# entropy per scene of the distribution of the token ids at rows, 0 for scenes without tokens
+# the counts of each (scene, token) pair come from one sort of the pairs rather than a bincount over scenes times
+# vocabulary, which would be mostly zeros
+def scene_entropies(rows, ids, scenes):
+    if not len(ids):
+        return np.zeros(scenes)
+    vocabulary_size = int(ids.max()) + 1
+    pairs, counts = np.unique(rows.astype(np.int64) * vocabulary_size + ids, return_counts=True)
+    pair_rows = pairs // vocabulary_size
+    p = counts / np.bincount(rows, minlength=scenes)[pair_rows]
+    return -np.bincount(pair_rows, weights=p * np.log(p), minlength=scenes)
+
+
+# entropy per scene of the tokens of the scene and the window scenes on either side of it
+def window_entropies(rows, ids, scenes, window):
+    offsets = np.arange(-window, window + 1)
+    window_rows = (rows[:, np.newaxis] + offsets).ravel()
+    window_ids = np.repeat(ids, len(offsets))
+    inside = (window_rows >= 0) & (window_rows < scenes)
+    return scene_entropies(window_rows[inside], window_ids[inside], scenes)
+
+
+# (row of the scene, value) of every element of the movie
+def element_values(movie, value):
+    rows = []
+    values = []
+    for row, visual_scene in enumerate(movie.visual_scenes):
+        for visual_scene_element in visual_scene.visual_scene_elements:
+            rows.append(row)
+            values.append(value(visual_scene_element))
+    return np.array(rows, dtype=np.intp), np.array(values, dtype=np.float64)
+
+
+# sum per scene of values at rows; scenes is the number of scenes
+def scene_sums(rows, values, scenes):
+    return np.bincount(rows, weights=values, minlength=scenes)
+
+
+# mean per scene of values at rows, NaN for scenes without values
+def scene_means(rows, values, scenes):
+    counts = np.bincount(rows, minlength=scenes)
+    sums = scene_sums(rows, values, scenes)
+    means = np.full(scenes, np.nan)
+    np.divide(sums, counts, out=means, where=counts > 0)
+    return means
+
+
+# for each scene, the row of the scene offset after it by identifier, -1 where there is none
+# identifiers: of the scenes, in row order
+def offset_rows(identifiers, offset):
+    identifiers = np.asarray(identifiers, dtype=np.int64)
+    scenes = len(identifiers)
+    if scenes and identifiers[-1] - identifiers[0] == scenes - 1 and np.all(np.diff(identifiers) == 1):
+        rows = np.arange(scenes) + offset
+        rows[(rows < 0) | (rows >= scenes)] = -1
+        return rows
+    rows = {}
+    for row, identifier in enumerate(identifiers.tolist()):
+        rows.setdefault(identifier, row)
+    return np.array([rows.get(identifier + offset, -1) for identifier in identifiers.tolist()], dtype=np.intp)
+
+
+# column values at rows, missing_value at rows of -1
+def take_rows(column, rows, missing_value=np.nan):
+    taken = np.full(len(rows), missing_value, dtype=np.float64)
+    found = rows >= 0
+    taken[found] = column[rows[found]]
+    return taken
+
+
+# column of the features of the scene relative_position scenes (by identifier) after each scene, NaN where there is none
+def shift_column(column, movie, relative_position, missing_value):
+    identifiers = [visual_scene.identifier for visual_scene in movie.visual_scenes]
+    return take_rows(column, offset_rows(identifiers, relative_position), missing_value)
+
+
+ROLLING_AGGREGATES = {"mean": np.nanmean, "max": np.nanmax, "min": np.nanmin, "sum": np.nansum}
+
+
+# aggregate of column over each row and the radius rows either side of it, ignoring NaNs and rows past either end
+def rolling(column, radius, aggregate):
+    windows = sliding_window_view(np.pad(column, radius, constant_values=np.nan), 2 * radius + 1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN windows are NaN, or 0 for sum
+        return ROLLING_AGGREGATES[aggregate](windows, axis=1)
@@ -2,19 +2,67 @@
 OpenMind Movie format - Screenplays are converted to this format prior to entry to Unity
 created by beth on 9/7/15
 """
+from collections import namedtuple
 from json import JSONEncoder
 import uuid
 
+from serialization import register_fields, to_json_tree
+from slots import slot_values
+
+# the styling that BasicBlocker stamps onto every element; elements share one VisualStyle per distinct style
+VisualStyle = namedtuple("VisualStyle", ["alignment", "color", "font_name", "font_size", "font_style", "height",
+                                         "kerning", "line_spacing", "outline_color", "outline_width", "overflow_mode",
+                                         "rotation", "width", "word_wrapping"])
+
+
+def _value_types(value):
+    return tuple(map(type, value)) if isinstance(value, tuple) else type(value)
+
+
+# colours and rotations read from JSON are lists, which cannot be hashed
+def style_value(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+# the style with its lists made tuples
+def hashable_style(style):
+    if any(isinstance(value, list) for value in style):
+        return VisualStyle(*map(style_value, style))
+    return style
+
+
+# what tells styles apart: 1 and 1.0 are equal but serialize differently, so they stay different styles
+def style_key(style):
+    return style, tuple(map(_value_types, style))
+
+
+# the one instance of a style in table, a dict of style key: style that lives as long as the movie being read
+def intern_style(style, table):
+    style = hashable_style(style)
+    return table.setdefault(style_key(style), style)
+
+
+# the style table of a styled movie file
+def styles_fromList(list_object):
+    table = {}
+    return [intern_style(VisualStyle(**style), table) for style in list_object]
+
 
 class Movie(object):
     def __init__(self, visual_scenes=None, screenplay_id=None):
         self.visual_scenes = visual_scenes
         self.screenplay_id = screenplay_id
 
+    # reads both the full format and the styled format written by StyledMovieJSONEncoder
     @staticmethod
     def fromDict(dict_object):
         movie = Movie()
-        movie.visual_scenes = [VisualScene.fromDict(visual_scene) for visual_scene in dict_object["visual_scenes"]]
+        styles = None
+        if "styles" in dict_object:
+            styles = styles_fromList(dict_object["styles"])
+        table = {}  # the movie's elements written out in full share their styles through this
+        movie.visual_scenes = [VisualScene.fromDict(visual_scene, styles, table)
+                               for visual_scene in dict_object["visual_scenes"]]
         movie.screenplay_id = uuid.UUID(dict_object["screenplay_id"])
         return movie
 
@@ -37,15 +85,18 @@ class Movie(object):
 
 
 class VisualScene(object):
+    __slots__ = ("visual_scene_elements", "duration", "identifier")
+
     def __init__(self, visual_scene_elements=None, duration=0.0, identifier=0):
         self.visual_scene_elements = visual_scene_elements
         self.duration = duration
         self.identifier = identifier
 
     @staticmethod
-    def fromDict(dict_object):
+    def fromDict(dict_object, styles=None, table=None):
         scene = VisualScene()
-        scene.visual_scene_elements = [VisualSceneElement.fromDict(cp) for cp in dict_object["visual_scene_elements"]]
+        scene.visual_scene_elements = [VisualSceneElement.fromDict(cp, styles, table)
+                                       for cp in dict_object["visual_scene_elements"]]
         scene.duration = float(dict_object["duration"])
         scene.identifier = int(dict_object["identifier"])
         return scene
@@ -57,7 +108,7 @@ class VisualScene(object):
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return slot_values(self) == slot_values(other)
         else:
             return False
 
@@ -65,30 +116,28 @@ class VisualScene(object):
         return not self.__eq__(other)
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(dict(zip(self.__slots__, slot_values(self))))
 
 
 class VisualSceneElement(object):
+    # every field, in the order they are serialized and printed
+    FIELDS = ("alignment", "color", "font_name", "font_size", "font_style", "height", "kerning", "line_spacing",
+              "outline_color", "outline_width", "overflow_mode", "rotation", "width", "word_wrapping",
+              "relative_X_position", "relative_Y_position", "relative_Z_position", "identifier", "text_string")
+    # the style fields are read through properties on the shared style; setting one only overrides it for the element
+    __slots__ = ("shared_style", "overrides", "relative_X_position", "relative_Y_position", "relative_Z_position",
+                 "identifier", "text_string")
+
     def __init__(self, alignment="TopLeft", color=(1.0, 1.0, 1.0, 1.0), font_name="Garamond Regular SDF",
                  font_size=120.0, font_style="Normal", height=200.0, kerning=False,
                  line_spacing=0.0, outline_color=(0.5, 0.5, 0.5, 1), outline_width=0.2,
                  overflow_mode="Overflow", rotation=(0.0, 0.0, 0.0, 1.0), width=250.0,
                  word_wrapping=True, relative_X_position=0.0, relative_Y_position=0.0,
-                 relative_Z_position=0.0, identifier="", text_string=""):
-        self.alignment = alignment
-        self.color = color
-        self.font_name = font_name
-        self.font_size = font_size
-        self.font_style = font_style
-        self.height = height
-        self.kerning = kerning
-        self.line_spacing = line_spacing
-        self.outline_color = outline_color
-        self.outline_width = outline_width
-        self.overflow_mode = overflow_mode
-        self.rotation = rotation
-        self.width = width
-        self.word_wrapping = word_wrapping
+                 relative_Z_position=0.0, identifier="", text_string="", style=None):
+        if style is None:
+            style = VisualStyle(alignment, color, font_name, font_size, font_style, height, kerning, line_spacing,
+                                outline_color, outline_width, overflow_mode, rotation, width, word_wrapping)
+        self.style = style
 
         self.relative_X_position = relative_X_position
         self.relative_Y_position = relative_Y_position
@@ -97,32 +146,53 @@ class VisualSceneElement(object):
         self.identifier = identifier
         self.text_string = text_string
 
+    # styles: the style table of a styled movie file, which elements refer to by index
+    # table: the styles of the other elements of the movie, for intern_style
     @staticmethod
-    def fromDict(dict_object):
+    def fromDict(dict_object, styles=None, table=None):
         element = VisualSceneElement()
-        element.alignment = dict_object["alignment"]
-        element.color = tuple(dict_object["color"])
-        element.font_name = dict_object["font_name"]
-        element.font_size = dict_object["font_size"]
-        element.height = dict_object["height"]
-        element.kerning = dict_object["kerning"]
-        element.line_spacing = dict_object["line_spacing"]
-        element.outline_color = tuple(dict_object["outline_color"])
-        element.outline_width = dict_object["outline_width"]
-        element.overflow_mode = dict_object["overflow_mode"]
-        element.rotation = tuple(dict_object["rotation"])
-        element.width = dict_object["width"]
-        element.word_wrapping = dict_object["word_wrapping"]
-        element.relative_X_position = dict_object["relative_X_position"]
-        element.relative_Y_position = dict_object["relative_Y_position"]
-        element.relative_Z_position = dict_object["relative_Z_position"]
+        if "style" in dict_object:
+            element.style = styles[dict_object["style"]]
+        else:
+            if table is None:
+                table = {}
+            element.style = intern_style(VisualStyle(alignment=dict_object["alignment"],
+                                                     color=dict_object["color"],
+                                                     font_name=dict_object["font_name"],
+                                                     font_size=dict_object["font_size"],
+                                                     font_style=element.font_style,
+                                                     height=dict_object["height"],
+                                                     kerning=dict_object["kerning"],
+                                                     line_spacing=dict_object["line_spacing"],
+                                                     outline_color=dict_object["outline_color"],
+                                                     outline_width=dict_object["outline_width"],
+                                                     overflow_mode=dict_object["overflow_mode"],
+                                                     rotation=dict_object["rotation"],
+                                                     width=dict_object["width"],
+                                                     word_wrapping=dict_object["word_wrapping"]), table)
+        # styled movie files leave out positions at the origin
+        element.relative_X_position = dict_object.get("relative_X_position", 0.0)
+        element.relative_Y_position = dict_object.get("relative_Y_position", 0.0)
+        element.relative_Z_position = dict_object.get("relative_Z_position", 0.0)
         element.identifier = dict_object["identifier"]
         element.text_string = dict_object["text_string"]
         return element
 
+    # the element's style: the shared one, or a copy of it with the element's overrides
+    @property
+    def style(self):
+        if self.overrides:
+            return self.shared_style._replace(**self.overrides)
+        return self.shared_style
+
+    @style.setter
+    def style(self, style):
+        self.shared_style = hashable_style(style)
+        self.overrides = None
+
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
         else:
             return False
 
@@ -130,55 +200,117 @@ class VisualSceneElement(object):
         return not self.__eq__(other)
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str({field: getattr(self, field) for field in self.FIELDS})
+
+
+def _style_property(index, field):
+    def get_field(element):
+        if element.overrides and field in element.overrides:
+            return element.overrides[field]
+        return element.shared_style[index]
+
+    def set_field(element, value):
+        if element.overrides is None:
+            element.overrides = {}
+        element.overrides[field] = style_value(value)
+
+    return property(get_field, set_field)
+
+
+for style_index, style_field in enumerate(VisualStyle._fields):
+    setattr(VisualSceneElement, style_field, _style_property(style_index, style_field))
 
 
 # JSON encoding #######################################################################################################
 
 
+def visual_scene_element_fields(obj):
+    return {"alignment": obj.alignment,
+            "color": obj.color,
+            "font_name": obj.font_name,
+            "font_size": obj.font_size,
+            "font_style": obj.font_style,
+            "height": obj.height,
+            "kerning": obj.kerning,
+            "line_spacing": obj.line_spacing,
+            "outline_color": obj.outline_color,
+            "outline_width": obj.outline_width,
+            "overflow_mode": obj.overflow_mode,
+            "rotation": obj.rotation,
+            "width": obj.width,
+            "word_wrapping": obj.word_wrapping,
+            "relative_X_position": obj.relative_X_position,
+            "relative_Y_position": obj.relative_Y_position,
+            "relative_Z_position": obj.relative_Z_position,
+            "identifier": obj.identifier,
+            "text_string": obj.text_string}
+
+
+def visual_scene_fields(obj):
+    return {"duration": obj.duration,
+            "visual_scene_elements": obj.visual_scene_elements,
+            "identifier": obj.identifier}
+
+
+def movie_fields(obj):
+    return {"visual_scenes": obj.visual_scenes,
+            "screenplay_id": str(obj.screenplay_id)}
+
+
+register_fields(VisualSceneElement, visual_scene_element_fields)
+register_fields(VisualScene, visual_scene_fields)
+register_fields(Movie, movie_fields)
+
+
 class VisualSceneElementJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, VisualSceneElement):
             raise Exception("Cannot use this encoder to encode non-Visual-Scene-Element class.")
-        serialized_scene_element = {"alignment": obj.alignment,
-                                    "color": obj.color,
-                                    "font_name": obj.font_name,
-                                    "font_size": obj.font_size,
-                                    "font_style": obj.font_style,
-                                    "height": obj.height,
-                                    "kerning": obj.kerning,
-                                    "line_spacing": obj.line_spacing,
-                                    "outline_color": obj.outline_color,
-                                    "outline_width": obj.outline_width,
-                                    "overflow_mode": obj.overflow_mode,
-                                    "rotation": obj.rotation,
-                                    "width": obj.width,
-                                    "word_wrapping": obj.word_wrapping,
-                                    "relative_X_position": obj.relative_X_position,
-                                    "relative_Y_position": obj.relative_Y_position,
-                                    "relative_Z_position": obj.relative_Z_position,
-                                    "identifier": obj.identifier,
-                                    "text_string": obj.text_string}
-        return serialized_scene_element
+        return to_json_tree(obj)
 
 
 class VisualSceneJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, VisualScene):
             raise Exception("Cannot use this encoder to encode non-Visual-Scene class.")
-        scene_element_encoder = VisualSceneElementJSONEncoder()  # for serializing individual visual scene elements
-        serialized_scene = {"duration": obj.duration,
-                            "visual_scene_elements": [scene_element_encoder.default(e)
-                                                      for e in obj.visual_scene_elements],
-                            "identifier": obj.identifier}
-        return serialized_scene
+        return to_json_tree(obj)
 
 
 class MovieJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, Movie):
             raise Exception("Cannot use this encoder to encode non-Movie class.")
-        scene_encoder = VisualSceneJSONEncoder()  # for serializing individual scenes
-        serialized_movie = {"visual_scenes": [scene_encoder.default(scene) for scene in obj.visual_scenes],
-                            "screenplay_id": str(obj.screenplay_id)}
-        return serialized_movie
+        return to_json_tree(obj)
+
+
+# the same movie as MovieJSONEncoder, with each distinct style written once to a "styles" table that elements refer
+# to by index, and positions at the origin left out
+class StyledMovieJSONEncoder(JSONEncoder):
+    def default(self, obj):
+        if not isinstance(obj, Movie):
+            raise Exception("Cannot use this encoder to encode non-Movie class.")
+        style_ids = {}  # style key: index in styles
+        styles = []
+        serialized_scenes = []
+        for scene in obj.visual_scenes:
+            serialized_elements = []
+            for element in scene.visual_scene_elements:
+                style = element.style
+                key = style_key(style)
+                if key not in style_ids:
+                    style_ids[key] = len(styles)
+                    styles.append(dict(zip(VisualStyle._fields, style)))
+                serialized_element = {"style": style_ids[key]}
+                for field in ("relative_X_position", "relative_Y_position", "relative_Z_position"):
+                    position = getattr(element, field)
+                    if position != 0.0 or not isinstance(position, float):
+                        serialized_element[field] = position
+                serialized_element["identifier"] = element.identifier
+                serialized_element["text_string"] = element.text_string
+                serialized_elements.append(serialized_element)
+            serialized_scenes.append({"duration": scene.duration,
+                                      "visual_scene_elements": serialized_elements,
+                                      "identifier": scene.identifier})
+        return {"styles": styles,
+                "visual_scenes": serialized_scenes,
+                "screenplay_id": str(obj.screenplay_id)}
@@ -0,0 +1,572 @@
+"""
+Parsers - parser backends shared by the screenwriters and feature extractors
+Every backend follows the nltk StanfordParser contract: raw_parse_sents takes a list of strings, each
+non-blank line of input is parsed as one sentence, and one iterator of trees is returned per parsed line.
+Backends: StanfordServerParser runs the Stanford parser jars, RecordedTreeParser replays trees recorded from another
+parser, and ShallowParser chunks regex-tagged words without any models. ParserPool shards sentences across several.
+"""
+import abc
+import atexit
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from itertools import islice
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+from nltk import RegexpParser, RegexpTagger, Tree, wordpunct_tokenize
+from nltk.internals import find_binary, find_jar_iter, find_jars_within_path
+
+RESOURCES_DIRECTORY = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../resources"))
+
+
+class Parser(metaclass=abc.ABCMeta):
+    cacheable = True  # whether its trees are worth keeping in the shared parse tree cache
+
+    @abc.abstractmethod
+    # returns an iterator with one iterator of trees per parsed line
+    def raw_parse_sents(self, sentences):
+        return
+
+    def raw_parse(self, sentence):
+        return next(self.raw_parse_sents([sentence]))
+
+    # identifies the grammar in use: trees cached under one version are never returned for another
+    def version(self):
+        return type(self).__name__
+
+    # the Stanford parser is run with "-sentences newline": each non-blank line is one sentence
+    @staticmethod
+    def lines(sentences):
+        for sentence in sentences:
+            for line in sentence.split("\n"):
+                if line.strip():
+                    yield line
+
+
+# keeps one JVM running the Stanford parser and talks to it over stdin/stdout, one sentence per line
+class StanfordServerParser(Parser):
+    MAIN_CLASS = "edu.stanford.nlp.parser.lexparser.LexicalizedParser"
+    JAR_PATTERN = r"stanford-parser\.jar"
+    MODEL_JAR_PATTERN = r"stanford-parser-(\d+)(\.(\d+))+-models\.jar"
+    HEALTH_CHECK_SENTENCE = "This is a test ."
+
+    def __init__(self, path_to_jar=None, path_to_models_jar=None,
+                 model_path="edu/stanford/nlp/models/lexparser/englishPCFG.ser.gz", java_options="-mx1000m",
+                 encoding="utf8", window=16, timeout=60.0, startup_timeout=300.0, max_restarts=1):
+        self.stanford_jar = self.find_jar(self.JAR_PATTERN, path_to_jar, ("STANFORD_PARSER", "STANFORD_CORENLP"))
+        self.model_jar = self.find_jar(self.MODEL_JAR_PATTERN, path_to_models_jar,
+                                       ("STANFORD_MODELS", "STANFORD_CORENLP"))
+        self.model_path = model_path
+        self.java_options = java_options
+        self.encoding = encoding
+        self.window = window  # sentences written before their trees are read back
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.max_restarts = max_restarts
+
+        self.process = None
+        self.output_lines = None
+        self.warm = False  # True once the JVM has answered, i.e. the models are loaded
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def find_jar(pattern, path_to_jar, env_vars):
+        # same lookup as nltk's StanfordParser, falling back to the jars shipped in resources/
+        if path_to_jar is None and not any(env_var in os.environ for env_var in ("CLASSPATH",) + env_vars):
+            for filename in sorted(os.listdir(RESOURCES_DIRECTORY)):
+                if re.match(pattern, filename):
+                    path_to_jar = os.path.join(RESOURCES_DIRECTORY, filename)
+        return max(find_jar_iter(pattern, path_to_jar, env_vars=env_vars, is_regex=True),
+                   key=lambda jar: os.path.dirname(jar))
+
+    def version(self):
+        return parser_version(self)
+
+    def command(self):
+        java = find_binary("java", env_vars=["JAVAHOME", "JAVA_HOME"], binary_names=["java.exe"])
+        classpath = [self.model_jar] + find_jars_within_path(os.path.dirname(self.stanford_jar))
+        return [java] + self.java_options.split() + \
+               ["-cp", os.pathsep.join(classpath), self.MAIN_CLASS,
+                "-model", self.model_path,
+                "-sentences", "newline",
+                "-outputFormat", "penn",
+                "-encoding", self.encoding,
+                "-"]  # read sentences from stdin
+
+    def start(self):
+        logging.info("Starting Stanford parser JVM")
+        self.process = subprocess.Popen(self.command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE)
+        self.output_lines = queue.Queue()
+        self.warm = False
+        threading.Thread(target=self._pump_stdout, args=(self.process, self.output_lines), daemon=True).start()
+        threading.Thread(target=self._pump_stderr, args=(self.process,), daemon=True).start()
+
+    def _pump_stdout(self, process, output_lines):
+        for line in process.stdout:
+            line = line.replace(b"\xc2\xa0", b" ").replace(b"\x00\xa0", b" ")
+            output_lines.put(line.decode(self.encoding).rstrip("\r\n"))
+        output_lines.put(None)  # the JVM went away
+
+    @staticmethod
+    def _pump_stderr(process):
+        for line in process.stderr:
+            logging.debug("Stanford parser: " + line.decode("utf8", "replace").rstrip())
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def close(self):
+        if self.process is not None:
+            if self.is_alive():
+                try:
+                    self.process.stdin.close()
+                    self.process.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    self.process.kill()
+            self.process = None
+
+    def restart(self):
+        logging.warning("Restarting Stanford parser JVM")
+        self.close()
+        self.start()
+
+    # health check: the JVM is running and answers a known sentence
+    def ping(self):
+        try:
+            return len(list(self.raw_parse(self.HEALTH_CHECK_SENTENCE))) == 1
+        except Exception:
+            return False
+
+    def _read_tree(self):
+        lines = []
+        while True:
+            line = self.output_lines.get(timeout=self.timeout if self.warm else self.startup_timeout)
+            if line is None:
+                raise EOFError("Stanford parser exited")
+            if line == "":
+                if lines:
+                    break
+                continue
+            lines.append(line)
+        self.warm = True
+        return Tree.fromstring("\n".join(lines))
+
+    def _parse_window(self, window):
+        # sentences travel one per line, so newlines inside a sentence must not reach the JVM
+        self.process.stdin.write(("\n".join(window) + "\n").encode(self.encoding))
+        self.process.stdin.flush()
+        return [self._read_tree() for _ in window]
+
+    def _parse_lines(self, lines):
+        with self.lock:
+            restarts = 0
+            while True:
+                try:
+                    if not self.is_alive():
+                        if self.process is not None:
+                            raise EOFError("Stanford parser exited")
+                        self.start()
+                    return self._parse_window(lines)
+                except (OSError, ValueError, EOFError, queue.Empty) as e:
+                    # the JVM crashed or hung mid-window: its output can no longer be matched to our input
+                    if restarts >= self.max_restarts:
+                        self.close()
+                        raise Exception("Stanford parser failed: " + repr(e))
+                    restarts += 1
+                    self.restart()
+
+    def raw_parse_sents(self, sentences):
+        window = []
+        for line in self.lines(sentences):
+            window.append(line)
+            if len(window) == self.window:
+                for tree in self._parse_lines(window):
+                    yield iter([tree])
+                window = []
+        if window:
+            for tree in self._parse_lines(window):
+                yield iter([tree])
+
+
+# replays trees recorded from another parser, so the parser-based classes run without it
+# a line that was never recorded is sent to the fallback parser if there is one, and is an error otherwise
+class RecordedTreeParser(Parser):
+    cacheable = False
+
+    def __init__(self, trees=None, recorded_version="recorded", fallback=None):
+        self.trees = {}  # line: bracketed tree
+        self.recorded_version = recorded_version
+        self.fallback = fallback
+        for line, tree in (trees or {}).items():
+            self.trees[line] = tree.pformat(margin=sys.maxsize) if isinstance(tree, Tree) else tree
+
+    # trees recorded under a parser's version are the trees that parser gives
+    def version(self):
+        return self.recorded_version
+
+    # parses the lines of sentences with parser and keeps their trees
+    @staticmethod
+    def record(parser, sentences):
+        lines = list(dict.fromkeys(Parser.lines(sentences)))
+        trees = {}
+        for line, input_trees in zip(lines, parser.raw_parse_sents(lines)):
+            trees[line] = next(iter(input_trees))
+        return RecordedTreeParser(trees, parser_version(parser))
+
+    def save(self, path):
+        with open(path, "w") as output_file:
+            json.dump({"version": self.recorded_version, "trees": self.trees}, output_file, indent=4,
+                      ensure_ascii=False)
+
+    @staticmethod
+    def load(path, fallback=None):
+        with open(path, "r") as input_file:
+            recorded = json.load(input_file)
+        return RecordedTreeParser(recorded["trees"], recorded["version"], fallback)
+
+    def raw_parse_sents(self, sentences):
+        lines = list(self.lines(sentences))
+        missing = [line for line in dict.fromkeys(lines) if line not in self.trees]
+        parsed = {}
+        if missing:
+            if self.fallback is None:
+                raise Exception("No recorded parse tree for sentence: " + missing[0])
+            for line, input_trees in zip(missing, self.fallback.raw_parse_sents(missing)):
+                parsed[line] = next(iter(input_trees))
+        for line in lines:
+            if line in parsed:
+                yield iter([parsed[line]])
+            else:
+                yield iter([Tree.fromstring(self.trees[line])])
+
+
+# tags words by their spelling and chunks them into flat NP, PP and VP phrases under ROOT and S, the way the Stanford
+# parser labels them; needs no models or JVM, so it is only good for tests and benchmarks, not for real screenplays
+class ShallowParser(Parser):
+    cacheable = False
+
+    TAGS = [
+        (r"^[.!?]$", "."),
+        (r"^,$", ","),
+        (r"^[:;]$|^-+$", ":"),
+        (r"^[\(\[{]$", "-LRB-"),
+        (r"^[\)\]}]$", "-RRB-"),
+        (r"^[\"'`]+$", "''"),
+        (r"^-?[0-9]+([.,][0-9]+)*%?$", "CD"),
+        (r"(?i)^(the|a|an|this|that|these|those|every|each|some|any|no|all)$", "DT"),
+        (r"(?i)^(of|in|on|at|by|for|with|from|into|onto|about|after|before|during|under|over|through|between|"
+         r"against|without|within|since|until|upon|among|as|than|like)$", "IN"),
+        (r"(?i)^(to)$", "TO"),
+        (r"(?i)^(and|or|but|nor|yet)$", "CC"),
+        (r"(?i)^(i|you|he|she|it|we|they|me|him|her|us|them)$", "PRP"),
+        (r"(?i)^(my|your|his|its|our|their)$", "PRP$"),
+        (r"(?i)^(can|could|may|might|must|shall|should|will|would)$", "MD"),
+        (r"(?i)^(is|are|was|were|be|been|being|am|has|have|had|do|does|did)$", "VB"),
+        (r"(?i)^(not|very|also|often|never|always|too|just)$", "RB"),
+        (r"(?i)^(who|which|what|whom|whose)$", "WP"),
+        (r"(?i)^(when|where|why|how)$", "WRB"),
+        (r"^[A-Z][a-z]", "NNP"),
+        (r".*ly$", "RB"),
+        (r".*ing$", "VBG"),
+        (r".*ed$", "VBD"),
+        (r".*(ous|ful|ive|able|ible|al|ic|ish|less)$", "JJ"),
+        (r".*'s$", "POS"),
+        (r".*ss$", "NN"),
+        (r".*s$", "NNS"),
+        (r".*", "NN"),
+    ]
+
+    GRAMMAR = r"""
+        NP: {<DT|PRP\$|CD>?<JJ.*|RB>*<NN.*>+}
+            {<PRP>}
+        PP: {<IN|TO><NP>}
+        VP: {<MD>?<RB>*<VB.*>+<RB>?<NP|PP>*}
+        """
+
+    def __init__(self):
+        self.tagger = RegexpTagger([(re.compile(pattern), tag) for pattern, tag in self.TAGS])
+        self.chunker = RegexpParser(self.GRAMMAR)
+
+    def parse_line(self, line):
+        chunked = self.chunker.parse(self.tagger.tag(wordpunct_tokenize(line)))
+        return Tree("ROOT", [Tree("S", [self.constituent(child) for child in chunked])])
+
+    def constituent(self, node):
+        if isinstance(node, Tree):
+            return Tree(node.label(), [self.constituent(child) for child in node])
+        word, tag = node
+        return Tree(tag, [word])
+
+    def raw_parse_sents(self, sentences):
+        for line in self.lines(sentences):
+            yield iter([self.parse_line(line)])
+
+
+# shards lines across worker parsers, each parsing chunk_size lines at a time on its own thread; trees come back in
+# line order, and at most max_pending chunks are read ahead of the trees yielded, so a generator of sentences is only
+# drawn from as fast as the trees are consumed
+# the workers are meant for parsers that do their work outside the interpreter, like the Stanford JVM
+class ParserPool(Parser):
+    def __init__(self, parsers, chunk_size=16, max_pending=None):
+        self.parsers = list(parsers)
+        if not self.parsers:
+            raise Exception("A parser pool needs at least one parser.")
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending if max_pending is not None else 2 * len(self.parsers)
+        self.cacheable = all(getattr(parser, "cacheable", True) for parser in self.parsers)
+        self.idle = queue.Queue()  # parsers not parsing a chunk
+        for parser in self.parsers:
+            self.idle.put(parser)
+        self.executor = ThreadPoolExecutor(max_workers=len(self.parsers))
+
+    # workers: number of parsers, each made by calling make_parser
+    @staticmethod
+    def of(make_parser, workers, **options):
+        return ParserPool([make_parser() for _ in range(workers)], **options)
+
+    def version(self):
+        return parser_version(self.parsers[0])
+
+    def _parse_chunk(self, lines):
+        parser = self.idle.get()
+        try:
+            return [list(trees) for trees in parser.raw_parse_sents(lines)]
+        finally:
+            self.idle.put(parser)
+
+    def _chunks(self, sentences):
+        chunk = []
+        for line in self.lines(sentences):
+            chunk.append(line)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def raw_parse_sents(self, sentences):
+        pending = deque()
+        try:
+            for chunk in self._chunks(sentences):
+                if len(pending) == self.max_pending:
+                    for trees in pending.popleft().result():
+                        yield iter(trees)
+                pending.append(self.executor.submit(self._parse_chunk, chunk))
+            while pending:
+                for trees in pending.popleft().result():
+                    yield iter(trees)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for parser in self.parsers:
+            if hasattr(parser, "close"):
+                parser.close()
+
+
+# version of either our Stanford backends or nltk's StanfordParser: jar names and sizes plus the model
+def parser_version(parser):
+    if isinstance(parser, StanfordServerParser):
+        jars = [parser.stanford_jar, parser.model_jar]
+    elif hasattr(parser, "_classpath"):
+        jars = list(parser._classpath)
+    else:
+        return parser.version()
+    return " ".join(["%s:%d" % (os.path.basename(jar), os.path.getsize(jar)) for jar in jars] + [parser.model_path])
+
+
+# on-disk store of bracketed parse trees keyed by a hash of (parser version, sentence), evicted least recently used
+# reads do not write: the times keys were last used are kept in memory and written flush_size at a time, or with the
+# next put_many or close
+class ParseTreeCache(object):
+    def __init__(self, path, max_entries=1000000, max_bytes=512 * 1024 * 1024, flush_size=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_size = flush_size
+        self.hits = 0
+        self.misses = 0
+        self.last_used = {}  # key: time, of hits not written yet
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS trees "
+                                "(key TEXT PRIMARY KEY, tree TEXT NOT NULL, size INTEGER NOT NULL, "
+                                "last_used REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS trees_last_used ON trees (last_used)")
+        self.connection.commit()
+
+    @staticmethod
+    def key(version, sentence):
+        return hashlib.sha1((version + "\n" + sentence).encode("utf8")).hexdigest()
+
+    # returns {key: bracketed tree} for the keys that are cached
+    def get_many(self, keys):
+        keys = list(set(keys))
+        found = {}
+        with self.lock:
+            for start in range(0, len(keys), 500):  # stay below sqlite's host parameter limit
+                batch = keys[start:start + 500]
+                rows = self.connection.execute("SELECT key, tree FROM trees WHERE key IN (%s)" %
+                                               ",".join("?" * len(batch)), batch)
+                found.update(rows)
+            now = time.time()
+            for key in found:
+                self.last_used[key] = now
+            if len(self.last_used) >= self.flush_size:
+                self.flush()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        now = time.time()
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO trees (key, tree, size, last_used) VALUES (?, ?, ?, ?)",
+                                        [(key, tree, len(tree), now) for key, tree in items])
+            for key, _ in items:
+                self.last_used.pop(key, None)
+            self.flush()
+            self.evict()
+
+    # writes the times of the hits since the last flush, in one transaction
+    def flush(self):
+        if self.last_used:
+            self.connection.executemany("UPDATE trees SET last_used = ? WHERE key = ?",
+                                        [(now, key) for key, now in self.last_used.items()])
+            self.last_used = {}
+        self.connection.commit()
+
+    def evict(self):
+        entries, total_bytes = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM trees").fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        # evict down to 90% of the limits so the next few inserts don't trigger another pass
+        excess_bytes = total_bytes - int(self.max_bytes * 0.9)
+        removed = entries - int(self.max_entries * 0.9)
+        if excess_bytes > 0:
+            # the oldest trees whose sizes add up to the excess: those before the one that reaches it, and that one
+            freed_before, = self.connection.execute(
+                "SELECT COUNT(*) FROM (SELECT SUM(size) OVER (ORDER BY last_used, key ROWS UNBOUNDED PRECEDING) "
+                "AS freed FROM trees) WHERE freed < ?", (excess_bytes,)).fetchone()
+            removed = max(removed, freed_before + 1)
+        self.connection.execute("DELETE FROM trees WHERE key IN "
+                                "(SELECT key FROM trees ORDER BY last_used, key LIMIT ?)", (removed,))
+        self.connection.commit()
+        logging.info("Evicted %d parse trees from %s" % (removed, self.path))
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM trees").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.flush()
+        self.connection.close()
+
+
+# looks lines up in the cache and only sends the misses to the wrapped parser, chunk_size lines at a time, so that
+# sentences are read as the trees are asked for
+class CachingParser(Parser):
+    def __init__(self, parser, cache, chunk_size=256):
+        self.parser = parser
+        self.cache = cache
+        self.chunk_size = chunk_size
+
+    def version(self):
+        return parser_version(self.parser)
+
+    def raw_parse_sents(self, sentences):
+        version = self.version()
+        lines = self.lines(sentences)
+        while True:
+            chunk = list(islice(lines, self.chunk_size))
+            if not chunk:
+                return
+            keys = [ParseTreeCache.key(version, line) for line in chunk]
+            trees = self.cache.get_many(keys)
+
+            missing = {}  # key: line, in first-seen order
+            for key, line in zip(keys, chunk):
+                if key not in trees:
+                    missing[key] = line
+            if missing:
+                parsed = []
+                for key, input_trees in zip(missing, self.parser.raw_parse_sents(list(missing.values()))):
+                    for tree in input_trees:
+                        parsed.append((key, tree.pformat(margin=sys.maxsize)))
+                self.cache.put_many(parsed)
+                trees.update(parsed)
+
+            for key in keys:
+                yield iter([Tree.fromstring(trees[key])])
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "openmind", "parse_trees.sqlite")
+
+_shared_parser = None
+_shared_cache = None
+
+
+# backend: "stanford" (the Stanford parser jars), "recorded" (trees recorded to the file at path, see
+# RecordedTreeParser) or "shallow" (ShallowParser); the other options go to the backend's constructor
+def parser_factory(backend="stanford", path=None, **options):
+    if backend == "stanford":
+        return StanfordServerParser(**options)
+    elif backend == "recorded":
+        if path is None:
+            raise Exception("The recorded parser needs the path of a recorded tree file.")
+        return RecordedTreeParser.load(path, **options)
+    elif backend == "shallow":
+        return ShallowParser(**options)
+    raise Exception("Unknown parser backend: " + backend)
+
+
+# one warm parser per process: JVM startup and model loading happen once per worker
+# OPENMIND_PARSER picks the backend and OPENMIND_RECORDED_TREES the recorded tree file, so tests and benchmarks can run
+# the parser-based classes offline; OPENMIND_PARSER_WORKERS above 1 shards sentences across that many backends
+def shared_parser():
+    global _shared_parser
+    if _shared_parser is None:
+        backend = os.environ.get("OPENMIND_PARSER", "stanford")
+        path = os.environ.get("OPENMIND_RECORDED_TREES")
+        workers = int(os.environ.get("OPENMIND_PARSER_WORKERS", "1"))
+        if workers > 1:
+            _shared_parser = ParserPool.of(lambda: parser_factory(backend, path), workers)
+        else:
+            _shared_parser = parser_factory(backend, path)
+        if hasattr(_shared_parser, "close"):
+            atexit.register(_shared_parser.close)
+    return _shared_parser
+
+
+def shared_cache():
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ParseTreeCache(os.environ.get("OPENMIND_PARSE_CACHE", DEFAULT_CACHE_PATH))
+        atexit.register(_shared_cache.close)
+    return _shared_cache
+
+
+# the lookup path every parser consumer goes through: trees come from the shared cache when they can
+def cached_parser(parser=None):
+    if parser is None:
+        parser = shared_parser()
+    if isinstance(parser, CachingParser) or not getattr(parser, "cacheable", True):
+        return parser
+    return CachingParser(parser, shared_cache())
@@ -0,0 +1,74 @@
+"""
+Pipeline - raw text to movie and features, one scene at a time
+The screenwriter, decorators, blocker and feature extractor are chained as generators, so each scene is written,
+decorated, blocked and written out before the next one is read. Stages that look ahead hold a bounded window: the
+first/last decorator holds one scene when made with stream_placeholder, and feature extraction a chunk of scenes plus
+its extractors' margin. With those, the time to the first scene and the memory held do not grow with the document;
+without stream_placeholder the decorator keeps the movie exactly as decorate_screenplay makes it by holding every scene.
+"""
+from document import Document
+from movie import Movie
+from serialization import IndentedArrayWriter
+
+
+# a document whose sentences come from an iterator, read as the screenwriter asks for them; it can be written once
+class StreamedDocument(Document):
+    def __init__(self, header, sentences):
+        super().__init__(header)
+        self.streamed_sentences = iter(sentences)
+
+    def iter_sentences(self):
+        return self.streamed_sentences
+
+    def sentences(self):
+        return list(self.iter_sentences())
+
+
+# memory grows with the scene count unless every decorator streams: FirstLastSceneAddDecorator holds the whole
+# screenplay by default and one scene with stream_placeholder=True (single_convert_basic.py --stream)
+class Pipeline(object):
+    # chunk_size: scenes per feature extraction window
+    def __init__(self, screenwriter=None, decorators=(), blocker=None, extractor=None, chunk_size=100):
+        self.screenwriter = screenwriter
+        self.decorators = list(decorators)
+        self.blocker = blocker
+        self.extractor = extractor
+        self.chunk_size = chunk_size
+
+    def decorate(self, scenes):
+        for decorator in self.decorators:
+            scenes = decorator.decorate_scenes(scenes)
+        return scenes
+
+    # the decorated scenes of the document
+    def scenes(self, document):
+        return self.decorate(self.screenwriter.iter_scenes(document))
+
+    # the visual scenes of undecorated scenes
+    def visual_scenes(self, scenes):
+        return self.blocker.block_scenes(self.decorate(scenes))
+
+    def features(self, visual_scenes):
+        return self.extractor.iter_features(visual_scenes, self.chunk_size)
+
+    # writes the movie of undecorated scenes to movie_fp, and its features to features_fp if there is an extractor,
+    # as dump() and json.dumps write them whole
+    def write(self, scenes, screenplay_id, movie_fp, features_fp=None):
+        with IndentedArrayWriter(movie_fp, Movie(None, screenplay_id), "visual_scenes") as movie_writer:
+            def written(visual_scenes):
+                for visual_scene in visual_scenes:
+                    movie_writer.append(visual_scene)
+                    yield visual_scene
+
+            visual_scenes = written(self.visual_scenes(scenes))
+            if features_fp is None or self.extractor is None:
+                for _ in visual_scenes:
+                    pass
+                return
+            with IndentedArrayWriter(features_fp, {"screenplay_id": str(screenplay_id), "features": None},
+                                     "features") as features_writer:
+                for scene_features in self.features(visual_scenes):
+                    features_writer.append(scene_features)
+
+    def run(self, document, movie_fp, features_fp=None):
+        self.write(self.screenwriter.iter_scenes(document), document.doc_id, movie_fp, features_fp)
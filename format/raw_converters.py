@@ -7,11 +7,29 @@ import abc
 from xml.etree import ElementTree
 import re
 
-from bs4 import BeautifulSoup
 from nltk import sent_tokenize
+from nltk.tokenize import PunktTokenizer
 
 from document import Document, Paragraph, Section, Sentence
 
+# Detect wikipedia style citations
+# for example: "[2] There are various"
+CITATION_REGEX = re.compile(r'\s*\[\d*\]\s*')
+WHITESPACE_REGEX = re.compile(r'\s\s+')
+HEADER_LEVEL_REGEX = re.compile(r'\d')
+# joins many texts so that each regex runs once over all of them; it is not whitespace so no match crosses it
+TEXT_SEPARATOR = "\x00"
+
+_punkt_tokenizer = None
+
+
+# the English punkt tokenizer, loaded on first use and then kept for every document the process converts
+def punkt_tokenizer():
+    global _punkt_tokenizer
+    if _punkt_tokenizer is None:
+        _punkt_tokenizer = PunktTokenizer('english')
+    return _punkt_tokenizer
+
 
 class RawConverter:
     @abc.abstractmethod
@@ -21,13 +39,15 @@ class RawConverter:
 
 class BasicTextFileRawConverter(RawConverter):
     def convertToDocument(self, rawText, doc_title):
-        sentence_strings = sent_tokenize(rawText, language='english')
-        sentences = []
-        for i in range(len(sentence_strings)):
-            sentences.append(Sentence(text=sentence_strings[i], position=i))
+        sentences = list(self.iter_sentences(rawText))
         section = Section(paragraphs=[Paragraph(sentences=sentences, position=0)])
         return Document(header=doc_title, section=section)
 
+    # yields the sentences sent_tokenize finds, each as soon as the tokenizer has found its end
+    def iter_sentences(self, rawText):
+        for i, (start, end) in enumerate(punkt_tokenizer().span_tokenize(rawText)):
+            yield Sentence(text=rawText[start:end], position=i)
+
 
 class LineByLineRawConverter(RawConverter):
     def convertToDocument(self, source, doc_title):
@@ -56,6 +76,7 @@ class WikiHtmlFileRawConverter(RawConverter):
     def __init__(self):
         self.HTML_SECTION_HEADERS = ["h2", "h3", "h4", "h5"]
         self.HTML_PARAGRAPH = 'p'
+        self.HTML_PARAGRAPHS = ['p', 'dd']
         self.HTML_TITLE = 'title'
         self.HTML_BODY = 'body'
         self.LEVEL = 'level'
@@ -64,120 +85,93 @@ class WikiHtmlFileRawConverter(RawConverter):
         self.SECTIONS = 'sections'
         self.PARAGRAPHS = 'paragraphs'
 
-        # Detect wikipedia style citations
-        # for example: "[2] There are various"
-        self.citation_regex = re.compile('\s*\[\d\]\s*')
+        self.normalizer = WikiTextNormalizer()  # the only place wiki text is cleaned
 
     @staticmethod
     def elementLevel(element):
         level = None
         try:
-            level = element.tag[re.search('\d', element.tag).start()]
+            level = element.tag[HEADER_LEVEL_REGEX.search(element.tag).start()]
         except:
             pass
         return level
 
-    def isSubSection(self, element1, element2):
-        return int(element1.get(self.LEVEL)) > int(element2.get(self.LEVEL))
-
-    def isSibSection(self, element1, element2):
-        return int(element1.get(self.LEVEL)) == int(element2.get(self.LEVEL))
-
-    def convertToXml(self, source):
-        outline_stack = []
-        root_element = None
-
-        for action, elem in ElementTree.iterparse(source):
+    # turns a section's buffered paragraph texts into Paragraphs, normalizing all of the section's text at once
+    def addParagraphs(self, section, paragraph_texts):
+        if not paragraph_texts:
+            return
+        paragraph_sentences = [sent_tokenize(paragraph_text) if paragraph_text else []
+                               for paragraph_text in self.normalizer.collapse_whitespace(paragraph_texts)]
+        tidy_sentences = iter(self.normalizer.strip_citations([sentence for sentences in paragraph_sentences
+                                                               for sentence in sentences]))
+        if not section.paragraphs:
+            section.paragraphs = list()
+        for sentences in paragraph_sentences:
+            section.paragraphs.append(Paragraph([Sentence(text=next(tidy_sentences), position=i)
+                                                 for i in range(len(sentences))],
+                                                len(section.paragraphs)))
+
+    # single pass over the iterparse events: sections and paragraphs are built as their elements close,
+    # and finished elements are dropped so only the path from the root to the current element is kept
+    def convertToDocument(self, rawHtml=None, doc_title=None):
+        document = Document()
+        outline_stack = []  # (level, section) from the root section down to the current section
+        open_elements = []
+        open_paragraphs = 0  # text of elements inside a <p>/<dd> is still needed by that paragraph
+        paragraph_texts = []  # raw text of the current section's paragraphs, normalized when the section ends
+
+        for event, elem in ElementTree.iterparse(rawHtml, events=("start", "end")):
+            if event == "start":
+                open_elements.append(elem)
+                if elem.tag in self.HTML_PARAGRAPHS:
+                    open_paragraphs += 1
+                continue
+            open_elements.pop()
 
             if elem.tag == self.HTML_TITLE:
-                root_element = ElementTree.Element(self.SECTION, {self.LEVEL: '0', self.HTML_TITLE: elem.text})
-                outline_stack.append(root_element)
-
-            if elem.tag in self.HTML_SECTION_HEADERS:
-                # Entered a new section
-                parent_section = None
-                current_section = outline_stack.pop()
-                new_section = ElementTree.Element(self.SECTION, {self.LEVEL: self.elementLevel(elem),
-                                                                 self.HTML_TITLE: elem.text.strip()})
-
-                if self.isSubSection(new_section, current_section):
-                    parent_section = current_section
-                else:
-                    while outline_stack:
-                        parent_section = outline_stack.pop()
-
-                        if self.isSibSection(parent_section, new_section) or \
-                                self.isSubSection(parent_section, new_section):
-                            continue
-                        else:
-                            break
-
-                    if parent_section is None:
-                        parent_section = root_element
-
-                # This adds the sub-element in the tree
-                parent_section.append(new_section)
-
-                # This keeps track of the stack
-                outline_stack.append(parent_section)
-                outline_stack.append(new_section)
-
-            elif elem.tag == 'p' or elem.tag == 'dd':
-                soup = BeautifulSoup(ElementTree.tostring(elem))
-                paragraph_text = re.sub("\s\s+", " ", soup.get_text())
-                current_section = outline_stack[-1]
-
-                new_paragraph_section = ElementTree.Element(self.HTML_PARAGRAPH,
-                                                            {self.LEVEL: '0', self.HTML_TITLE: 'p'})
-                new_paragraph_section.text = paragraph_text
-                current_section.append(new_paragraph_section)
-        return root_element
-
-    def tidyText(self, text):
-        tidy = text
-
-        # Detect wikipedia style citations
-        # for example: "[2] There are various"
-        citation_regex = re.compile('\s*\[\d*\]\s*')
-
-        # Remove citations
-        tidy = citation_regex.sub("", tidy)
-
-        return tidy
-
-    def parseParagraph(self, paragraph_element, count):
-        sentences = list()
-
-        sentence_count = 0
-        if paragraph_element.text:
-            for sentence in sent_tokenize(paragraph_element.text):
-                sentences.append(Sentence(text=self.tidyText(sentence), position=sentence_count))
-                sentence_count += 1
-
-        return Paragraph(sentences, count)
-
-    def processSection(self, element, section):
-        paragraph_count = 0
-        for child in element:
-            if child.tag == self.HTML_PARAGRAPH:
-                paragraph = self.parseParagraph(child, paragraph_count)
-                paragraph_count += 1
-                if not section.paragraphs:
-                    section.paragraphs = list()
-                section.paragraphs.append(paragraph)
-            elif child.tag == self.SECTION:
-                section_title = child.get(self.HTML_TITLE)
-                new_section = Section()
-                new_section = self.processSection(child, new_section)
-                new_section.header = section_title
-
-                if not section.subsections:
-                    section.subsections = list()
-
-                section.subsections.append(new_section)
-
-        return section
+                document.header = elem.text
+                document.section = Section()
+                outline_stack = [(0, document.section)]
+
+            elif elem.tag in self.HTML_SECTION_HEADERS:
+                # Entered a new section: its parent is the closest enclosing section of a lower level
+                self.addParagraphs(outline_stack[-1][1], paragraph_texts)
+                paragraph_texts = []
+                level = int(self.elementLevel(elem))
+                while outline_stack[-1][0] >= level:
+                    outline_stack.pop()
+                parent_section = outline_stack[-1][1]
+
+                new_section = Section(header=elem.text.strip())
+                if not parent_section.subsections:
+                    parent_section.subsections = list()
+                parent_section.subsections.append(new_section)
+                outline_stack.append((level, new_section))
+
+            elif elem.tag in self.HTML_PARAGRAPHS:
+                open_paragraphs -= 1
+                paragraph_texts.append("".join(elem.itertext()))
+
+            if not open_paragraphs:
+                elem.clear()
+                if open_elements and len(open_elements[-1]) and open_elements[-1][-1] is elem:
+                    del open_elements[-1][-1]
+
+        if outline_stack:
+            self.addParagraphs(outline_stack[-1][1], paragraph_texts)
+        return document
+
+
+# whitespace collapsing and citation stripping, each a single regex pass over a whole batch of texts
+class WikiTextNormalizer(object):
+    @staticmethod
+    def substitute(regex, replacement, texts):
+        if not texts:
+            return []
+        return regex.sub(replacement, TEXT_SEPARATOR.join(texts)).split(TEXT_SEPARATOR)
 
-    def convertToDocument(self, rawHtml=None, doc_title=None):
-        root_element = self.convertToXml(rawHtml)
-        return Document(header=root_element.get(self.HTML_TITLE), section=self.processSection(root_element, Section()))
+    def collapse_whitespace(self, texts):
+        return self.substitute(WHITESPACE_REGEX, " ", texts)
+
+    def strip_citations(self, texts):
+        return self.substitute(CITATION_REGEX, "", texts)
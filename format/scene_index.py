@@ -0,0 +1,225 @@
+"""
+Scene index - random access to the scenes of screenplay and movie JSON files
+A sidecar index file (the JSON file's path plus ".idx", in the binary container format) maps each scene identifier to
+the byte offset and length of that scene in the JSON file. IndexedSceneFile maps the JSON file into memory and only
+decodes the scenes that are asked for; the index is rebuilt whenever the JSON file has changed since it was written.
+"""
+from array import array
+import json
+import mmap
+import os
+import re
+
+from binary import INDEX, BinaryFile, little_endian, records_section, write_container
+from movie import VisualScene, styles_fromList
+from screenplay import Scene
+
+INDEX_SUFFIX = ".idx"
+
+# keys of the scene arrays of screenplay and movie files
+SCENE_KEYS = ("scenes", "visual_scenes")
+
+_STRUCTURE = re.compile(rb'["{}\[\]:,]')
+_STRING_REST = re.compile(rb'(?:[^"\\]|\\.)*"', re.DOTALL)
+_WHITESPACE = re.compile(rb'[ \t\n\r]*')
+_SPACE_BYTES = b" \t\n\r"
+
+
+def _end_of_value(data, start, end):
+    while end > start and data[end - 1] in _SPACE_BYTES:
+        end -= 1
+    return end
+
+
+# the (offset, length) of each value of the top-level object of a JSON file, and of each element of its arrays
+def scan_spans(data):
+    fields = {}  # key: span of the value
+    elements = {}  # key: spans of the elements of the array value
+    depth = 0
+    expect_key = False
+    key = None
+    value_start = element_start = None
+    in_array = False  # whether the depth 2 container is an array value
+    position = 0
+    while True:
+        match = _STRUCTURE.search(data, position)
+        if match is None:
+            raise ValueError("Unexpected end of JSON file at byte %d" % position)
+        token = match.group()
+        start = match.start()
+        position = match.end()
+        if token == b'"':
+            position = _STRING_REST.match(data, position).end()
+            if depth == 1 and expect_key:
+                key = json.loads(bytes(data[start:position]).decode("utf-8", "surrogatepass"))
+                expect_key = False
+        elif token in b"{[":
+            depth += 1
+            if depth == 1:
+                if token != b"{":
+                    raise ValueError("Expecting a JSON object at byte %d" % start)
+                expect_key = True
+            elif depth == 2 and token == b"[":
+                in_array = True
+                elements[key] = []
+                element_start = _WHITESPACE.match(data, position).end()
+        elif token in b"}]":
+            if depth == 2 and in_array:
+                end = _end_of_value(data, element_start, start)
+                if end > element_start:
+                    elements[key].append((element_start, end - element_start))
+                in_array = False
+            depth -= 1
+            if depth == 0:
+                if key is not None:
+                    fields[key] = (value_start, _end_of_value(data, value_start, start) - value_start)
+                return fields, elements
+        elif token == b":":
+            if depth == 1:
+                value_start = _WHITESPACE.match(data, position).end()
+        elif depth == 1:
+            fields[key] = (value_start, _end_of_value(data, value_start, start) - value_start)
+            expect_key = True
+        elif depth == 2 and in_array:
+            elements[key].append((element_start, _end_of_value(data, element_start, start) - element_start))
+            element_start = _WHITESPACE.match(data, position).end()
+
+
+# writes the sidecar index of the screenplay or movie JSON file at path
+def build_index(path, index_path=None):
+    if index_path is None:
+        index_path = path + INDEX_SUFFIX
+    with open(path, "rb") as fp:
+        data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        fields, elements = scan_spans(data)
+        scene_key = next((key for key in SCENE_KEYS if key in elements), None)
+        if scene_key is None:
+            raise Exception("No scenes or visual_scenes in JSON file: " + path)
+        scene_ids = array("q")
+        offsets = array("Q")
+        lengths = array("Q")
+        for offset, length in elements[scene_key]:
+            scene_ids.append(json.loads(data[offset:offset + length].decode("utf-8", "surrogatepass"))["identifier"])
+            offsets.append(offset)
+            lengths.append(length)
+    finally:
+        data.close()
+    status = os.stat(path)
+    contiguous = all(scene_id == scene_ids[0] + row for row, scene_id in enumerate(scene_ids))
+    meta = {"scene_key": scene_key, "size": status.st_size, "mtime_ns": status.st_mtime_ns,
+            "contiguous": contiguous, "keys": list(fields),
+            "fields": {key: list(span) for key, span in fields.items() if key != scene_key}}
+    with open(index_path, "wb") as output_file:
+        write_container(output_file, INDEX, [("META", records_section([meta])), ("SIDS", little_endian(scene_ids)),
+                                             ("SOFF", little_endian(offsets)), ("SLEN", little_endian(lengths))])
+    return index_path
+
+
+class SceneIndex(BinaryFile):
+    kind = INDEX
+
+    def __init__(self, path):
+        super(SceneIndex, self).__init__(path)
+        self.scene_ids = self.column("SIDS", "q")
+        self.offsets = self.column("SOFF", "Q")
+        self.lengths = self.column("SLEN", "Q")
+        self.rows = None  # scene identifier: row, only built for identifiers that are not contiguous
+
+    def __len__(self):
+        return len(self.scene_ids)
+
+    # whether the index was written for the file as it is now
+    def matches(self, path):
+        status = os.stat(path)
+        return status.st_size == self.meta["size"] and status.st_mtime_ns == self.meta["mtime_ns"]
+
+    def row(self, identifier):
+        if self.meta["contiguous"]:
+            row = identifier - self.scene_ids[0] if len(self) else -1
+            if not 0 <= row < len(self):
+                raise KeyError(identifier)
+            return row
+        if self.rows is None:
+            self.rows = {}
+            for row, scene_id in enumerate(self.scene_ids):
+                self.rows.setdefault(scene_id, row)
+        return self.rows[identifier]
+
+
+# the scenes of a screenplay or movie JSON file, decoded one at a time as they are asked for
+class IndexedSceneFile(object):
+    def __init__(self, path, index_path=None):
+        if index_path is None:
+            index_path = path + INDEX_SUFFIX
+        self.index = None
+        if os.path.exists(index_path):
+            self.index = SceneIndex(index_path)
+            if not self.index.matches(path):
+                self.index.close()
+                self.index = None
+        if self.index is None:
+            self.index = SceneIndex(build_index(path, index_path))
+        with open(path, "rb") as fp:
+            self.data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self.styles = None
+        self.table = {}  # the styles of the elements of full movie files, shared through intern_style
+        if self.scene_key == "visual_scenes" and "styles" in self.index.meta["fields"]:
+            self.styles = styles_fromList(self.field("styles"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.index.close()
+        self.data.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.scene_at(row)
+
+    # the file's top-level keys, in order
+    @property
+    def keys(self):
+        return self.index.meta["keys"]
+
+    @property
+    def scene_key(self):
+        return self.index.meta["scene_key"]
+
+    def decode(self, offset, length):
+        return json.loads(self.data[offset:offset + length].decode("utf-8", "surrogatepass"))
+
+    # the value of one of the file's top-level fields other than its scenes
+    def field(self, key):
+        offset, length = self.index.meta["fields"][key]
+        return self.decode(offset, length)
+
+    def scene_dict(self, identifier):
+        return self.scene_dict_at(self.index.row(identifier))
+
+    def scene_dicts(self):
+        for row in range(len(self)):
+            yield self.scene_dict_at(row)
+
+    def scene_dict_at(self, row):
+        return self.decode(self.index.offsets[row], self.index.lengths[row])
+
+    def scene_at(self, row):
+        if self.scene_key == "visual_scenes":
+            return VisualScene.fromDict(self.scene_dict_at(row), self.styles, self.table)
+        return Scene.fromDict(self.scene_dict_at(row))
+
+    def scene(self, identifier):
+        return self.scene_at(self.index.row(identifier))
+
+    # the scenes from identifier first to identifier last, inclusive, in file order
+    def window(self, first, last):
+        for row in range(self.index.row(first), self.index.row(last) + 1):
+            yield self.scene_at(row)
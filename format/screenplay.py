@@ -6,6 +6,9 @@ from json import JSONEncoder
 import json
 import uuid
 
+from serialization import register_fields, to_json_tree
+from slots import slot_values
+
 
 class Screenplay(object):
     def __init__(self, scenes=None, title=None, doc_id=None):
@@ -46,6 +49,8 @@ It is made up of SceneElements
 
 
 class Scene(object):
+    __slots__ = ("elements", "duration", "identifier")
+
     def __init__(self, elements=None, duration=0.0, identifier=0):
         self.elements = elements
         self.duration = duration
@@ -66,7 +71,7 @@ class Scene(object):
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return slot_values(self) == slot_values(other)
         else:
             return False
 
@@ -81,6 +86,8 @@ Priority gives an indication to the Blocker class of how to display this SceneEl
 
 
 class SceneElement(object):
+    __slots__ = ("content", "name", "priority")
+
     def __init__(self, content=None, name=None, priority=0):
         self.content = content
         self.name = name
@@ -97,7 +104,7 @@ class SceneElement(object):
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return slot_values(self) == slot_values(other)
         else:
             return False
 
@@ -108,33 +115,45 @@ class SceneElement(object):
 # JSON encoding #######################################################################################################
 
 
+def scene_element_fields(obj):
+    return {"content": obj.content,
+            "name": obj.name,
+            "priority": obj.priority}
+
+
+def scene_fields(obj):
+    return {"duration": obj.duration,
+            "elements": obj.elements,
+            "identifier": obj.identifier}
+
+
+def screenplay_fields(obj):
+    return {"title": obj.title,
+            "scenes": obj.scenes,
+            "doc_id": str(obj.doc_id)}
+
+
+register_fields(SceneElement, scene_element_fields)
+register_fields(Scene, scene_fields)
+register_fields(Screenplay, screenplay_fields)
+
+
 class SceneElementJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, SceneElement):
             raise Exception("Cannot use this encoder to encode non-Scene-Element class.")
-        serialized_scene_element = {"content": obj.content,
-                                    "name": obj.name,
-                                    "priority": obj.priority}
-        return serialized_scene_element
+        return to_json_tree(obj)
 
 
 class SceneJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, Scene):
             raise Exception("Cannot use this encoder to encode non-Scene class.")
-        scene_element_encoder = SceneElementJSONEncoder()  # for serializing individual scene elements
-        serialized_scene = {"duration": obj.duration,
-                            "elements": [scene_element_encoder.default(e) for e in obj.elements],
-                            "identifier": obj.identifier}
-        return serialized_scene
+        return to_json_tree(obj)
 
 
 class ScreenplayJSONEncoder(JSONEncoder):
     def default(self, obj):
         if not isinstance(obj, Screenplay):
             raise Exception("Cannot use this encoder to encode non-Screenplay class.")
-        scene_encoder = SceneJSONEncoder()  # for serializing individual scenes
-        serialized_screenplay = {"title": obj.title,
-                                 "scenes": [scene_encoder.default(scene) for scene in obj.scenes],
-                                 "doc_id": str(obj.doc_id)}
-        return serialized_screenplay
+        return to_json_tree(obj)
@@ -3,18 +3,21 @@ Screenwriters turn Document objects into Screenplays
 created by beth on 7/22/15
 """
 from abc import ABCMeta, abstractmethod
+from itertools import count, islice
 from json import JSONEncoder, JSONDecoder
 import json
 from json.decoder import WHITESPACE
+import logging
 from random import shuffle
 import textwrap
 
 from nltk import Tree
 
-from nltk.parse.stanford import StanfordParser
-
 from document import Document
+from parsers import cached_parser
 from screenplay import Screenplay, Scene, SceneElement
+from tree_analysis import TreeAnalysis
+from wrapping import wrap_sentences
 
 
 class Screenwriter(object):
@@ -33,10 +36,26 @@ class Screenwriter(object):
         screenplay.title = document.header
         return screenplay
 
+    # yields the scenes of the screenplay one at a time; screenwriters that can write a scene before reading the whole
+    # document override this, the rest write the whole screenplay first
+    def iter_scenes(self, document):
+        return iter(self.write_screenplay(document).scenes or [])
+
     def __str__(self):
         return json.dumps(self, cls=ScreenwriterJsonEncoder, indent=4)
 
 
+# screenwriters that need parse trees; without an injected parser they share the process-wide one
+# either way trees are looked up in the shared parse tree cache first
+class ParsingScreenwriter(Screenwriter):
+    def __init__(self, parser=None):
+        super().__init__()
+        self.parser = parser
+
+    def get_parser(self):
+        return cached_parser(self.parser)
+
+
 # most basic converter - one sentence per scene, all scenes shown for the same time
 class BasicScreenwriter(Screenwriter):
     def __init__(self, width_in_chars=None):
@@ -45,10 +64,12 @@ class BasicScreenwriter(Screenwriter):
 
     def write_screenplay(self, document):
         screenplay = super(BasicScreenwriter, self).write_screenplay(document)
-        scenes = []
+        screenplay.scenes = list(self.iter_scenes(document))
+        return screenplay
 
+    def iter_scenes(self, document):
         sentence_count = 0
-        for sentence in document.sentences():
+        for sentence in document.iter_sentences():
             scene = Scene()
             scene.duration = 1.0
             scene.identifier = sentence_count
@@ -62,10 +83,7 @@ class BasicScreenwriter(Screenwriter):
             sentence_count += 1
 
             scene.elements = [scene_element]
-            scenes.append(scene)
-
-        screenplay.scenes = scenes
-        return screenplay
+            yield scene
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
@@ -90,7 +108,7 @@ class LineByLineScreenwriter(Screenwriter):
         scene.duration = 1.0
         scene.identifier = sentence_count
 
-        for sentence in document.sentences():
+        for sentence in document.iter_sentences():
             if sentence.text == "":
                 # finish current scene
                 scene_element = SceneElement()
@@ -127,28 +145,44 @@ class FixedDimensionScreenwriter(Screenwriter):
         self.width = width_in_chars
 
     def write_screenplay(self, document):
-        screenplay = super(FixedDimensionScreenwriter, self).write_screenplay(document)
-        scenes = []
+        return self.write_wrapped_screenplay(document, self.wrap_lines(document))
+
+    def iter_scenes(self, document):
+        return self.write_scenes(self.wrap_lines(document))
 
-        full_text = " ".join([s.text for s in document.sentences()])
-        wrapped_text = textwrap.wrap(full_text, self.width)
+    # streams the document's sentences through the line breaker, yielding each line as soon as it is complete
+    def wrap_lines(self, document):
+        return wrap_sentences((s.text for s in document.iter_sentences()), self.width)
 
+    def wrap(self, document):
+        return list(self.wrap_lines(document))
+
+    # wrapped_text: the lines of wrap(document), which only depend on the width and so can be shared
+    def write_wrapped_screenplay(self, document, wrapped_text):
+        screenplay = super(FixedDimensionScreenwriter, self).write_screenplay(document)
+        screenplay.scenes = list(self.write_scenes(wrapped_text))
+        return screenplay
+
+    # yields a scene for every height lines of wrapped text
+    def write_scenes(self, wrapped_text):
+        lines = iter(wrapped_text)
         scene_id = 0
-        for i in range(0, len(wrapped_text), self.height):
+        for i in count(0, self.height):
+            scene_lines = list(islice(lines, self.height))
+            if not scene_lines:
+                return
+
             scene = Scene()
             scene.duration = 1.0
             scene.identifier = scene_id
             scene_id += 1
 
             scene_element = SceneElement()
-            scene_element.content = "\n".join(wrapped_text[i: (i + self.height)])
+            scene_element.content = "\n".join(scene_lines)
             scene_element.name = "S" + str(i)
 
             scene.elements = [scene_element]
-            scenes.append(scene)
-
-        screenplay.scenes = scenes
-        return screenplay
+            yield scene
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
@@ -160,6 +194,24 @@ class FixedDimensionScreenwriter(Screenwriter):
         return not self.__eq__(other)
 
 
+# parameter sweep over FixedDimensionScreenwriters: every (height, width) combination is written from the same
+# document, and the document is wrapped once per width since the height only changes how lines are grouped
+class FixedDimensionSweep(object):
+    def __init__(self, heights_in_lines, widths_in_chars):
+        self.heights = heights_in_lines
+        self.widths = widths_in_chars
+
+    # yields (screenwriter, screenplay) for every combination
+    def write_screenplays(self, document):
+        for width in self.widths:
+            wrapped_text = None
+            for height in self.heights:
+                screenwriter = FixedDimensionScreenwriter(height, width)
+                if wrapped_text is None:
+                    wrapped_text = screenwriter.wrap(document)
+                yield screenwriter, screenwriter.write_wrapped_screenplay(document, wrapped_text)
+
+
 # randomized screenwriter - takes all sentences from the document and randomizes their order
 # all are shown for the same amount of time
 class RandomizedScreenwriter(Screenwriter):
@@ -168,7 +220,7 @@ class RandomizedScreenwriter(Screenwriter):
         scenes = []
 
         sentence_count = 0
-        for sentence in document.sentences():
+        for sentence in document.iter_sentences():
             scene = Scene()
             scene.duration = 1.0
             scene.identifier = sentence_count
@@ -198,16 +250,15 @@ class RandomizedScreenwriter(Screenwriter):
 
 
 # only constituents of a certain height in the parse tree are returned
-class ConstituentHeightScreenwriter(Screenwriter):
-    def __init__(self, height=0):
-        super().__init__()
-        self.parser = StanfordParser()
+class ConstituentHeightScreenwriter(ParsingScreenwriter):
+    def __init__(self, parser=None, height=0):
+        super().__init__(parser)
         self.constituent_height = height
 
     def write_screenplay(self, document):
         screenplay = super(ConstituentHeightScreenwriter, self).write_screenplay(document)
 
-        inputTrees = self.parser.raw_parse_sents([sentence.text for sentence in document.sentences()])
+        inputTrees = self.get_parser().raw_parse_sents(sentence.text for sentence in document.iter_sentences())
 
         element_count = 0
         for treeSet in inputTrees:
@@ -215,24 +266,17 @@ class ConstituentHeightScreenwriter(Screenwriter):
                 scene = Scene()
                 scene.duration = 1.0
 
-                # if no constituent height set, take all constituents in order of height
+                # if no constituent height set, take all constituents in order of height, below the whole sentence
+                analysis = TreeAnalysis(tree)
                 if not self.constituent_height:
-                    max_height = 0
-                    for subtree in tree.subtrees():
-                        if subtree.height() > max_height:
-                            max_height = subtree.height()
-                    for height in range(max_height):
-                        for subtree in tree.subtrees(lambda t: t.height() == height):
-                            scene_element = SceneElement()
-                            scene_element.name = "Element " + str(element_count)
-                            scene_element.content = ' '.join(subtree.leaves())
-                            scene.addElement(scene_element)
-                            element_count += 1
+                    heights = range(analysis.height)
                 else:
-                    for subtree in tree.subtrees(lambda t: t.height() == self.constituent_height):
+                    heights = [self.constituent_height]
+                for height in heights:
+                    for constituent in analysis.constituents(height):
                         scene_element = SceneElement()
                         scene_element.name = "Element " + str(element_count)
-                        scene_element.content = ' '.join(subtree.leaves())
+                        scene_element.content = analysis.text(constituent)
                         scene.addElement(scene_element)
                         element_count += 1
 
@@ -252,15 +296,12 @@ class ConstituentHeightScreenwriter(Screenwriter):
 
 # print tokens as they emerge from Stanford Parser's formatting (pformat)
 # This is an example of how NOT to do it
-class StanfordParserScreenwriter(Screenwriter):
-    def __init__(self):
-        super().__init__()
-        self.parser = StanfordParser()
+class StanfordParserScreenwriter(ParsingScreenwriter):
 
     def write_screenplay(self, document):
         screenplay = super(StanfordParserScreenwriter, self).write_screenplay(document)
 
-        inputTrees = self.parser.raw_parse_sents([sentence.text for sentence in document.sentences()])
+        inputTrees = self.get_parser().raw_parse_sents(sentence.text for sentence in document.iter_sentences())
 
         element_count = 0
         for treeSet in inputTrees:
@@ -319,17 +360,26 @@ class StanfordParserScreenwriter(Screenwriter):
 
 
 # part-of-speech screenwriter: splits on certain POS patterns
-class PartOfSpeechSplitScreenwriter(Screenwriter):
-    def __init__(self):
-        super().__init__()
-        self.parser = StanfordParser()  # converts string to tree
+class PartOfSpeechSplitScreenwriter(ParsingScreenwriter):
+    def __init__(self, parser=None):
+        super().__init__(parser)
         self.breaklabels = {"PP", "VP", "IN", "ADVP"}
         self.label_blacklist = {"ROOT"}
 
+    # constituent: whether it has a descendant with a break label spanning more than one leaf
+    def break_descendants(self, analysis):
+        has_break = [False] * len(analysis)
+        # children come after their parents in pre-order, so every child is done before its parent
+        for constituent in range(len(analysis) - 1, 0, -1):
+            if has_break[constituent] or (analysis.labels[constituent] in self.breaklabels and
+                                          analysis.leaf_count(constituent) > 1):
+                has_break[analysis.parents[constituent]] = True
+        return has_break
+
     def write_screenplay(self, document):
         screenplay = super(PartOfSpeechSplitScreenwriter, self).write_screenplay(document)
 
-        inputTrees = self.parser.raw_parse_sents([sentence.text for sentence in document.sentences()])
+        inputTrees = self.get_parser().raw_parse_sents(sentence.text for sentence in document.iter_sentences())
 
         element_count = 0
         for treeSet in inputTrees:
@@ -337,39 +387,28 @@ class PartOfSpeechSplitScreenwriter(Screenwriter):
                 scene = Scene()
                 scene.duration = 1.0  # TODO: make this dependent on some property of sentence
 
-                prefix_blacklist = set()
-                for s in tree.treepositions():
-                    if len(s) == 0:  # root of tree
-                        continue
-                    if not isinstance(tree[s], Tree):
-                        continue
-                    has_child_pp = False
-                    for t in tree[s].subtrees():
-                        if t == tree[s]:
-                            continue
-                        if t.label() in self.breaklabels and len(t.leaves()) > 1:
-                            has_child_pp = True
-                    # if it has a PP child, can't print it so continue
+                # each constituent below the root is emitted unless one of its ancestors was, or it has a descendant
+                # with a break label spanning more than one leaf; commas emitted end the scene
+                analysis = TreeAnalysis(tree)
+                has_break = self.break_descendants(analysis)
+                covered = [False] * len(analysis)  # constituent: it or one of its ancestors was emitted
+                for constituent in range(1, len(analysis)):
                     printed = False
-                    if not has_child_pp:
-                        in_blacklist = False
-                        for n in range(len(s)):
-                            if tuple(s[:len(s) - n]) in prefix_blacklist:
-                                in_blacklist = True
-                        if not in_blacklist:  # and tree[s].label() not in self.label_blacklist:
-                            if len(tree[s].leaves()) == 1 and tree[s].leaves()[0] == ",":
-                                screenplay.addScene(scene)
-                                scene = Scene()
-                                scene.duration = 1.0
-                            else:
-                                scene.addElement(SceneElement(" ".join(tree[s].leaves()),
-                                                              tree[s].label(),
-                                                              len(s)))
-                            printed = True
-                            prefix_blacklist.add(s)
-                    if not printed:
-                        print("\t", end="")
-                    print(s, tree[s].label(), tree[s].leaves(), end="\n")
+                    if not has_break[constituent] and not covered[analysis.parents[constituent]]:
+                        if analysis.constituent_leaves(constituent) == [","]:
+                            screenplay.addScene(scene)
+                            scene = Scene()
+                            scene.duration = 1.0
+                        else:
+                            scene.addElement(SceneElement(analysis.text(constituent),
+                                                          analysis.labels[constituent],
+                                                          analysis.depths[constituent]))
+                        printed = True
+                    covered[constituent] = printed or covered[analysis.parents[constituent]]
+                    if logging.getLogger().isEnabledFor(logging.DEBUG):
+                        logging.debug("%s%s %s %s" % ("" if printed else "\t", analysis.position(constituent),
+                                                      analysis.labels[constituent],
+                                                      analysis.constituent_leaves(constituent)))
 
                 element_count += 1
 
@@ -0,0 +1,247 @@
+"""
+Serialization - JSON output for the Document, Screenplay and Movie models
+Each model class registers a function giving its JSON fields one level deep, with nested models left as objects.
+dump() streams a model straight to a file from those fields without building the whole dict tree first; with the
+default options its output is byte for byte what json.dumps with the model's JSONEncoder gives. compact=True drops
+the indentation and uses orjson when it is installed; with or without orjson, compact output is strict JSON, with NaN
+and infinite floats written as null, and it escapes non-ASCII characters unless ensure_ascii is False.
+"""
+import io
+from json import JSONEncoder
+from types import GeneratorType
+from json.encoder import INFINITY, encode_basestring, encode_basestring_ascii
+import json
+import math
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pieces of output joined per write
+WRITE_PARTS = 4096
+
+_fields = {}  # model class: function giving an instance's fields
+_PLAIN_TYPES = {str, int, float, bool, tuple, type(None)}
+
+
+def register_fields(model_class, fields):
+    _fields[model_class] = fields
+
+
+def fields_function(value):
+    fields = _fields.get(type(value))
+    if fields is None:
+        for model_class in type(value).__mro__[1:]:
+            if model_class in _fields:
+                return _fields[model_class]
+    return fields
+
+
+# the whole model as nested dicts and lists, the way the model JSONEncoders return it from default()
+def to_json_tree(value):
+    if type(value) in _PLAIN_TYPES:
+        return value
+    if isinstance(value, list):
+        return [to_json_tree(item) for item in value]
+    fields = fields_function(value)
+    if fields is not None:
+        return {key: item if type(item) in _PLAIN_TYPES else to_json_tree(item)
+                for key, item in fields(value).items()}
+    return value
+
+
+# expands models one level at a time as the encoder reaches them
+class StreamingJSONEncoder(JSONEncoder):
+    def default(self, obj):
+        fields = fields_function(obj)
+        if fields is None:
+            return super(StreamingJSONEncoder, self).default(obj)
+        return fields(obj)
+
+
+def _model_fields(obj):
+    fields = fields_function(obj)
+    if fields is None:
+        raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
+    return fields(obj)
+
+
+def _float_string(value):
+    if value != value:
+        return "NaN"
+    if value == INFINITY:
+        return "Infinity"
+    if value == -INFINITY:
+        return "-Infinity"
+    return float.__repr__(value)
+
+
+# writes what JSONEncoder(indent=indent).iterencode() yields, as one recursive pass over the models instead of a
+# chain of generators per nesting level; generators are written as arrays, one item at a time
+class IndentedJSONWriter(object):
+    def __init__(self, fp, indent=4, sort_keys=False, ensure_ascii=True):
+        self.fp = fp
+        self.indent = " " * indent if isinstance(indent, int) else indent
+        self.sort_keys = sort_keys
+        self.encode_string = encode_basestring_ascii if ensure_ascii else encode_basestring
+        self.parts = []
+
+    def dump(self, obj):
+        self.write(obj, "\n")
+        self.flush()
+
+    def flush(self):
+        self.fp.write("".join(self.parts))
+        self.parts.clear()
+
+    def key_string(self, key):
+        if isinstance(key, str):
+            return key
+        if isinstance(key, float):
+            return _float_string(key)
+        if key is True:
+            return "true"
+        if key is False:
+            return "false"
+        if key is None:
+            return "null"
+        if isinstance(key, int):
+            return int.__repr__(key)
+        raise TypeError("keys must be str, int, float, bool or None, not %s" % type(key).__name__)
+
+    # newline: line break and indentation of the line value is on
+    def write(self, value, newline):
+        parts = self.parts
+        if isinstance(value, str):
+            parts.append(self.encode_string(value))
+        elif value is None:
+            parts.append("null")
+        elif value is True:
+            parts.append("true")
+        elif value is False:
+            parts.append("false")
+        elif isinstance(value, int):
+            parts.append(int.__repr__(value))
+        elif isinstance(value, float):
+            parts.append(_float_string(value))
+        elif isinstance(value, (list, tuple, GeneratorType)):
+            inner = newline + self.indent
+            first_separator = separator = "[" + inner
+            for item in value:
+                parts.append(separator)
+                self.write(item, inner)
+                separator = "," + inner
+            parts.append("[]" if separator is first_separator else newline + "]")
+        elif isinstance(value, dict):
+            if not value:
+                parts.append("{}")
+                return
+            inner = newline + self.indent
+            separator = "{" + inner
+            items = sorted(value.items()) if self.sort_keys else value.items()
+            for key, item in items:
+                parts.append(separator)
+                parts.append(self.encode_string(self.key_string(key)))
+                parts.append(": ")
+                self.write(item, inner)
+                separator = "," + inner
+            parts.append(newline + "}")
+        else:
+            self.write(_model_fields(value), newline)
+        if len(parts) >= WRITE_PARTS:
+            self.flush()
+
+
+# writes a model or dict the way dump() does with indent, except that the array at array_key is written an item at a
+# time as append() is given them, so it never has to be held whole; the fields after it are written on close()
+class IndentedArrayWriter(object):
+    def __init__(self, fp, obj, array_key, indent=4, ensure_ascii=True):
+        self.writer = IndentedJSONWriter(fp, indent, False, ensure_ascii)
+        fields = obj if isinstance(obj, dict) else _model_fields(obj)
+        keys = list(fields)
+        position = keys.index(array_key)
+        self.inner = "\n" + self.writer.indent
+        self.item_newline = self.inner + self.writer.indent
+        self.remaining = [(key, fields[key]) for key in keys[position + 1:]]
+        self.count = 0
+
+        separator = "{" + self.inner
+        for key in keys[:position + 1]:
+            self.writer.parts.append(separator)
+            self.writer.parts.append(self.writer.encode_string(self.writer.key_string(key)))
+            self.writer.parts.append(": ")
+            if key != array_key:
+                self.writer.write(fields[key], self.inner)
+            separator = "," + self.inner
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def append(self, item):
+        self.writer.parts.append(("[" if not self.count else ",") + self.item_newline)
+        self.writer.write(item, self.item_newline)
+        self.count += 1
+
+    def close(self):
+        parts = self.writer.parts
+        parts.append("[]" if not self.count else self.inner + "]")
+        for key, value in self.remaining:
+            parts.append("," + self.inner)
+            parts.append(self.writer.encode_string(self.writer.key_string(key)))
+            parts.append(": ")
+            self.writer.write(value, self.inner)
+        parts.append("\n}")
+        self.writer.flush()
+
+
+# the value with models expanded and NaN and infinite floats made None, which orjson writes as null
+def _finite(value):
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    fields = fields_function(value)
+    if fields is not None:
+        return _finite(fields(value))
+    return value
+
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]+")
+
+
+# JSON text with its non-ASCII characters escaped as json.dumps escapes them; outside strings JSON is all ASCII
+def _ascii_json(text):
+    return _NON_ASCII.sub(lambda match: encode_basestring_ascii(match.group())[1:-1], text)
+
+
+def _compact_json(obj, sort_keys, ensure_ascii):
+    if orjson is not None:
+        text = orjson.dumps(obj, default=_model_fields, option=orjson.OPT_SORT_KEYS if sort_keys else 0).decode()
+        return _ascii_json(text) if ensure_ascii else text
+    options = {"cls": StreamingJSONEncoder, "separators": (",", ":"), "sort_keys": sort_keys,
+               "ensure_ascii": ensure_ascii}
+    try:
+        return json.dumps(obj, allow_nan=False, **options)
+    except ValueError:  # only models with NaN or infinite floats pay for the copy
+        return json.dumps(_finite(obj), **options)
+
+
+def dump(obj, fp, compact=False, indent=4, sort_keys=False, ensure_ascii=True):
+    if not compact:
+        IndentedJSONWriter(fp, indent, sort_keys, ensure_ascii).dump(obj)
+    else:
+        fp.write(_compact_json(obj, sort_keys, ensure_ascii))
+
+
+def dumps(obj, compact=False, indent=4, sort_keys=False, ensure_ascii=True):
+    output = io.StringIO()
+    dump(obj, output, compact, indent, sort_keys, ensure_ascii)
+    return output.getvalue()
@@ -0,0 +1,8 @@
+"""
+Slots - helpers for the model classes that keep their fields in __slots__ rather than a __dict__
+"""
+
+
+# the values of obj's slots, in __slots__ order, for comparing and printing it like a __dict__
+def slot_values(obj):
+    return tuple(getattr(obj, name) for name in obj.__slots__)
@@ -0,0 +1,141 @@
+"""
+Streaming - reading Movie and Screenplay files one scene at a time
+The scenes array is decoded element by element from a buffer of the file, so only the scene being read is ever in
+memory as JSON; the small top-level fields (ids, title, style table) are kept as they go by.
+"""
+from json import JSONDecoder, JSONDecodeError
+from json.decoder import WHITESPACE
+import uuid
+
+from movie import VisualScene, styles_fromList
+from screenplay import Scene
+
+# characters read from the file at a time
+READ_SIZE = 1 << 16
+
+
+# yields the elements of one array field of a top-level JSON object; the object's other fields end up in fields
+class JSONArrayReader(object):
+    def __init__(self, fp, array_key, read_size=READ_SIZE):
+        self.fp = fp
+        self.array_key = array_key
+        self.read_size = read_size
+        self.decoder = JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.fields = {}
+        self.items = self.read()
+
+    def __iter__(self):
+        return self.items
+
+    # reads the rest of the file, after which fields is complete
+    def finish(self):
+        for _ in self.items:
+            pass
+
+    def fill(self):
+        # a value longer than the buffer doubles the read, so decoding it is retried only a few times
+        data = self.fp.read(max(self.read_size, len(self.buffer) - self.position))
+        if not data:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+
+    def skip_whitespace(self):
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer) or self.eof:
+                return
+            self.fill()
+
+    def expect(self, characters):
+        self.skip_whitespace()
+        if self.position >= len(self.buffer):
+            raise JSONDecodeError("Unexpected end of file, expecting one of %r" % characters, self.buffer,
+                                  self.position)
+        character = self.buffer[self.position]
+        if character not in characters:
+            raise JSONDecodeError("Expecting one of %r" % characters, self.buffer, self.position)
+        self.position += 1
+        return character
+
+    def decode(self):
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # a number at the end of the buffer may continue in the next read
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def read(self):
+        self.expect("{")
+        self.skip_whitespace()
+        if self.buffer.startswith("}", self.position):
+            self.position += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(":")
+            if key == self.array_key:
+                self.expect("[")
+                self.skip_whitespace()
+                if self.buffer.startswith("]", self.position):
+                    self.position += 1
+                else:
+                    while True:
+                        yield self.decode()
+                        if self.expect(",]") == "]":
+                            break
+            else:
+                self.fields[key] = self.decode()
+            if self.expect(",}") == "}":
+                return
+
+
+# VisualScenes of a movie file, full or styled; screenplay_id is known once the file has been read through
+class MovieReader(object):
+    def __init__(self, fp):
+        self.reader = JSONArrayReader(fp, "visual_scenes")
+
+    def __iter__(self):
+        styles = None
+        table = {}  # the styles of the elements of a full movie file, shared through intern_style
+        for scene in self.reader:
+            if styles is None and "styles" in self.reader.fields:
+                styles = styles_fromList(self.reader.fields["styles"])
+            if styles is None and any("style" in element for element in scene["visual_scene_elements"]):
+                raise ValueError("The styles of a styled movie file have to come before its visual_scenes")
+            yield VisualScene.fromDict(scene, styles, table)
+
+    @property
+    def screenplay_id(self):
+        self.reader.finish()
+        return uuid.UUID(self.reader.fields["screenplay_id"])
+
+
+# Scenes of a screenplay file; title and doc_id are known once the file has been read through
+class ScreenplayReader(object):
+    def __init__(self, fp):
+        self.reader = JSONArrayReader(fp, "scenes")
+
+    def __iter__(self):
+        for scene in self.reader:
+            yield Scene.fromDict(scene)
+
+    @property
+    def title(self):
+        self.reader.finish()
+        return self.reader.fields["title"]
+
+    @property
+    def doc_id(self):
+        self.reader.finish()
+        return uuid.UUID(self.reader.fields["doc_id"])
@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "scripts")))
+
+from batch_engine import ConversionJob, run_batch
+from single_convert import do_conversion
+
+
+class BatchEngineTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.documents = ["Supernova number %d is bright. It outshines its galaxy for weeks. Then it fades." % i
+                          for i in range(3)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def testSameFilesAsOneByOne(self):
+        jobs = [ConversionJob(formatter_name, "Basic", document, "Supernova %d" % i,
+                              self.path("%d-%s.json" % (i, formatter_name)))
+                for formatter_name in ["default", "stanfordparser"] for i, document in enumerate(self.documents)]
+        self.assertEquals(run_batch(jobs, 2), [])
+        for job in jobs:
+            expected = self.path("expected.json")
+            do_conversion(job.screenwriter, job.raw_converter, job.document_source, job.document_title, expected, None)
+            with open(job.output_file) as output, open(expected) as expected_output:
+                self.assertEquals(output.read(), expected_output.read())
+
+    def testFailuresAreReturned(self):
+        jobs = [ConversionJob("default", "Unknown", document, "Supernova %d" % i, self.path("%d.json" % i))
+                for i, document in enumerate(self.documents)]
+        failures = run_batch(jobs, 2)
+        self.assertEquals(sorted(job for job, _ in failures), sorted(jobs))
+        self.assertTrue(all("Error" in error for _, error in failures))
@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+import uuid
+
+from binary import FeaturesFile, MovieFile, SceneFile, ScreenplayFile, dump, dump_features, open_binary
+from blockers import BasicBlocker
+from movie import MovieJSONEncoder, VisualSceneElement
+from screenplay import Scene, SceneElement, Screenplay, ScreenplayJSONEncoder
+
+
+class BinaryFileTests(unittest.TestCase):
+    def setUp(self):
+        self.screenplay = Screenplay([Scene([SceneElement("Supernova n°%d" % i, "S%d" % i, i % 3)], 1.5, i)
+                                      for i in range(20)], "Supernova", uuid.uuid1())
+        self.movie = BasicBlocker().block_screenplay(self.screenplay)
+        self.movie.visual_scenes[3].visual_scene_elements[0].font_size = 60.0
+        self.movie.visual_scenes[4].addElement(VisualSceneElement(relative_Y_position=-200, text_string="\ud83d"))
+        self.screenplay.scenes[5].elements.append(SceneElement(None, None, 7))
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "model.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, model):
+        with open(self.path, "wb") as output_file:
+            dump(model, output_file)
+
+    def testScreenplay(self):
+        self.write(self.screenplay)
+        with open_binary(self.path) as screenplay_file:
+            self.assertIsInstance(screenplay_file, ScreenplayFile)
+            self.assertEquals(len(screenplay_file), 20)
+            self.assertEquals(screenplay_file[5], self.screenplay.scenes[5])
+            self.assertEquals(screenplay_file[-1], self.screenplay.scenes[-1])
+            self.assertEquals(json.dumps(screenplay_file.load(), cls=ScreenplayJSONEncoder),
+                              json.dumps(self.screenplay, cls=ScreenplayJSONEncoder))
+
+    def testMovie(self):
+        self.write(self.movie)
+        with open_binary(self.path) as movie_file:
+            self.assertIsInstance(movie_file, MovieFile)
+            self.assertEquals(movie_file[movie_file.index_of(4)], self.movie.visual_scenes[4])
+            self.assertEquals(len(movie_file.styles), 3)
+            self.assertEquals(json.dumps(movie_file.load(), cls=MovieJSONEncoder),
+                              json.dumps(self.movie, cls=MovieJSONEncoder))
+
+    def testFeatures(self):
+        features = [{"position": i, "avg_word_length": i / 3.0, "NN": i, "identifier": i} for i in range(5)]
+        features.append({"overall_length_-1": 25, "identifier": 5})
+        with open(self.path, "wb") as output_file:
+            dump_features(features, self.screenplay.doc_id, output_file)
+        with open_binary(self.path) as features_file:
+            self.assertIsInstance(features_file, FeaturesFile)
+            self.assertEquals(features_file.features(5), {"overall_length_-1": 25, "identifier": 5})
+            self.assertEquals(features_file.load(), features)
+            self.assertEquals(features_file.meta["screenplay_id"], str(self.screenplay.doc_id))
+
+    def testFeatureTypes(self):
+        features = [{"ok": True, "count": 2 ** 60 + 1, "mixed": False, "ratio": 0.5, "identifier": 0},
+                    {"ok": False, "count": -2 ** 63, "mixed": 3, "ratio": 2, "identifier": 1}]
+        with open(self.path, "wb") as output_file:
+            dump_features(features, self.screenplay.doc_id, output_file)
+        with open_binary(self.path) as features_file:
+            loaded = features_file.load()
+        self.assertEquals(loaded, features)
+        self.assertEquals([type(scene_features["ok"]) for scene_features in loaded], [bool, bool])
+        self.assertEquals([type(scene_features["count"]) for scene_features in loaded], [int, int])
+        self.assertEquals([type(scene_features["mixed"]) for scene_features in loaded], [int, int])
+        self.assertEquals([type(scene_features["ratio"]) for scene_features in loaded], [float, float])
+
+    def testUnsupportedFeature(self):
+        for value in [None, "NN", 2 ** 63]:
+            with open(self.path, "wb") as output_file:
+                with self.assertRaises(Exception) as context:
+                    dump_features([{"position": 1, "identifier": 0}, {"position": value, "identifier": 1}],
+                                  self.screenplay.doc_id, output_file)
+                self.assertIn("position", str(context.exception))
+                self.assertEquals(output_file.tell(), 0)
+        with open(self.path, "wb") as output_file:
+            with self.assertRaises(Exception):
+                dump_features([{"x": 0.5, "identifier": 0}, {"x": 2 ** 60 + 1, "identifier": 1}],
+                              self.screenplay.doc_id, output_file)
+
+    def testWrongKind(self):
+        self.write(self.movie)
+        with self.assertRaises(Exception):
+            ScreenplayFile(self.path)
+
+    def testSceneFileIsAbstract(self):
+        self.write(self.movie)
+        with self.assertRaises(TypeError):
+            SceneFile(self.path)
@@ -1,6 +1,7 @@
 from unittest import TestCase
 from urllib.request import urlopen
 
+from document import Document, Paragraph, Section, Sentence
 from raw_converters import WikiHtmlFileRawConverter
 
 
@@ -19,4 +20,36 @@ class TestSection(TestCase):
                                                                      "energy as the Sun or any ordinary star "
                                                                      "is expected to emit over its entire "
                                                                      "life span, before fading from view over "
-                                                                     "several weeks or months.")
\ No newline at end of file
+                                                                     "several weeks or months.")
+
+
+class TestWalk(TestCase):
+    def setUp(self):
+        # section depth well past the recursion limit
+        self.sections = [Section(header=str(depth), paragraphs=[Paragraph([Sentence(str(depth), 0)], 0)])
+                         for depth in range(1500)]
+        for parent, child in zip(self.sections, self.sections[1:]):
+            parent.subsections = [child]
+        self.sections[0].subsections.append(Section(header="last", paragraphs=[Paragraph([Sentence("last", 0)], 0)]))
+        self.document = Document(header="Nested", section=self.sections[0])
+
+    def testSentenceOrder(self):
+        texts = [sentence.text for sentence in self.document.iter_sentences()]
+        self.assertEquals(texts, [str(depth) for depth in range(1500)] + ["last"])
+        self.assertEquals(self.document.sentences(), list(self.document.iter_sentences()))
+
+    def testSectionPaths(self):
+        paths = [path for path, sentence in self.document.walk()]
+        self.assertEquals(paths[2], tuple(self.sections[:3]))
+        self.assertEquals([section.header for section in paths[-1]], ["0", "last"])
+        self.assertEquals(len(paths), 1501)
+        self.assertEquals([path for path, sentence in self.document.section.walk(paths=False)], [None] * 1501)
+
+    def testSiblingPaths(self):
+        leaf = Section(header="leaf", paragraphs=[Paragraph([Sentence("a", 0), Sentence("b", 1)], 0)])
+        middle = Section(header="middle", subsections=[leaf])
+        sibling = Section(header="sibling", paragraphs=[Paragraph([Sentence("c", 0)], 0)])
+        root = Section(header="root", paragraphs=[], subsections=[middle, sibling])
+        self.assertEquals([([section.header for section in path], sentence.text) for path, sentence in root.walk()],
+                          [(["root", "middle", "leaf"], "a"), (["root", "middle", "leaf"], "b"),
+                           (["root", "sibling"], "c")])
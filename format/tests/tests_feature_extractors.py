@@ -1,11 +1,21 @@
+import math
 import os
+import tempfile
 import unittest
+import uuid
+from collections import Counter
 
+import numpy as np
 from nltk.parse import stanford
 
 from feature_extractors import DocumentPositionFeatureExtractor, OverallLengthFeatureExtractor, \
     AverageWordLengthFeatureExtractor, WordEntropyFeatureExtractor, ParseTreeFeatureExtractor, \
-    PartsOfSpeechFeatureExtractor, MultiFeatureExtractor
+    PartsOfSpeechFeatureExtractor, MultiFeatureExtractor, NeighboringSceneFeatureExtractor, SceneWidthFeatureExtractor, \
+    SceneContextFeatureExtractor, ExtractedFeatures, PENN_TREEBANK_TAGS
+from analysis import MovieAnalysis
+from blockers import BasicBlocker
+from feature_matrix import FeatureMatrix
+from screenplay import Scene, SceneElement, Screenplay
 from screenwriters import BasicScreenwriter
 from raw_converters import BasicTextFileRawConverter
 
@@ -171,3 +181,155 @@ class MultiFeatureExtractorTests(FeatureExtractorTestCase):
                                       'overall_length': 23, 'least_common_word_freq': 1},
                                      {'position': 13, 'least_common_word_length': 11,
                                       'overall_length': 30, 'least_common_word_freq': 1}])
+
+
+
+class SyntheticMovieTestCase(unittest.TestCase):
+    def setUp(self):
+        scenes = [Scene([SceneElement(" ".join(["word%d" % j for j in range(i % 5 + 1)]) + " co-op.", "S%d" % i)],
+                        1.0, i) for i in range(11)]
+        scenes.append(Scene([SceneElement("", "S11")], 1.0, 11))
+        self.movie = BasicBlocker().block_screenplay(Screenplay(scenes, "Supernova", uuid.uuid1()))
+
+
+class FeatureMatrixTests(SyntheticMovieTestCase):
+    def extractor(self):
+        return MultiFeatureExtractor([DocumentPositionFeatureExtractor(), OverallLengthFeatureExtractor(),
+                                      AverageWordLengthFeatureExtractor(), WordEntropyFeatureExtractor(),
+                                      SceneWidthFeatureExtractor(),
+                                      NeighboringSceneFeatureExtractor(-1, OverallLengthFeatureExtractor()),
+                                      NeighboringSceneFeatureExtractor(2, AverageWordLengthFeatureExtractor())])
+
+    def testMatchesGetFeatures(self):
+        matrix = self.extractor().get_feature_matrix(self.movie)
+        self.assertEquals(matrix.columns, list(self.extractor().feature_names))
+        self.assertEquals(matrix.values.shape, (12, 7))
+        # the scene without words has no average word length, where get_features divides by zero
+        self.assertTrue(np.isnan(matrix.column("avg_word_length")[11]))
+        self.assertTrue(np.isnan(matrix.column("avg_word_length_2")[9]))
+        self.assertTrue(np.isnan(matrix.column("overall_length_-1")[0]))
+
+        self.movie.visual_scenes.pop()
+        extractor = self.extractor()
+        features = FeatureMatrix.from_features(extractor.get_features(self.movie), extractor.missing_values(),
+                                               [visual_scene.identifier for visual_scene in self.movie.visual_scenes])
+        self.assertEquals(self.extractor().get_feature_matrix(self.movie), features)
+
+    def testPartsOfSpeechSchema(self):
+        extractor = NeighboringSceneFeatureExtractor(1, PartsOfSpeechFeatureExtractor())
+        self.assertEquals(extractor.feature_names, tuple(tag + "_1" for tag in PENN_TREEBANK_TAGS))
+        self.assertEquals(set(extractor.missing_values().values()), {0.0})
+
+    def testSave(self):
+        matrix = self.extractor().get_feature_matrix(self.movie)
+        with tempfile.TemporaryDirectory() as directory:
+            matrix.save(os.path.join(directory, "features.npz"))
+            self.assertEquals(FeatureMatrix.load(os.path.join(directory, "features.npz")), matrix)
+            matrix.save(os.path.join(directory, "features.npy"))
+            np.testing.assert_array_equal(np.load(os.path.join(directory, "features.npy")), matrix.values)
+        self.assertEquals(FeatureMatrix.from_features(matrix.to_features(), self.extractor().missing_values()),
+                          matrix)
+
+
+class EntropyKernelTests(SyntheticMovieTestCase):
+    def testMatchesPerSceneEntropy(self):
+        extractor = WordEntropyFeatureExtractor()
+        matrix = MultiFeatureExtractor([extractor]).get_feature_matrix(self.movie)
+        features = WordEntropyFeatureExtractor().get_features(self.movie)
+        analysis = MovieAnalysis(self.movie)
+        entropies = []
+        for scene in self.movie.visual_scenes:
+            words = Counter(word for element in scene.visual_scene_elements for word in analysis.words(element))
+            total = sum(words.values())
+            entropies.append(-sum(count / total * math.log(count / total) for count in words.values()))
+        np.testing.assert_allclose(matrix.column("word_entropy"), entropies)
+        np.testing.assert_allclose([features[scene.identifier]["word_entropy"] for scene in self.movie.visual_scenes],
+                                   entropies)
+
+    def testWindow(self):
+        extractor = WordEntropyFeatureExtractor(window=2)
+        self.assertEquals(extractor.feature_names, ("word_entropy_window_2",))
+        self.assertEquals(extractor.scene_margin(), 2)
+        features = extractor.get_features(self.movie)
+        # the entropy of the words of each run of five scenes, as one pooled scene
+        for row, scene in enumerate(self.movie.visual_scenes):
+            pooled = [" ".join(element.text_string for window_scene in self.movie.visual_scenes[max(row - 2, 0):row + 3]
+                               for element in window_scene.visual_scene_elements)]
+            pooled_movie = BasicBlocker().block_screenplay(
+                Screenplay([Scene([SceneElement(pooled[0], "S")], 1.0, 0)], "Pooled", uuid.uuid1()))
+            entropy = WordEntropyFeatureExtractor().get_features(pooled_movie)[0]["word_entropy"]
+            self.assertAlmostEqual(features[scene.identifier]["word_entropy_window_2"], entropy)
+
+    def testIterFeatures(self):
+        extractor = MultiFeatureExtractor([WordEntropyFeatureExtractor(window=3), DocumentPositionFeatureExtractor()])
+        features = extractor.get_features(self.movie)
+        streamed = list(MultiFeatureExtractor([WordEntropyFeatureExtractor(window=3),
+                                               DocumentPositionFeatureExtractor()]).iter_features(
+            self.movie.visual_scenes, chunk_size=2))
+        self.assertEquals(len(streamed), len(features))
+        for streamed_features, scene_features in zip(streamed, features):
+            self.assertEquals(streamed_features.keys(), scene_features.keys())
+            self.assertAlmostEqual(streamed_features["word_entropy_window_3"], scene_features["word_entropy_window_3"])
+
+
+
+class SceneContextFeatureExtractorTests(SyntheticMovieTestCase):
+    def extractor(self):
+        return MultiFeatureExtractor([OverallLengthFeatureExtractor(), WordEntropyFeatureExtractor(),
+                                      SceneContextFeatureExtractor(["overall_length", "word_entropy"],
+                                                                   offsets=range(-3, 4), windows=[2])])
+
+    def testMatchesNeighboringScenes(self):
+        matrix = self.extractor().get_feature_matrix(self.movie)
+        for offset in range(-3, 4):
+            neighbor = MultiFeatureExtractor([NeighboringSceneFeatureExtractor(offset, OverallLengthFeatureExtractor())])
+            np.testing.assert_array_equal(matrix.column("overall_length_%d" % offset),
+                                          neighbor.get_feature_matrix(self.movie).column("overall_length_%d" % offset))
+
+    def testRollingAggregates(self):
+        matrix = self.extractor().get_feature_matrix(self.movie)
+        lengths = matrix.column("overall_length")
+        self.assertEquals(matrix.column("overall_length_mean_2")[0], np.mean(lengths[:3]))
+        self.assertEquals(matrix.column("overall_length_max_2")[5], np.max(lengths[3:8]))
+
+    def testFeaturesMatchMatrix(self):
+        extractor = self.extractor()
+        features = extractor.get_features(self.movie)
+        self.assertEquals(FeatureMatrix.from_features(features, extractor.missing_values()),
+                          self.extractor().get_feature_matrix(self.movie))
+        self.assertEquals(list(self.extractor().iter_features(self.movie.visual_scenes, chunk_size=4)), features)
+
+    def testNeedsBaseFeatures(self):
+        with self.assertRaises(Exception):
+            MultiFeatureExtractor([SceneContextFeatureExtractor(["overall_length"])]).get_feature_matrix(self.movie)
+        with self.assertRaises(Exception):
+            MultiFeatureExtractor([SceneContextFeatureExtractor(["overall_length"])]).get_features(self.movie)
+        with self.assertRaises(Exception):
+            SceneContextFeatureExtractor(["overall_length"]).get_features(self.movie)
+
+    # extractors after a MultiFeatureExtractor's first are given the features of the ones before
+    def testPreviousFeatures(self):
+        previous_features = ExtractedFeatures()
+        previous_features.missing_values.update(OverallLengthFeatureExtractor().missing_values())
+        for scene_id, features in OverallLengthFeatureExtractor().get_features(self.movie).items():
+            previous_features[scene_id].update(features)
+        context = SceneContextFeatureExtractor(["overall_length"]).get_features(self.movie, None, previous_features)
+        neighbor = NeighboringSceneFeatureExtractor(-1, OverallLengthFeatureExtractor()).get_features(self.movie)
+        for visual_scene in self.movie.visual_scenes:
+            self.assertEquals(context[visual_scene.identifier], neighbor[visual_scene.identifier])
+
+    # scripts/extract_features.py emits the same JSON types as with the NeighboringSceneFeatureExtractors it replaced
+    def testFeatureTypesMatchNeighboringScenes(self):
+        context = MultiFeatureExtractor([OverallLengthFeatureExtractor(), WordEntropyFeatureExtractor(),
+                                         SceneContextFeatureExtractor(["overall_length", "word_entropy"])])
+        neighbors = MultiFeatureExtractor([NeighboringSceneFeatureExtractor(-1, OverallLengthFeatureExtractor()),
+                                           NeighboringSceneFeatureExtractor(-1, WordEntropyFeatureExtractor())])
+        context_features = context.get_features(self.movie)
+        neighbor_features = {features["identifier"]: features for features in neighbors.get_features(self.movie)}
+        for scene_features in context_features:
+            expected = neighbor_features.get(scene_features["identifier"], {})
+            names = sorted(name for name in expected if name.endswith("_-1"))
+            self.assertEquals(sorted(name for name in scene_features if name.endswith("_-1")), names)
+            for name in names:
+                self.assertEquals(type(scene_features[name]), type(expected[name]))
+        self.assertIsInstance(context_features[1]["overall_length_-1"], int)
@@ -1,9 +1,11 @@
 import json
 import unittest
+import uuid
 
 from blockers import BasicBlocker
-from movie import MovieJSONEncoder, Movie
+from movie import MovieJSONEncoder, Movie, StyledMovieJSONEncoder, VisualScene, VisualSceneElement
 from raw_converters import BasicTextFileRawConverter
+from screenplay import Scene, SceneElement, Screenplay
 from screenwriters import BasicScreenwriter
 
 
@@ -41,3 +43,46 @@ class MovieSerializationTestCase(unittest.TestCase):
         serialized_json = json.dumps(movie, cls=MovieJSONEncoder, sort_keys=True)
         deserialized_movie = Movie.fromDict(json.loads(serialized_json))
         self.assertEquals(movie, deserialized_movie)
+
+
+class StyledMovieSerializationTestCase(unittest.TestCase):
+    def setUp(self):
+        scenes = [Scene([SceneElement("Supernova number %d" % i, "S%d" % i)], 1.0, i) for i in range(10)]
+        self.movie = BasicBlocker().block_screenplay(Screenplay(scenes, "Supernova", uuid.uuid1()))
+        self.movie.visual_scenes[3].visual_scene_elements[0].font_size = 60.0
+        self.movie.visual_scenes[4].addElement(VisualSceneElement(relative_Y_position=-200.0,
+                                                                  outline_color=(0, 0, 0, 1)))
+
+    def testStylesAreShared(self):
+        styled = json.loads(json.dumps(self.movie, cls=StyledMovieJSONEncoder))
+        self.assertEquals(len(styled["styles"]), 3)
+        self.assertEquals([scene["visual_scene_elements"][0]["style"] for scene in styled["visual_scenes"]],
+                          [0, 0, 0, 1, 0, 0, 0, 0, 0, 0])
+        styles = {element.style for scene in self.movie.visual_scenes for element in scene.visual_scene_elements}
+        self.assertEquals(len(styles), 3)
+
+    def testStyledRoundTrip(self):
+        deserialized_movie = Movie.fromDict(json.loads(json.dumps(self.movie, cls=StyledMovieJSONEncoder)))
+        self.assertEquals(self.movie, deserialized_movie)
+        self.assertEquals(json.dumps(deserialized_movie, cls=MovieJSONEncoder),
+                          json.dumps(self.movie, cls=MovieJSONEncoder))
+
+    def testOverridesStayOnElement(self):
+        elements = [scene.visual_scene_elements[0] for scene in self.movie.visual_scenes]
+        self.assertEquals(elements[3].font_size, 60.0)
+        self.assertEquals(elements[2].font_size, 120.0)
+        self.assertTrue(elements[2].style is elements[3].shared_style)
+        self.assertEquals(elements[3].style, elements[2].style._replace(font_size=60.0))
+
+    def testListColors(self):
+        element = VisualSceneElement(color=[1.0, 0.0, 0.0, 1.0])
+        element.outline_color = [0, 0, 0, 1]
+        self.assertEquals((element.color, element.outline_color), ((1.0, 0.0, 0.0, 1.0), (0, 0, 0, 1)))
+        movie = Movie([VisualScene([element], 1.0, 0)], uuid.uuid1())
+        self.assertEquals(Movie.fromDict(json.loads(json.dumps(movie, cls=StyledMovieJSONEncoder))), movie)
+        self.assertEquals(Movie.fromDict(json.loads(json.dumps(movie, cls=MovieJSONEncoder))), movie)
+
+    def testReadElementsShareStyles(self):
+        movie = Movie.fromDict(json.loads(json.dumps(self.movie, cls=MovieJSONEncoder)))
+        styles = {id(element.style) for scene in movie.visual_scenes for element in scene.visual_scene_elements}
+        self.assertEquals(len(styles), 3)
@@ -0,0 +1,246 @@
+import os
+import tempfile
+import time
+import unittest
+
+from nltk import Tree
+
+from document import Document, Paragraph, Section, Sentence
+from feature_extractors import ParseTreeFeatureExtractor
+from movie import Movie, VisualScene, VisualSceneElement
+from parsers import Parser, ParseTreeCache, CachingParser, ParserPool, RecordedTreeParser, ShallowParser, \
+    cached_parser, parser_factory
+from screenwriters import ConstituentHeightScreenwriter, PartOfSpeechSplitScreenwriter, StanfordParserScreenwriter
+
+
+class WordListParser(Parser):
+    def __init__(self):
+        self.parsed_lines = []
+
+    def raw_parse_sents(self, sentences):
+        for line in self.lines(sentences):
+            self.parsed_lines.append(line)
+            yield iter([Tree("ROOT", [Tree("NN", [word]) for word in line.split()])])
+
+
+# waits outside the interpreter for every line, like a round trip to the Stanford JVM
+class SlowWordListParser(WordListParser):
+    def __init__(self, seconds):
+        super().__init__()
+        self.seconds = seconds
+
+    def raw_parse_sents(self, sentences):
+        for trees in super().raw_parse_sents(sentences):
+            time.sleep(self.seconds)
+            yield trees
+
+
+class ParseTreeCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ParseTreeCache(os.path.join(self.directory.name, "trees.sqlite"), max_entries=10)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def testRepeatParsesHitCache(self):
+        backend = WordListParser()
+        parser = CachingParser(backend, self.cache)
+        first = [list(trees) for trees in parser.raw_parse_sents(["Supernovas explode", "Stars\nburn", ""])]
+        second = [list(trees) for trees in parser.raw_parse_sents(["Supernovas explode", "Stars\nburn", ""])]
+        self.assertEquals(first, second)
+        self.assertEquals(len(first), 3)
+        self.assertEquals(backend.parsed_lines, ["Supernovas explode", "Stars", "burn"])
+        self.assertEquals(self.cache.hits, 3)
+        self.assertEquals(self.cache.misses, 3)
+
+    def testVersionIsPartOfKey(self):
+        self.assertNotEqual(ParseTreeCache.key("v1", "Stars burn"), ParseTreeCache.key("v2", "Stars burn"))
+
+    def testEviction(self):
+        parser = CachingParser(WordListParser(), self.cache)
+        list(parser.raw_parse_sents(["sentence %d" % i for i in range(25)]))
+        self.assertEquals(len(self.cache), 9)
+
+    def testEvictsLeastRecentlyUsed(self):
+        self.cache.put_many([("old", "(A a)"), ("used", "(B b)")])
+        time.sleep(0.01)
+        self.cache.put_many([("new %d" % i, "(C c)") for i in range(8)])
+        time.sleep(0.01)
+        self.cache.get_many(["used"])
+        time.sleep(0.01)
+        self.cache.put_many([("newest", "(C c)")])
+        self.assertEquals(len(self.cache), 9)
+        self.assertEquals(self.cache.get_many(["old", "used"]), {"used": "(B b)"})
+
+    def testEvictionBySize(self):
+        self.cache.max_bytes = 100
+        self.cache.put_many([("tree %d" % i, "(A %s)" % ("a" * 15)) for i in range(6)])  # 20 bytes each
+        self.assertEquals(len(self.cache), 4)
+        self.assertEquals(set(self.cache.get_many(["tree %d" % i for i in range(6)])), {"tree 2", "tree 3", "tree 4",
+                                                                                        "tree 5"})
+
+    def testHitsWrittenTogether(self):
+        self.cache.put_many([("used", "(B b)")])
+        written = []
+        self.cache.connection.set_trace_callback(written.append)
+        for _ in range(5):
+            self.cache.get_many(["used"])
+        self.assertFalse([statement for statement in written if statement.startswith("UPDATE")])
+        self.cache.flush()
+        self.assertEquals(len([statement for statement in written if statement.startswith("UPDATE")]), 1)
+
+    def testReadsSentencesAsTreesAreAskedFor(self):
+        drawn = []
+
+        def sentences():
+            for i in range(1000):
+                drawn.append(i)
+                yield "sentence %d" % i
+
+        backend = WordListParser()
+        trees = CachingParser(backend, self.cache, chunk_size=8).raw_parse_sents(sentences())
+        next(trees)
+        self.assertEquals(len(drawn), 8)
+        self.assertEquals(len(backend.parsed_lines), 8)
+
+
+class ParserTests(unittest.TestCase):
+    def testParserIsAbstract(self):
+        with self.assertRaises(TypeError):
+            Parser()
+
+        class NoParse(Parser):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoParse()
+
+
+class ShallowParserTests(unittest.TestCase):
+    def testOneTreePerLine(self):
+        parser = ShallowParser()
+        trees = [list(trees) for trees in parser.raw_parse_sents(["The cat jumped on the mat.", "It slept\nsoundly", ""])]
+        self.assertEquals(len(trees), 3)
+        self.assertEquals([tree.leaves() for [tree] in trees],
+                          [["The", "cat", "jumped", "on", "the", "mat", "."], ["It", "slept"], ["soundly"]])
+
+    def testChunks(self):
+        [tree] = ShallowParser().raw_parse("The cat jumped on the mat.")
+        self.assertEquals(tree, Tree.fromstring("(ROOT (S (NP (DT The) (NN cat)) "
+                                                "(VP (VBD jumped) (PP (IN on) (NP (DT the) (NN mat)))) (. .)))"))
+
+    def testNotCached(self):
+        parser = ShallowParser()
+        self.assertTrue(cached_parser(parser) is parser)
+
+
+class RecordedTreeParserTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testReplaysRecordedTrees(self):
+        backend = WordListParser()
+        recorded = RecordedTreeParser.record(backend, ["Supernovas explode", "Stars\nburn", "Stars"])
+        path = os.path.join(self.directory.name, "trees.json")
+        recorded.save(path)
+        replayed = parser_factory("recorded", path)
+        self.assertEquals([list(trees) for trees in replayed.raw_parse_sents(["Stars\nburn", "Supernovas explode"])],
+                          [list(trees) for trees in WordListParser().raw_parse_sents(["Stars\nburn", "Supernovas explode"])])
+        self.assertEquals(replayed.version(), "WordListParser")
+        self.assertEquals(backend.parsed_lines, ["Supernovas explode", "Stars", "burn"])
+
+    def testMissingSentence(self):
+        recorded = RecordedTreeParser({"Stars burn": "(ROOT (NN Stars) (NN burn))"})
+        with self.assertRaises(Exception):
+            list(recorded.raw_parse_sents(["Supernovas explode"]))
+        fallback = WordListParser()
+        recorded.fallback = fallback
+        trees = [list(trees) for trees in recorded.raw_parse_sents(["Supernovas explode", "Stars burn"])]
+        self.assertEquals(trees, [[Tree.fromstring("(ROOT (NN Supernovas) (NN explode))")],
+                                  [Tree.fromstring("(ROOT (NN Stars) (NN burn))")]])
+        self.assertEquals(fallback.parsed_lines, ["Supernovas explode"])
+
+
+class ParserBackendTests(unittest.TestCase):
+    def setUp(self):
+        sentences = [Sentence(text, 0) for text in ["The cat jumped on the mat.", "Dogs bark loudly, and cats run."]]
+        self.document = Document("Pets", Section("Pets", [Paragraph(sentences, 0)]))
+
+    def testScreenwritersRunOnShallowParser(self):
+        for screenwriter in [ConstituentHeightScreenwriter(ShallowParser(), 2),
+                             PartOfSpeechSplitScreenwriter(ShallowParser()), StanfordParserScreenwriter(ShallowParser())]:
+            screenplay = screenwriter.write_screenplay(self.document)
+            self.assertTrue(len(screenplay.scenes) >= 2)
+
+    def testFeaturesFromShallowParser(self):
+        movie = Movie([VisualScene([VisualSceneElement(text_string=sentence.text)], 1.0, identifier)
+                       for identifier, sentence in enumerate(self.document.iter_sentences())], None)
+        features = ParseTreeFeatureExtractor(ShallowParser()).get_features(movie)
+        self.assertEquals(features[0], {"max_tree_length": 3, "max_tree_height": 6})
+
+    def testUnknownBackend(self):
+        with self.assertRaises(Exception):
+            parser_factory("jvm")
+
+
+class ParserPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.sentences = ["Sentence number %d\nsecond line %d" % (i, i) for i in range(60)]
+
+    def testSameTreesInOrder(self):
+        pool = ParserPool.of(WordListParser, 3, chunk_size=7)
+        try:
+            self.assertEquals([list(trees) for trees in pool.raw_parse_sents(self.sentences)],
+                              [list(trees) for trees in WordListParser().raw_parse_sents(self.sentences)])
+            self.assertEquals(sorted(line for parser in pool.parsers for line in parser.parsed_lines),
+                              sorted(Parser.lines(self.sentences)))
+        finally:
+            pool.close()
+
+    def testBackpressure(self):
+        drawn = []
+
+        def sentences():
+            for sentence in self.sentences:
+                drawn.append(sentence)
+                yield sentence
+
+        pool = ParserPool.of(WordListParser, 2, chunk_size=4, max_pending=3)
+        try:
+            trees = pool.raw_parse_sents(sentences())
+            next(trees)
+            self.assertTrue(len(drawn) <= (3 + 1) * 2)  # max_pending chunks and the next, two sentences to a chunk
+            self.assertEquals(len(list(trees)), 2 * len(self.sentences) - 1)
+        finally:
+            pool.close()
+
+    def testWorkersParseInParallel(self):
+        serial = SlowWordListParser(0.002)
+        start = time.perf_counter()
+        expected = [list(trees) for trees in serial.raw_parse_sents(self.sentences)]
+        serial_seconds = time.perf_counter() - start
+
+        pool = ParserPool.of(lambda: SlowWordListParser(0.002), 4, chunk_size=8)
+        try:
+            start = time.perf_counter()
+            self.assertEquals([list(trees) for trees in pool.raw_parse_sents(self.sentences)], expected)
+            pool_seconds = time.perf_counter() - start
+        finally:
+            pool.close()
+        self.assertTrue(pool_seconds < serial_seconds / 2, (pool_seconds, serial_seconds))
+
+    def testScreenwriterScenesInOrder(self):
+        sentences = [Sentence(text, 0) for text in ["The cat jumped on the mat.", "Dogs bark loudly.",
+                                                    "Birds sing, and cats run."] * 10]
+        document = Document("Pets", Section("Pets", [Paragraph(sentences, 0)]))
+        pool = ParserPool.of(ShallowParser, 3, chunk_size=2)
+        try:
+            self.assertEquals(PartOfSpeechSplitScreenwriter(pool).write_screenplay(document),
+                              PartOfSpeechSplitScreenwriter(ShallowParser()).write_screenplay(document))
+        finally:
+            pool.close()
@@ -0,0 +1,120 @@
+import io
+import json
+import unittest
+
+from blockers import BasicBlocker
+from decorators import FirstLastSceneAddDecorator
+from document import Document, Paragraph, Section, Sentence
+from feature_extractors import DocumentPositionFeatureExtractor, OverallLengthFeatureExtractor, \
+    NeighboringSceneFeatureExtractor, MultiFeatureExtractor
+from movie import Movie, MovieJSONEncoder
+from pipeline import Pipeline, StreamedDocument
+from screenplay import Screenplay
+from screenwriters import BasicScreenwriter, FixedDimensionScreenwriter
+from serialization import dumps
+
+
+def sentence_texts(count):
+    return ["Supernova number %d is %s times as bright as the Sun." % (i, "very " * (i % 5)) for i in range(count)]
+
+
+def extractor():
+    return MultiFeatureExtractor([DocumentPositionFeatureExtractor(), OverallLengthFeatureExtractor(),
+                                  NeighboringSceneFeatureExtractor(-1, OverallLengthFeatureExtractor())])
+
+
+class PipelineTests(unittest.TestCase):
+    def setUp(self):
+        sentences = [Sentence(text, i) for i, text in enumerate(sentence_texts(40))]
+        self.document = Document("Supernovas", Section("Supernovas", [Paragraph(sentences, 0)]))
+
+    def testIterScenes(self):
+        for screenwriter in [FixedDimensionScreenwriter(3, 40), BasicScreenwriter(30)]:
+            self.assertEquals(list(screenwriter.iter_scenes(self.document)),
+                              screenwriter.write_screenplay(self.document).scenes)
+
+    def testDecorateScenes(self):
+        scenes = list(FixedDimensionScreenwriter(3, 40).iter_scenes(self.document))
+        decorated = FirstLastSceneAddDecorator().decorate_screenplay(Screenplay(list(scenes)))
+        self.assertEquals(list(FirstLastSceneAddDecorator().decorate_scenes(iter(scenes))), decorated.scenes)
+        streamed = list(FirstLastSceneAddDecorator(stream_placeholder=True).decorate_scenes(iter(scenes)))
+        self.assertEquals(streamed[1:], decorated.scenes[1:])
+        self.assertEquals(streamed[0].elements, scenes[0].elements)
+        self.assertEquals([scene.identifier for scene in streamed], list(range(len(scenes) + 2)))
+        self.assertEquals(list(FirstLastSceneAddDecorator(stream_placeholder=True).decorate_scenes(iter([]))), [])
+
+    def testSameOutputAsWholeMovie(self):
+        pipeline = Pipeline(FixedDimensionScreenwriter(3, 40), [FirstLastSceneAddDecorator()], BasicBlocker(),
+                            extractor(), chunk_size=4)
+        movie_file = io.StringIO()
+        features_file = io.StringIO()
+        pipeline.run(self.document, movie_file, features_file)
+
+        scenes = FirstLastSceneAddDecorator().decorate_scenes(
+            FixedDimensionScreenwriter(3, 40).iter_scenes(self.document))
+        movie = Movie(list(BasicBlocker().block_scenes(scenes)), self.document.doc_id)
+        self.assertEquals(movie_file.getvalue(), dumps(movie))
+        self.assertEquals(features_file.getvalue(),
+                          json.dumps({"screenplay_id": str(self.document.doc_id),
+                                      "features": extractor().get_features(movie)}, indent=4))
+
+    # what single_convert_basic wrote before its stages were chained: a whole screenplay, decorated, then blocked
+    def testSameOutputAsWholeScreenplayConversion(self):
+        screenwriter = FixedDimensionScreenwriter(3, 40)
+        screenplay = FirstLastSceneAddDecorator().decorate_screenplay(screenwriter.write_screenplay(self.document))
+        blocker = BasicBlocker()
+        blocker.font_name = "Geometria-Light SDF"
+        movie = blocker.block_screenplay(screenplay)
+        expected_movie = json.dumps(movie, cls=MovieJSONEncoder, indent=4)
+        expected_features = json.dumps({"screenplay_id": str(screenplay.doc_id),
+                                        "features": extractor().get_features(movie)}, indent=4)
+
+        pipeline = Pipeline(screenwriter, [FirstLastSceneAddDecorator()], blocker, extractor(), chunk_size=4)
+        movie_file = io.StringIO()
+        features_file = io.StringIO()
+        pipeline.run(self.document, movie_file, features_file)
+        self.assertEquals(movie_file.getvalue(), expected_movie)
+        self.assertEquals(features_file.getvalue(), expected_features)
+
+        # a screenplay already written is decorated whole, then passed through the rest of the stages
+        screenplay = FirstLastSceneAddDecorator().decorate_screenplay(screenwriter.write_screenplay(self.document))
+        movie_file = io.StringIO()
+        features_file = io.StringIO()
+        Pipeline(blocker=blocker, extractor=extractor(), chunk_size=4).write(screenplay.scenes, self.document.doc_id,
+                                                                            movie_file, features_file)
+        self.assertEquals(movie_file.getvalue(), expected_movie)
+        self.assertEquals(features_file.getvalue(), expected_features)
+
+    def testEmptyDocument(self):
+        pipeline = Pipeline(BasicScreenwriter(), [FirstLastSceneAddDecorator(stream_placeholder=True)], BasicBlocker(),
+                            extractor())
+        movie_file = io.StringIO()
+        features_file = io.StringIO()
+        document = StreamedDocument("Nothing", [])
+        pipeline.run(document, movie_file, features_file)
+        self.assertEquals(json.loads(movie_file.getvalue()),
+                          {"visual_scenes": [], "screenplay_id": str(document.doc_id)})
+        self.assertEquals(json.loads(features_file.getvalue())["features"], [])
+
+    # sentences read before the first visual scene and the first features
+    @staticmethod
+    def sentences_drawn(count):
+        drawn = []
+
+        def sentences():
+            for i, text in enumerate(sentence_texts(count)):
+                drawn.append(text)
+                yield Sentence(text, i)
+
+        pipeline = Pipeline(FixedDimensionScreenwriter(3, 40), [FirstLastSceneAddDecorator(stream_placeholder=True)],
+                            BasicBlocker(), extractor(), chunk_size=10)
+        visual_scenes = pipeline.visual_scenes(pipeline.screenwriter.iter_scenes(StreamedDocument("S", sentences())))
+        next(visual_scenes)
+        first_scene = len(drawn)
+        next(pipeline.features(visual_scenes))
+        return first_scene, len(drawn)
+
+    def testFirstSceneBeforeWholeDocument(self):
+        first_scene, first_features = self.sentences_drawn(1000)
+        self.assertTrue(first_scene < first_features < 100)
+        self.assertEquals(self.sentences_drawn(10000), (first_scene, first_features))
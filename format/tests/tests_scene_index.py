@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+import uuid
+
+from blockers import BasicBlocker
+from movie import MovieJSONEncoder, StyledMovieJSONEncoder
+from scene_index import INDEX_SUFFIX, IndexedSceneFile, scan_spans
+from screenplay import Scene, SceneElement, Screenplay, ScreenplayJSONEncoder
+
+
+class SceneIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.screenplay = Screenplay([Scene([SceneElement('Supernova "n°%d" [{,}] \\' % i, "S%d" % i, i % 3)], 1.5,
+                                            i + 10) for i in range(20)], "Supernova", uuid.uuid1())
+        self.movie = BasicBlocker().block_screenplay(self.screenplay)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "model.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, model, encoder, **options):
+        with open(self.path, "w") as output_file:
+            output_file.write(json.dumps(model, cls=encoder, **options))
+
+    def testScreenplay(self):
+        for options in [{}, {"indent": 4, "ensure_ascii": False}]:
+            self.write(self.screenplay, ScreenplayJSONEncoder, **options)
+            with IndexedSceneFile(self.path) as scene_file:
+                self.assertEquals(len(scene_file), 20)
+                self.assertEquals(scene_file.scene(17), self.screenplay.scenes[7])
+                self.assertEquals(list(scene_file.window(12, 14)), self.screenplay.scenes[2:5])
+                self.assertEquals(scene_file.field("title"), "Supernova")
+                self.assertEquals(scene_file.keys, ["title", "scenes", "doc_id"])
+                with self.assertRaises(KeyError):
+                    scene_file.scene(30)
+
+    def testMovie(self):
+        for encoder in [MovieJSONEncoder, StyledMovieJSONEncoder]:
+            self.write(self.movie, encoder, indent=4)
+            with IndexedSceneFile(self.path) as scene_file:
+                self.assertEquals(list(scene_file), self.movie.visual_scenes)
+                self.assertEquals(scene_file.scene(10), self.movie.visual_scenes[0])
+                styles = {id(element.style) for scene in scene_file for element in scene.visual_scene_elements}
+                self.assertEquals(len(styles), 1)
+
+    def testIndexIsRebuilt(self):
+        self.write(self.screenplay, ScreenplayJSONEncoder)
+        IndexedSceneFile(self.path).close()
+        self.assertTrue(os.path.exists(self.path + INDEX_SUFFIX))
+        self.screenplay.scenes = self.screenplay.scenes[5:] + self.screenplay.scenes[:5]
+        self.write(self.screenplay, ScreenplayJSONEncoder, indent=2)
+        with IndexedSceneFile(self.path) as scene_file:
+            self.assertEquals(scene_file.scene(12), self.screenplay.scenes[-3])
+            self.assertEquals(list(scene_file), self.screenplay.scenes)
+
+    def testScanSpans(self):
+        data = b'{"a": [], "b": 1 , "c": [1, "x,]"], "d": {"e": [2]}}'
+        fields, elements = scan_spans(data)
+        self.assertEquals({key: data[offset:offset + length] for key, (offset, length) in fields.items()},
+                          {"a": b"[]", "b": b"1", "c": b'[1, "x,]"]', "d": b'{"e": [2]}'})
+        self.assertEquals([data[offset:offset + length] for offset, length in elements["c"]], [b"1", b'"x,]"'])
+        self.assertEquals(elements["a"], [])
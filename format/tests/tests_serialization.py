@@ -0,0 +1,61 @@
+import io
+import json
+import unittest
+import uuid
+
+from blockers import BasicBlocker
+from document import Document, DocumentJSONEncoder, Paragraph, Section, Sentence
+from movie import MovieJSONEncoder
+from screenplay import Scene, SceneElement, Screenplay, ScreenplayJSONEncoder
+import serialization
+from serialization import dump, dumps, orjson
+
+
+class SerializationTests(unittest.TestCase):
+    def setUp(self):
+        self.screenplay = Screenplay([Scene([SceneElement("Supernova n°%d" % i, "S%d" % i, i % 3)], 1.5, i)
+                                      for i in range(20)], "Supernova", uuid.uuid1())
+        self.movie = BasicBlocker().block_screenplay(self.screenplay)
+        self.document = Document("Supernova", Section("Supernova", [Paragraph([Sentence("A stellar explosion.", 0)], 0)],
+                                                      [Section("Discovery", [Paragraph([], 0)]), Section()]))
+        self.models = [(self.screenplay, ScreenplayJSONEncoder), (self.movie, MovieJSONEncoder),
+                       (self.document, DocumentJSONEncoder)]
+
+    def testMatchesEncoders(self):
+        for model, encoder in self.models:
+            for options in [{"indent": 4}, {"indent": 4, "sort_keys": True, "ensure_ascii": False}, {"indent": "\t"}]:
+                output = io.StringIO()
+                dump(model, output, **options)
+                self.assertEquals(output.getvalue(), json.dumps(model, cls=encoder, **options))
+
+    def testCompact(self):
+        for model, encoder in self.models:
+            compact = dumps(model, compact=True, sort_keys=True)
+            self.assertNotIn("\n", compact)
+            self.assertEquals(json.loads(compact), json.loads(json.dumps(model, cls=encoder)))
+
+    # orjson when it is installed and json without it write the same values
+    def testCompactBackendsAgree(self):
+        features = {"features": [{"identifier": 0, "width": float("nan"), "height": float("inf")},
+                                 {"identifier": 1, "width": 1.5, "height": -float("inf")}]}
+        models = [features, self.screenplay, self.document]
+        for model in models:
+            compact = dumps(model, compact=True)
+            self.assertTrue(compact.isascii())
+            self.assertEquals(json.loads(dumps(model, compact=True, ensure_ascii=False)), json.loads(compact))
+        self.assertIn("n\\u00b0", dumps(self.screenplay, compact=True))
+        self.assertIn("n\u00b0", dumps(self.screenplay, compact=True, ensure_ascii=False))
+        self.assertEquals(json.loads(dumps(features, compact=True)),
+                          {"features": [{"identifier": 0, "width": None, "height": None},
+                                        {"identifier": 1, "width": 1.5, "height": None}]})
+        if serialization.orjson is not None:
+            orjson_output = [dumps(model, compact=True, sort_keys=True) for model in models]
+            serialization.orjson = None
+            try:
+                self.assertEquals([dumps(model, compact=True, sort_keys=True) for model in models], orjson_output)
+            finally:
+                serialization.orjson = orjson
+
+    def testUnknownObject(self):
+        with self.assertRaises(TypeError):
+            dumps({"screenplay": object()})
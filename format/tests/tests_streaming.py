@@ -0,0 +1,76 @@
+import io
+import json
+import unittest
+import uuid
+
+from blockers import BasicBlocker
+from feature_extractors import DocumentPositionFeatureExtractor, OverallLengthFeatureExtractor, \
+    NeighboringSceneFeatureExtractor, SceneWidthFeatureExtractor, MultiFeatureExtractor
+from movie import MovieJSONEncoder, StyledMovieJSONEncoder
+from screenplay import Scene, SceneElement, Screenplay, ScreenplayJSONEncoder
+from streaming import JSONArrayReader, MovieReader, ScreenplayReader
+
+
+class StreamingReaderTests(unittest.TestCase):
+    def setUp(self):
+        self.screenplay = Screenplay([Scene([SceneElement("Supernova n°%d is 1.4 times the Sun" % i, "S%d" % i, i % 3)],
+                                            1.5, i) for i in range(20)], "Supernova", uuid.uuid1())
+        self.movie = BasicBlocker().block_screenplay(self.screenplay)
+        self.movie.visual_scenes[3].visual_scene_elements[0].font_size = 60.0
+
+    def testScreenplay(self):
+        # read sizes smaller than a scene, and smaller than a number, still decode every value whole
+        for read_size in [1, 7, 1 << 16]:
+            for indent in [None, 4]:
+                serialized = io.StringIO(json.dumps(self.screenplay, cls=ScreenplayJSONEncoder, indent=indent))
+                reader = ScreenplayReader(serialized)
+                reader.reader.read_size = read_size
+                self.assertEquals(list(reader), self.screenplay.scenes)
+                self.assertEquals(reader.title, "Supernova")
+                self.assertEquals(reader.doc_id, self.screenplay.doc_id)
+
+    def testMovie(self):
+        for encoder in [MovieJSONEncoder, StyledMovieJSONEncoder]:
+            reader = MovieReader(io.StringIO(json.dumps(self.movie, cls=encoder)))
+            visual_scenes = list(reader)
+            self.assertEquals(visual_scenes, self.movie.visual_scenes)
+            self.assertEquals(reader.screenplay_id, self.movie.screenplay_id)
+            styles = {id(element.style) for scene in visual_scenes for element in scene.visual_scene_elements}
+            self.assertEquals(len(styles), 2)
+
+    def testStylesAfterScenes(self):
+        styled = json.loads(json.dumps(self.movie, cls=StyledMovieJSONEncoder))
+        reordered = {"visual_scenes": styled["visual_scenes"], "styles": styled["styles"],
+                     "screenplay_id": styled["screenplay_id"]}
+        with self.assertRaises(ValueError):
+            list(MovieReader(io.StringIO(json.dumps(reordered))))
+
+    def testFields(self):
+        reader = JSONArrayReader(io.StringIO('{"a": 1.5, "items": [1, [2], {"b": 3}], "c": "d"}'), "items", 2)
+        self.assertEquals(list(reader), [1, [2], {"b": 3}])
+        self.assertEquals(reader.fields, {"a": 1.5, "c": "d"})
+        reader = JSONArrayReader(io.StringIO('{"items": []}'), "items")
+        self.assertEquals(list(reader), [])
+
+    def testMalformed(self):
+        for serialized in ['{"items": [1, 2', '{"items": [1 2]}', '["items"]']:
+            with self.assertRaises(ValueError):
+                list(JSONArrayReader(io.StringIO(serialized), "items"))
+
+
+class IterFeaturesTests(unittest.TestCase):
+    def setUp(self):
+        scenes = [Scene([SceneElement(" ".join(["word"] * (i + 1)), "S%d" % i)], 1.0, i) for i in range(11)]
+        self.movie = BasicBlocker().block_screenplay(Screenplay(scenes, "Supernova", uuid.uuid1()))
+
+    def extractor(self):
+        return MultiFeatureExtractor([DocumentPositionFeatureExtractor(), OverallLengthFeatureExtractor(),
+                                      NeighboringSceneFeatureExtractor(-1, OverallLengthFeatureExtractor()),
+                                      NeighboringSceneFeatureExtractor(2, SceneWidthFeatureExtractor())])
+
+    def testMatchesGetFeatures(self):
+        features = self.extractor().get_features(self.movie)
+        for chunk_size in [1, 2, 3, 100]:
+            streamed = list(self.extractor().iter_features(iter(self.movie.visual_scenes), chunk_size))
+            self.assertEquals(sorted(streamed, key=lambda scene: scene["identifier"]),
+                              sorted(features, key=lambda scene: scene["identifier"]))
@@ -0,0 +1,133 @@
+import os
+import random
+import tempfile
+import unittest
+
+from nltk import Tree
+
+from document import Document, Paragraph, Section, Sentence
+from parsers import CachingParser, Parser, ParseTreeCache
+from screenwriters import ConstituentHeightScreenwriter, PartOfSpeechSplitScreenwriter
+from tree_analysis import TreeAnalysis
+
+
+def random_tree(generator, depth=0, labels=None, words=None):
+    children = []
+    for _ in range(generator.randint(0 if depth else 1, 3)):
+        if depth < 6 and generator.random() < 0.6:
+            children.append(random_tree(generator, depth + 1, labels, words))
+        else:
+            children.append(generator.choice(words) if words else "w%d" % generator.randint(0, 99))
+    return Tree(generator.choice(labels) if labels else "X%d" % depth, children)
+
+
+# the scenes PartOfSpeechSplitScreenwriter used to write for a tree, walking every tree position
+def split_scenes(tree, breaklabels):
+    scenes = [[]]
+    prefix_blacklist = set()
+    for s in tree.treepositions():
+        if len(s) == 0 or not isinstance(tree[s], Tree):
+            continue
+        if any(t is not tree[s] and t.label() in breaklabels and len(t.leaves()) > 1 for t in tree[s].subtrees()):
+            continue
+        if any(tuple(s[:len(s) - n]) in prefix_blacklist for n in range(len(s))):
+            continue
+        if tree[s].leaves() == [","]:
+            scenes.append([])
+        else:
+            scenes[-1].append((" ".join(tree[s].leaves()), tree[s].label(), len(s)))
+        prefix_blacklist.add(s)
+    return scenes
+
+
+# parses each line into the tree recorded for it
+class RecordingParser(Parser):
+    def __init__(self, trees):
+        self.trees = trees
+
+    def raw_parse_sents(self, sentences):
+        for line in self.lines(sentences):
+            yield iter([self.trees[line]])
+
+
+class TreeAnalysisTests(unittest.TestCase):
+    def testMatchesTree(self):
+        generator = random.Random(5)
+        for _ in range(200):
+            tree = random_tree(generator)
+            analysis = TreeAnalysis(tree)
+            self.assertEquals(analysis.leaves, tree.leaves())
+            self.assertEquals(analysis.height, tree.height())
+            self.assertEquals([analysis.subtrees[constituent] for constituent in range(len(analysis))],
+                              list(tree.subtrees()))
+            for height in range(tree.height() + 2):
+                self.assertEquals([analysis.text(constituent) for constituent in analysis.constituents(height)],
+                                  [" ".join(subtree.leaves()) for subtree in tree.subtrees(lambda t: t.height() == height)])
+
+    def testPositions(self):
+        generator = random.Random(6)
+        for _ in range(50):
+            tree = random_tree(generator)
+            analysis = TreeAnalysis(tree)
+            positions = [position for position in tree.treepositions() if isinstance(tree[position], Tree)]
+            self.assertEquals([analysis.position(constituent) for constituent in range(len(analysis))], positions)
+            self.assertEquals(analysis.depths, [len(position) for position in positions])
+
+    def testDeepTree(self):
+        tree = Tree("leaf", ["word"])
+        for depth in range(3000):
+            tree = Tree("X", [tree, "w%d" % depth])
+        analysis = TreeAnalysis(tree)
+        self.assertEquals(analysis.height, 3002)
+        self.assertEquals(analysis.leaf_count(0), 3001)
+        self.assertEquals(analysis.parents[:3], [-1, 0, 1])
+
+
+class ConstituentHeightScreenwriterTests(unittest.TestCase):
+    def setUp(self):
+        generator = random.Random(7)
+        self.trees = {"Sentence %d." % i: random_tree(generator) for i in range(20)}
+        sentences = [Sentence(text, 0) for text in self.trees]
+        self.document = Document("Trees", Section("Trees", [Paragraph(sentences, 0)]))
+        self.directory = tempfile.TemporaryDirectory()
+        self.parser = CachingParser(RecordingParser(self.trees),
+                                    ParseTreeCache(os.path.join(self.directory.name, "trees.sqlite")))
+
+    def tearDown(self):
+        self.parser.cache.close()
+        self.directory.cleanup()
+
+    def testElementsInOrderOfHeight(self):
+        for height in [0, 2, 3]:
+            screenplay = ConstituentHeightScreenwriter(self.parser, height).write_screenplay(self.document)
+            expected = []
+            for tree in self.trees.values():
+                heights = range(tree.height()) if not height else [height]
+                expected.append([" ".join(subtree.leaves()) for level in heights
+                                 for subtree in tree.subtrees(lambda t: t.height() == level)])
+            self.assertEquals([[element.content for element in scene.elements or []] for scene in screenplay.scenes],
+                              expected)
+
+
+class PartOfSpeechSplitScreenwriterTests(unittest.TestCase):
+    def setUp(self):
+        generator = random.Random(8)
+        labels = ["NP", "PP", "VP", "IN", "ADVP", "DT", "S"]
+        words = ["the", "cat", ",", "sat", "on", "mat"]
+        self.trees = {"Sentence %d." % i: random_tree(generator, labels=labels, words=words) for i in range(100)}
+        sentences = [Sentence(text, 0) for text in self.trees]
+        self.document = Document("Trees", Section("Trees", [Paragraph(sentences, 0)]))
+        self.directory = tempfile.TemporaryDirectory()
+        self.parser = CachingParser(RecordingParser(self.trees),
+                                    ParseTreeCache(os.path.join(self.directory.name, "trees.sqlite")))
+
+    def tearDown(self):
+        self.parser.cache.close()
+        self.directory.cleanup()
+
+    def testSameScenesAsTreePositionWalk(self):
+        screenwriter = PartOfSpeechSplitScreenwriter(self.parser)
+        screenplay = screenwriter.write_screenplay(self.document)
+        expected = [scene for tree in self.trees.values() for scene in split_scenes(tree, screenwriter.breaklabels)]
+        self.assertEquals([[(element.content, element.name, element.priority) for element in scene.elements or []]
+                           for scene in screenplay.scenes], expected)
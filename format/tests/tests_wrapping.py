@@ -0,0 +1,61 @@
+from itertools import islice
+import random
+import textwrap
+import unittest
+
+from wrapping import wrap_sentences
+
+
+class WrapSentencesTests(unittest.TestCase):
+    def assertWrapsLikeTextwrap(self, sentences, width, **kwargs):
+        self.assertEquals(list(wrap_sentences(sentences, width, **kwargs)),
+                          textwrap.wrap(" ".join(sentences), width, **kwargs))
+
+    def testPlainSentences(self):
+        sentences = ["A supernova is a powerful and luminous stellar explosion.",
+                     "It occurs during the last evolutionary stages of a massive star.",
+                     "", "The original object, called the progenitor, either collapses to a neutron star or black hole."]
+        for width in range(1, 80):
+            self.assertWrapsLikeTextwrap(sentences, width)
+
+    def testWhitespaceAcrossSentences(self):
+        sentences = ["ends with spaces   ", "   starts with spaces", "\t", "tab\tbed\ttext", "new\nline", "", " "]
+        for width in range(1, 30):
+            self.assertWrapsLikeTextwrap(sentences, width)
+            self.assertWrapsLikeTextwrap(sentences, width, drop_whitespace=False)
+            self.assertWrapsLikeTextwrap(sentences, width, tabsize=3)
+
+    def testHyphensAndLongWords(self):
+        sentences = ["A well-known long-period variable", "supercalifragilisticexpialidocious--indeed",
+                     "x--y -- -", "e-mail-address-that-goes-on-and-on"]
+        for width in range(1, 30):
+            self.assertWrapsLikeTextwrap(sentences, width)
+            self.assertWrapsLikeTextwrap(sentences, width, break_on_hyphens=False)
+            self.assertWrapsLikeTextwrap(sentences, width, break_long_words=False)
+            self.assertWrapsLikeTextwrap(sentences, width, initial_indent="  ", subsequent_indent="> ")
+
+    # what textwrap gives today; the wrapper keeps giving it whatever textwrap's internals become
+    def testPinnedLines(self):
+        sentences = ["Look, goof-ball -- use the -b option!", "Call 555-0123-4567-8910 now."]
+        self.assertEquals(list(wrap_sentences(sentences, 12)),
+                          ["Look, goof-", "ball -- use", "the -b", "option! Call", "555-0123-", "4567-8910", "now."])
+        self.assertEquals(list(wrap_sentences(sentences, 12, break_on_hyphens=False)),
+                          ["Look,", "goof-ball --", "use the -b", "option! Call", "555-0123-456", "7-8910 now."])
+        self.assertEquals(list(wrap_sentences(sentences, 12, break_long_words=False)),
+                          ["Look, goof-", "ball -- use", "the -b", "option! Call", "555-0123-4567-8910", "now."])
+
+    def testRandomSentences(self):
+        random.seed(0)
+        pieces = ["star", "a", "dwarf", "long-lived", "supercalifragilisticexpialidocious", " ", "  ", "\t", "\n",
+                  "--", "-", "\xa0", "end."]
+        for _ in range(500):
+            sentences = [" ".join(random.choice(pieces) for _ in range(random.randint(0, 10))).strip(random.choice(" x"))
+                         for _ in range(random.randint(0, 40))]
+            self.assertWrapsLikeTextwrap(sentences, random.randint(1, 40))
+
+    def testEndlessSentences(self):
+        def sentences():
+            while True:
+                yield "a sentence that never ends"
+
+        self.assertEquals(list(islice(wrap_sentences(sentences(), 12), 3)), ["a sentence", "that never", "ends a"])
@@ -0,0 +1,87 @@
+"""
+TreeAnalysis - heights, leaf spans and labels of every constituent of a parse tree, from one post-order pass
+Constituents are numbered in the pre-order of Tree.subtrees(), and bucketed by height in that order, so
+constituents(height) lists what tree.subtrees(lambda t: t.height() == height) yields without calling height() on
+every subtree again.
+"""
+from collections import defaultdict
+
+from nltk import Tree
+
+
+class TreeAnalysis(object):
+    def __init__(self, tree):
+        self.leaves = []
+        self.subtrees = []  # constituent: subtree
+        self.labels = []
+        self.heights = []  # as Tree.height(): 1 + the highest child, counting leaves as height 1
+        self.starts = []  # constituent: index of its first leaf
+        self.ends = []  # constituent: index after its last leaf
+        self.parents = []  # constituent: parent constituent, -1 for the root
+        self.child_indices = []  # constituent: index among its parent's children, -1 for the root
+        self.depths = []  # constituent: length of its tree position
+        self.by_height = defaultdict(list)  # height: constituents, in pre-order
+
+        # frames of [constituent, index of the next child, highest child so far]
+        stack = [self._enter(tree, -1, -1)]
+        while stack:
+            frame = stack[-1]
+            constituent = frame[0]
+            subtree = self.subtrees[constituent]
+            if frame[1] < len(subtree):
+                child = subtree[frame[1]]
+                frame[1] += 1
+                if isinstance(child, Tree):
+                    stack.append(self._enter(child, constituent, frame[1] - 1))
+                else:
+                    self.leaves.append(child)
+                    frame[2] = max(frame[2], 1)
+            else:
+                stack.pop()
+                self.heights[constituent] = frame[2] + 1
+                self.ends[constituent] = len(self.leaves)
+                if stack:
+                    stack[-1][2] = max(stack[-1][2], frame[2] + 1)
+
+        for constituent, height in enumerate(self.heights):
+            self.by_height[height].append(constituent)
+
+    def _enter(self, subtree, parent, child_index):
+        constituent = len(self.subtrees)
+        self.subtrees.append(subtree)
+        self.labels.append(subtree.label())
+        self.heights.append(0)
+        self.starts.append(len(self.leaves))
+        self.ends.append(0)
+        self.parents.append(parent)
+        self.child_indices.append(child_index)
+        self.depths.append(self.depths[parent] + 1 if parent >= 0 else 0)
+        return [constituent, 0, 0]
+
+    def __len__(self):
+        return len(self.subtrees)
+
+    @property
+    def height(self):
+        return self.heights[0]
+
+    def constituents(self, height):
+        return self.by_height.get(height, [])
+
+    def leaf_count(self, constituent):
+        return self.ends[constituent] - self.starts[constituent]
+
+    def constituent_leaves(self, constituent):
+        return self.leaves[self.starts[constituent]:self.ends[constituent]]
+
+    # the constituent's position in the tree, as Tree.treepositions() gives it
+    def position(self, constituent):
+        position = []
+        while self.parents[constituent] >= 0:
+            position.append(self.child_indices[constituent])
+            constituent = self.parents[constituent]
+        return tuple(reversed(position))
+
+    # the constituent's leaves joined by spaces
+    def text(self, constituent):
+        return " ".join(self.constituent_leaves(constituent))
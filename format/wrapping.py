@@ -0,0 +1,173 @@
+"""
+Wrapping - greedy line breaking over a stream of sentences
+StreamingTextWrapper.wrap_sentences(texts) gives the same lines as TextWrapper.wrap(" ".join(texts)) without ever
+building the joined text: sentences are split into chunks a few at a time, and each line is found with one bisect
+over the running chunk lengths instead of by appending chunks one at a time.
+Only TextWrapper's options and chunking regexes are used; the few lines of its private helpers that line breaking
+needs are copied here, so that a change to textwrap's internals cannot silently change the lines.
+"""
+from bisect import bisect_right
+from itertools import accumulate
+import textwrap
+
+# whitespace as far as TextWrapper's chunking regexes are concerned
+WRAPPER_WHITESPACE = "\t\n\x0b\x0c\r "
+# chunks gathered per refill, so that the running lengths aren't recomputed for every sentence
+REFILL_CHUNKS = 256
+
+
+class StreamingTextWrapper(textwrap.TextWrapper):
+    # yields the wrapped lines of " ".join(texts), lazily consuming texts
+    def wrap_sentences(self, texts):
+        if self.width <= 0:
+            raise ValueError("invalid width %r (must be > 0)" % self.width)
+        if self.max_lines is not None or self.fix_sentence_endings:
+            raise ValueError("max_lines and fix_sentence_endings are not supported when wrapping sentences")
+        return self._wrap_chunk_stream(self._chunk_sentences(texts))
+
+    # yields the chunks of each sentence, with the joining space in front of all but the first sentence
+    def _chunk_sentences(self, texts):
+        tabsize = max(self.tabsize, 1)
+        column = 0  # column of the joined text at the start of the next sentence, for expanding tabs
+        for i, text in enumerate(texts):
+            # most sentences are words separated by single spaces, which need neither munging nor a regex
+            if text and text.isprintable() and "  " not in text and text[0] != " " and text[-1] != " ":
+                words = text.split(" ")
+                chunks = [" "] * (2 * len(words) - (0 if i else 1))
+                chunks[(1 if i else 0)::2] = words
+                # hyphenation never looks past the spaces around a word
+                if self.break_on_hyphens and "-" in text:
+                    chunks = [piece for chunk in chunks
+                              for piece in (self.split_chunks(chunk) if "-" in chunk else (chunk,))]
+                column = (column + len(text) + (1 if i else 0)) % tabsize
+                yield chunks
+                continue
+
+            if i:
+                text = " " + text
+            if self.expand_tabs:
+                if "\t" in text:
+                    text = (" " * column + text).expandtabs(self.tabsize)[column:]
+                line_start = max(text.rfind("\n"), text.rfind("\r")) + 1
+                column = (len(text) - line_start + (column if not line_start else 0)) % tabsize
+            if self.replace_whitespace:
+                text = text.translate(self.unicode_whitespace_trans)
+            # without hyphens the hyphenating regex splits exactly where the simple one does
+            if self.break_on_hyphens and "-" in text:
+                yield self.split_chunks(text)
+            else:
+                yield [chunk for chunk in self.wordsep_simple_re.split(text) if chunk]
+
+    # the indivisible chunks of text, as TextWrapper splits them
+    def split_chunks(self, text):
+        if self.break_on_hyphens is True:
+            chunks = self.wordsep_re.split(text)
+        else:
+            chunks = self.wordsep_simple_re.split(text)
+        return [chunk for chunk in chunks if chunk]
+
+    # puts what fits of a chunk too long for any line onto cur_line, as TextWrapper does, and returns the rest of the
+    # chunk, or None when all of it went onto the line
+    def break_long_word(self, chunk, cur_line, cur_len, width):
+        # at least one character goes onto every line, even when the indent leaves no room
+        space_left = 1 if width < 1 else width - cur_len
+        if self.break_long_words:
+            end = space_left
+            if self.break_on_hyphens and len(chunk) > space_left:
+                # after the last hyphen that fits, if it has something other than hyphens before it
+                hyphen = chunk.rfind("-", 0, space_left)
+                if hyphen > 0 and any(c != "-" for c in chunk[:hyphen]):
+                    end = hyphen + 1
+            cur_line.append(chunk[:end])
+            return chunk[end:]
+        if not cur_line:  # an unbroken long word gets a line of its own
+            cur_line.append(chunk)
+            return None
+        return chunk
+
+    # greedy line breaking, step for step the same as TextWrapper._wrap_chunks
+    def _wrap_chunk_stream(self, sentence_chunks):
+        sentence_chunks = iter(sentence_chunks)
+        more = True  # there may be sentences left in sentence_chunks
+        chunks = []
+        ends = []  # ends[k]: length of chunks[0..k]
+        i = 0  # the next line starts at chunks[i][head:]
+        head = 0
+        wrapped_any = False
+        drop_whitespace = self.drop_whitespace
+
+        def refill():
+            # only ever called when chunks[i:] may change with more text: a trailing whitespace chunk
+            # merges with the whitespace in front of the next sentence, just as it would in the joined text
+            added = 0
+            remaining = chunks[i:]
+            if remaining and head:
+                remaining[0] = remaining[0][head:]
+            for new_chunks in sentence_chunks:
+                if new_chunks:
+                    if remaining and new_chunks[0][0] in WRAPPER_WHITESPACE and \
+                            remaining[-1][0] in WRAPPER_WHITESPACE:
+                        remaining[-1] += new_chunks[0]
+                        new_chunks = new_chunks[1:]
+                    remaining.extend(new_chunks)
+                    added += len(new_chunks)
+                if added >= REFILL_CHUNKS:
+                    return remaining, True
+            return remaining, False
+
+        count = 0  # len(chunks)
+        while True:
+            if more and i >= count - 1:
+                chunks, more = refill()
+                ends = list(accumulate(map(len, chunks)))
+                count = len(chunks)
+                i, head = 0, 0
+            if i >= count:
+                return
+
+            indent = self.subsequent_indent if wrapped_any else self.initial_indent
+            width = self.width - len(indent)
+
+            if drop_whitespace and wrapped_any and chunks[i][head:].strip() == '':
+                i, head = i + 1, 0
+
+            start = (ends[i - 1] if i else 0) + head
+            j = bisect_right(ends, start + width, i)
+            # the chunk after the line could still grow or have more text after it
+            while more and j >= count - 1:
+                chunks, more = refill()
+                ends = list(accumulate(map(len, chunks)))
+                count = len(chunks)
+                start, i, head = 0, 0, 0
+                j = bisect_right(ends, width)
+
+            if j > i:
+                cur_line = chunks[i:j]
+                if head:
+                    cur_line[0] = cur_line[0][head:]
+                cur_len = ends[j - 1] - start
+            else:
+                cur_line = []
+                cur_len = 0
+
+            if j < count and (ends[j] - start if j == i else ends[j] - ends[j - 1]) > width:
+                next_chunk = chunks[j][head:] if j == i else chunks[j]
+                rest = self.break_long_word(next_chunk, cur_line, cur_len, width)
+                if rest is not None:
+                    head = (head if j == i else 0) + len(next_chunk) - len(rest)
+                    i = j
+                else:
+                    i, head = j + 1, 0
+            else:
+                i, head = j, 0
+
+            if drop_whitespace and cur_line and cur_line[-1].strip() == '':
+                del cur_line[-1]
+            if cur_line:
+                wrapped_any = True
+                yield indent + ''.join(cur_line)
+
+
+# yields the lines of textwrap.wrap(" ".join(texts), width, **kwargs)
+def wrap_sentences(texts, width=70, **kwargs):
+    return StreamingTextWrapper(width=width, **kwargs).wrap_sentences(texts)
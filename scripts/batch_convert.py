@@ -7,7 +7,8 @@ import os
 import sys
 import datetime
 
-from single_convert import screenwriter_factory, stanfordparser_factory, do_conversion
+from batch_engine import ConversionJob, run_batch
+from single_convert import setup_logging
 
 
 if __name__ == "__main__":
@@ -15,12 +16,14 @@ if __name__ == "__main__":
     output_directory = sys.argv[2]
     stanford_parser_directory = sys.argv[3]
     stanford_parser_models_directory = sys.argv[4]
+    workers = int(sys.argv[5]) if len(sys.argv) > 5 else None  # defaults to one worker per core
+
+    setup_logging(None)
 
     transcripts = json.loads(open(transcription_results_file, "r").read())
 
+    jobs = []
     for formatter_name in ["default", "stanfordparser"]:
-        formatter = screenwriter_factory(formatter_name, stanfordparser_factory(stanford_parser_directory,
-                                                                                     stanford_parser_models_directory))
         for transcript in transcripts:
             document_text = transcript["passageText"]
             file_identifier = transcript["fileIdentifier"]
@@ -29,5 +32,7 @@ if __name__ == "__main__":
 
             output_file = os.path.join(output_directory, file_identifier + "-" + formatter_name + "-" +
                                        transcriber_name + ".json")
-            print(output_file)
-            do_conversion(formatter, "Basic", document_text, file_identifier, output_file)
+            jobs.append(ConversionJob(formatter_name, "Basic", document_text, file_identifier, output_file))
+
+    failures = run_batch(jobs, workers, stanford_parser_directory, stanford_parser_models_directory)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,62 @@
+"""
+Batch engine - spreads document x screenwriter conversions over a pool of worker processes
+Each worker loads the nltk sentence tokenizers and sets up its parser once, then runs do_conversion per job.
+"""
+from collections import namedtuple
+import logging
+import multiprocessing
+import os
+import traceback
+
+from nltk import sent_tokenize
+
+from raw_converters import punkt_tokenizer
+from single_convert import do_conversion, stanfordparser_factory
+
+ConversionJob = namedtuple("ConversionJob", ["screenwriter", "raw_converter", "document_source", "document_title",
+                                             "output_file"])
+
+_worker_parser = None
+
+
+def initialize_worker(stanford_parser_directory, stanford_parser_models_directory):
+    global _worker_parser
+    try:
+        # nltk loads its data on first use; both tokenizers are then kept for all of the worker's documents
+        sent_tokenize("Load the sentence tokenizer.")
+        punkt_tokenizer()
+    except LookupError:
+        # an exception here would make the pool respawn workers forever; the jobs will report it instead
+        logging.error("nltk sentence tokenizer data is not installed")
+    if stanford_parser_directory and stanford_parser_models_directory:
+        _worker_parser = stanfordparser_factory(stanford_parser_directory, stanford_parser_models_directory)
+
+
+# failures are returned rather than raised so that one bad document doesn't stop the batch
+def run_job(job):
+    try:
+        do_conversion(job.screenwriter, job.raw_converter, job.document_source, job.document_title,
+                      job.output_file, _worker_parser)
+        return job, None
+    except Exception:
+        return job, traceback.format_exc()
+
+
+# returns the list of (job, error) pairs that failed
+def run_batch(jobs, workers=None, stanford_parser_directory=None, stanford_parser_models_directory=None):
+    jobs = list(jobs)
+    workers = workers or os.cpu_count()
+    failures = []
+
+    logging.info("Converting %d jobs with %d workers" % (len(jobs), workers))
+    with multiprocessing.Pool(workers, initializer=initialize_worker,
+                              initargs=(stanford_parser_directory, stanford_parser_models_directory)) as pool:
+        for done, (job, error) in enumerate(pool.imap_unordered(run_job, jobs), 1):
+            if error:
+                failures.append((job, error))
+                logging.error("[%d/%d] Failed %s:\n%s" % (done, len(jobs), job.output_file, error))
+            else:
+                logging.info("[%d/%d] Wrote %s" % (done, len(jobs), job.output_file))
+
+    logging.info("Finished %d jobs, %d failed" % (len(jobs), len(failures)))
+    return failures
@@ -0,0 +1,27 @@
+"""
+Converts a binary screenplay, movie or features file back to the JSON the encoders write
+"""
+import json
+import sys
+import Configurator
+
+Configurator.runnable_from_command_line()
+
+from binary import FeaturesFile, open_binary
+from serialization import dump
+
+
+def main():
+    binary_file = sys.argv[1]
+    output_json_file = sys.argv[2]
+
+    with open_binary(binary_file) as binary, open(output_json_file, "w") as output_file:
+        if isinstance(binary, FeaturesFile):
+            output_file.write(json.dumps({"screenplay_id": binary.meta["screenplay_id"],
+                                          "features": binary.load()}, indent=4))
+        else:
+            dump(binary.load(), output_file, indent=4)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,26 +3,36 @@
 created by noah on 9/4/15
 """
 import os, sys, inspect
-import json
 
 cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(os.path.split(inspect.getfile(inspect.currentframe()))[0], "../format")))
 print(cmd_subfolder)
 if cmd_subfolder not in sys.path:
     sys.path.insert(0, cmd_subfolder)
 
-from screenplay import Screenplay, ScreenplayJSONEncoder
+from scene_index import IndexedSceneFile
+from streaming import ScreenplayReader
+
+def print_scenes(scenes):
+    for scene in scenes:
+        for element in scene.elements:
+            str = ' ' * element.priority + element.content
+            print(str)
+
 
 def main():
     screenplay_file = sys.argv[1]
 
-    with open(screenplay_file) as serialized_screenplay:
-        screenplay = Screenplay.fromDict(json.load(serialized_screenplay))
-        # print(json.dumps(screenplay, cls=ScreenplayJSONEncoder, indent=4))
+    # with first and last scene identifiers, only those scenes are decoded, through the screenplay's sidecar index
+    if len(sys.argv) >= 3:
+        first_scene = int(sys.argv[2])
+        last_scene = int(sys.argv[3]) if len(sys.argv) >= 4 else first_scene
+        with IndexedSceneFile(screenplay_file) as scene_file:
+            print_scenes(scene_file.window(first_scene, last_scene))
+        return
 
-        for scene in screenplay.scenes:
-            for element in scene.elements:
-                str = ' ' * element.priority + element.content
-                print(str)
+    with open(screenplay_file) as serialized_screenplay:
+        # scenes are read from the file one at a time
+        print_scenes(ScreenplayReader(serialized_screenplay))
 
     pass
 
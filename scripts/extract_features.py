@@ -8,15 +8,14 @@ import Configurator
 Configurator.runnable_from_command_line()
 
 from feature_extractors import *
+from feature_matrix import FeatureMatrix
+from streaming import MovieReader
 
 
 def main():
     movie_file = sys.argv[1]
     output_features_file = sys.argv[2]
 
-    with open(movie_file) as movie_json:
-        movie = Movie.fromDict(json.load(movie_json))
-
     Configurator.configure_stanford_parser("../resources")
 
     # extract features from screenplay
@@ -24,19 +23,29 @@ def main():
     f2 = OverallLengthFeatureExtractor()
     f3 = WordEntropyFeatureExtractor()
     f4 = AverageWordLengthFeatureExtractor()
-    f5 = ParseTreeFeatureExtractor(StanfordParser())
+    f5 = ParseTreeFeatureExtractor(shared_parser())
     f6 = PartsOfSpeechFeatureExtractor()
     f7 = POSEntropyFeatureExtractor()
-    f8 = NeighboringSceneFeatureExtractor(-1, OverallLengthFeatureExtractor())
-    f9 = NeighboringSceneFeatureExtractor(-1, POSEntropyFeatureExtractor())
+    # previous scene's length and part of speech entropy, reusing f2 and f7
+    f8 = SceneContextFeatureExtractor(["overall_length", "pos_entropy"], offsets=(-1,))
     f10 = SceneWidthFeatureExtractor()
-    features = MultiFeatureExtractor([f1, f2, f3, f4, f5, f6, f7, f8, f9, f10]).get_features(movie)
+    extractor = MultiFeatureExtractor([f1, f2, f3, f4, f5, f6, f7, f8, f10])
+
+    # the movie is read a chunk of scenes at a time rather than loaded whole
+    with open(movie_file) as movie_json:
+        movie = MovieReader(movie_json)
+        features = list(extractor.iter_features(movie))
+        screenplay_id = movie.screenplay_id
 
     print("Extracted features from movie...")
 
-    # output features to file
+    # output features to file, as a feature matrix for .npy and .npz files
+    if output_features_file.endswith((".npy", ".npz")):
+        FeatureMatrix.from_features(features, extractor.missing_values()).save(output_features_file)
+        return
+
     with open(output_features_file, "w") as output_file:
-        output_file.write(json.dumps({"screenplay_id": str(movie.screenplay_id),
+        output_file.write(json.dumps({"screenplay_id": str(screenplay_id),
                                       "features": features}, indent=4))
 
 
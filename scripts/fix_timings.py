@@ -1,25 +1,42 @@
 from collections import defaultdict
 import json
+import os
 import sys
+import tempfile
+import Configurator
 
-with open(sys.argv[1], "r") as filename:
-    screenplay = json.loads(filename.read())
+Configurator.runnable_from_command_line()
+
+from scene_index import IndexedSceneFile
+from serialization import dump
 
 with open(sys.argv[2], "r") as filename:
     timings = json.loads(filename.read())
 
-if screenplay["screenplay_id"] != timings["screenplay_id"]:
-    print("Screenplay ID not the same for screenplay and timings files.")
+# scenes are decoded from the screenplay file one at a time through its sidecar index
+with IndexedSceneFile(sys.argv[1]) as scene_file:
+    if scene_file.field("screenplay_id") != timings["screenplay_id"]:
+        print("Screenplay ID not the same for screenplay and timings files.")
+
+    # adjust timings and reprint screenplay
+    new_times = defaultdict(float)
+    for timing in timings["timings"]:
+        scene_id = timing["scene_id"]
+        time = timing["time"]
+        new_times[scene_id] = time
+
+    def timed_scenes():
+        for scene in scene_file.scene_dicts():
+            scene["duration"] = new_times[scene["identifier"]]
+            yield scene
 
-# adjust timings and reprint screenplay
-new_times = defaultdict(float)
-for timing in timings["timings"]:
-    scene_id = timing["scene_id"]
-    time = timing["time"]
-    new_times[scene_id] = time
+    screenplay = {key: timed_scenes() if key == scene_file.scene_key else scene_file.field(key)
+                  for key in scene_file.keys}
 
-for scene in screenplay["scenes"]:
-    scene["duration"] = new_times[scene["identifier"]]
+    # the output may be the screenplay being read, so it is written next to it and only replaces it once the
+    # screenplay file is closed
+    output_directory = os.path.dirname(os.path.abspath(sys.argv[3]))
+    with tempfile.NamedTemporaryFile("w", dir=output_directory, suffix=".json", delete=False) as filename:
+        dump(screenplay, filename, indent=4)
 
-with open(sys.argv[3], "w") as filename:
-    filename.write(json.dumps(screenplay, indent=4))
+os.replace(filename.name, sys.argv[3])
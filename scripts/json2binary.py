@@ -0,0 +1,32 @@
+"""
+Converts a screenplay, movie or features JSON file to the binary container format
+"""
+import json
+import sys
+import Configurator
+
+Configurator.runnable_from_command_line()
+
+from binary import dump, dump_features
+from movie import Movie
+from screenplay import Screenplay
+
+
+def main():
+    json_file = sys.argv[1]
+    output_binary_file = sys.argv[2]
+
+    with open(json_file) as serialized:
+        dict_object = json.load(serialized)
+
+    with open(output_binary_file, "wb") as output_file:
+        if "features" in dict_object:
+            dump_features(dict_object["features"], dict_object["screenplay_id"], output_file)
+        elif "visual_scenes" in dict_object:
+            dump(Movie.fromDict(dict_object), output_file)
+        else:
+            dump(Screenplay.fromDict(dict_object), output_file)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,8 +9,8 @@ import Configurator
 Configurator.runnable_from_command_line()
 
 from blockers import BasicBlocker
-from movie import MovieJSONEncoder
 from screenplay import Screenplay
+from serialization import dump
 
 
 def main():
@@ -27,7 +27,7 @@ def main():
 
     # output screenplay to file
     with open(output_movie_file, "w") as output_file:
-        output_file.write(json.dumps(movie, cls=MovieJSONEncoder, indent=4))
+        dump(movie, output_file, indent=4)
 
 
 if __name__ == '__main__':
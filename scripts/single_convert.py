@@ -4,7 +4,6 @@ created by noah on 6/29/15
 updated by beth on 7/22/15 to reflect new Screenplay format
 """
 
-import json
 import sys
 import os
 import argparse
@@ -14,9 +13,8 @@ from urllib.request import urlopen
 
 import yaml
 
-from nltk.parse import stanford
-
-from screenplay import ScreenplayJSONEncoder
+from parsers import ParserPool, parser_factory
+from serialization import dump
 from screenwriters import BasicScreenwriter, ConstituentHeightScreenwriter, StanfordParserScreenwriter, \
     PartOfSpeechSplitScreenwriter
 from raw_converters import WikiHtmlFileRawConverter, BasicTextFileRawConverter
@@ -62,7 +60,7 @@ def stanfordparser_factory(stanford_parser_directory, stanford_parser_models_dir
     if os.path.exists(stanford_parser_directory) and os.path.exists(stanford_parser_models_directory):
         os.environ['STANFORD_PARSER'] = stanford_parser_directory
         os.environ['STANFORD_MODELS'] = stanford_parser_models_directory
-        stanfordParser = stanford.StanfordParser()
+        stanfordParser = parser_factory("stanford")
     else:
         logging.error("Could not find files required for the Stanford parser in: " +
                       stanford_parser_directory + " or " + stanford_parser_models_directory)
@@ -90,9 +88,7 @@ def do_conversion(screenwriter_type, raw_converter_type, document_source, docume
     screenwriter = screenwriter_factory(screenwriter_type, parser=stanford_parser)
 
     with open(output_file, "w") as output:
-        output.write(
-            json.dumps(screenwriter.write_screenplay(document), cls=ScreenplayJSONEncoder,
-                       indent=4, sort_keys=True, ensure_ascii=False))
+        dump(screenwriter.write_screenplay(document), output, indent=4, sort_keys=True, ensure_ascii=False)
         logging.info("Wrote output to: " + os.path.abspath(output_file))
 
 
@@ -123,11 +119,21 @@ def main():
         else:
             raise Exception("No input document source provided.")
 
-        # get parser
-        stanfordParser = stanfordparser_factory(config['stanford_parser_directory'],
-                                                config['stanford_parser_models_directory'])
+        # get parser: the Stanford parser unless the config names another backend, on parser_workers threads
+        parser_backend = config.get("parser", "stanford")
+
+        def make_parser():
+            if parser_backend == "stanford":
+                return stanfordparser_factory(config['stanford_parser_directory'],
+                                              config['stanford_parser_models_directory'])
+            return parser_factory(parser_backend, config.get("recorded_trees"))
+
+        stanfordParser = make_parser()
         if not stanfordParser:
             raise Exception("Stanford Parser instance needed for document conversion.")
+        parser_workers = config.get("parser_workers", 1)
+        if parser_workers > 1:
+            stanfordParser = ParserPool([stanfordParser] + [make_parser() for _ in range(parser_workers - 1)])
 
         # convert the document
         do_conversion(config["screenwriter"], config["raw_converter"], document_source, document_title,
@@ -1,65 +1,76 @@
-import json
 import os
 import sys
 
 from blockers import BasicBlocker
 from decorators import FirstLastSceneAddDecorator
 from feature_extractors import *
-from movie import MovieJSONEncoder
+from pipeline import Pipeline, StreamedDocument
 from raw_converters import BasicTextFileRawConverter
 from screenwriters import FixedDimensionScreenwriter
 
-text_file = sys.argv[1]
-document_title = sys.argv[2]
-output_movie_file = sys.argv[3]
-output_features_file = sys.argv[4]
-height_in_lines = int(sys.argv[5])
-width_in_chars = int(sys.argv[6])
-
-# convert raw text to document format
-document = BasicTextFileRawConverter().convertToDocument(open(text_file, "r").read(),
-                                                         document_title)
-print("Converted to document...")
-
-# convert document to screenplay format
-screenplay = FixedDimensionScreenwriter(height_in_lines, width_in_chars).write_screenplay(document)
-
-print("Converted to screenplay...")
-
-# add duplicate first and last scenes
-decorator = FirstLastSceneAddDecorator()
-screenplay = decorator.decorate_screenplay(screenplay)
-
-# convert screenplay to a movie
-blocker = BasicBlocker()
-blocker.font_name = "Geometria-Light SDF"
-
-movie = blocker.block_screenplay(screenplay)
-
-# output movie to file
-with open(output_movie_file, "w") as output_file:
-    output_file.write(json.dumps(movie, cls=MovieJSONEncoder, indent=4))
-
-# get Stanford Parser
-stanford_parser_directory = "/Users/beth/Documents/openmind/read-gooder-wikiparse/resources"
-stanford_parser_models_directory = "/Users/beth/Documents/openmind/read-gooder-wikiparse/resources"
-os.environ['STANFORD_PARSER'] = stanford_parser_directory
-os.environ['STANFORD_MODELS'] = stanford_parser_models_directory
-
-# extract features from movie
-f1 = DocumentPositionFeatureExtractor()
-f2 = OverallLengthFeatureExtractor()
-f3 = WordEntropyFeatureExtractor()
-f4 = AverageWordLengthFeatureExtractor()
-# f5 = ParseTreeFeatureExtractor(StanfordParser())
-f6 = PartsOfSpeechFeatureExtractor()
-f7 = POSEntropyFeatureExtractor()
-f8 = NeighboringSceneFeatureExtractor(-1, OverallLengthFeatureExtractor())
-f9 = NeighboringSceneFeatureExtractor(-1, POSEntropyFeatureExtractor())
-features = MultiFeatureExtractor([f1, f2, f3, f4, f6, f7, f8, f9]).get_features(movie)
-
-print("Extracted features from movie...")
-
-# output features to file
-with open(output_features_file, "w") as output_file:
-    output_file.write(json.dumps({"screenplay_id": str(screenplay.doc_id), "features": features}, indent=4))
+
+# adds duplicate first and last scenes, blocks the scenes into a movie and extracts its features, a scene at a time
+# decorators: the decorators of the scenes, by default duplicating the first and last scenes; stream_placeholder makes
+# the leading placeholder a copy of the first scene so no more than a window of scenes is held (see decorators.py)
+def conversion_pipeline(screenwriter=None, decorators=None, stream_placeholder=False):
+    if decorators is None:
+        decorators = [FirstLastSceneAddDecorator(stream_placeholder)]
+
+    blocker = BasicBlocker()
+    blocker.font_name = "Geometria-Light SDF"
+
+    f1 = DocumentPositionFeatureExtractor()
+    f2 = OverallLengthFeatureExtractor()
+    f3 = WordEntropyFeatureExtractor()
+    f4 = AverageWordLengthFeatureExtractor()
+    # f5 = ParseTreeFeatureExtractor(StanfordParser())
+    f6 = PartsOfSpeechFeatureExtractor()
+    f7 = POSEntropyFeatureExtractor()
+    # previous scene's length and part of speech entropy, reusing f2 and f7
+    f8 = SceneContextFeatureExtractor(["overall_length", "pos_entropy"], offsets=(-1,))
+    extractor = MultiFeatureExtractor([f1, f2, f3, f4, f6, f7, f8])
+
+    return Pipeline(screenwriter, decorators, blocker, extractor)
+
+
+# decorates, blocks and extracts features from a screenplay, writing the movie and the features
+def convert_screenplay(screenplay, output_movie_file, output_features_file):
+    # the screenplay is already whole, so it is decorated whole
+    screenplay = FirstLastSceneAddDecorator().decorate_screenplay(screenplay)
+    with open(output_movie_file, "w") as movie_file, open(output_features_file, "w") as features_file:
+        conversion_pipeline(decorators=[]).write(screenplay.scenes, screenplay.doc_id, movie_file, features_file)
+
+    print("Extracted features from movie...")
+
+
+def main():
+    text_file = sys.argv[1]
+    document_title = sys.argv[2]
+    output_movie_file = sys.argv[3]
+    output_features_file = sys.argv[4]
+    height_in_lines = int(sys.argv[5])
+    width_in_chars = int(sys.argv[6])
+
+    # the document's sentences are split from the raw text as the screenwriter reads them
+    sentences = BasicTextFileRawConverter().iter_sentences(open(text_file, "r").read())
+    document = StreamedDocument(document_title, sentences)
+
+    # get Stanford Parser
+    stanford_parser_directory = "/Users/beth/Documents/openmind/read-gooder-wikiparse/resources"
+    stanford_parser_models_directory = "/Users/beth/Documents/openmind/read-gooder-wikiparse/resources"
+    os.environ['STANFORD_PARSER'] = stanford_parser_directory
+    os.environ['STANFORD_MODELS'] = stanford_parser_models_directory
+
+    # convert document to screenplay, movie and features in one pass over its scenes; with --stream, only a window of
+    # scenes is held, and the leading placeholder scene is a copy of the first scene
+    stream_placeholder = sys.argv[7:] == ["--stream"]
+    pipeline = conversion_pipeline(FixedDimensionScreenwriter(height_in_lines, width_in_chars),
+                                   stream_placeholder=stream_placeholder)
+    with open(output_movie_file, "w") as movie_file, open(output_features_file, "w") as features_file:
+        pipeline.run(document, movie_file, features_file)
+
+    print("Converted to movie and extracted features...")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
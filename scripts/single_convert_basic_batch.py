@@ -1,15 +1,18 @@
-import os
+from raw_converters import BasicTextFileRawConverter
+from screenwriters import FixedDimensionSweep
+from single_convert_basic import convert_screenplay
 
 widths = [30, 40, 50, 60, 70]
 heights = [5, 7, 9, 11, 13, 15]
 
-os.system("export PYTHONPATH=/usr/local/lib/python3.4/site-packages:$PYTHONPATH")
+article_directory = "/Users/beth/Google Drive/openmind/articles/return-of-seti/"
 
-for w in widths:
-    for h in heights:
-        os.system("python3 single_convert_basic.py " +
-                  "\"/Users/beth/Google Drive/openmind/articles/return-of-seti/return-of-seti.txt\" " +
-                  "\\\"Return\ of\ Seti\\\" " +
-                  "\"/Users/beth/Google Drive/openmind/articles/return-of-seti/return-of-seti-%d-%d.json\" " % (w, h) +
-                  "\"/Users/beth/Google Drive/openmind/articles/return-of-seti/return-of-seti-%d-%d-features.json\" " % (w, h) +
-                  "%d %d" % (h, w))
+# the article is read and converted to a document once, then written at every (width, height)
+document = BasicTextFileRawConverter().convertToDocument(open(article_directory + "return-of-seti.txt", "r").read(),
+                                                         "\"Return of Seti\"")
+
+for screenwriter, screenplay in FixedDimensionSweep(heights, widths).write_screenplays(document):
+    w, h = screenwriter.width, screenwriter.height
+    convert_screenplay(screenplay,
+                       article_directory + "return-of-seti-%d-%d.json" % (w, h),
+                       article_directory + "return-of-seti-%d-%d-features.json" % (w, h))
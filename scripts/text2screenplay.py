@@ -2,15 +2,12 @@
 
 created by noah on 9/4/15
 """
-import json
 import sys
 
-from nltk.parse.stanford import StanfordParser
-
 from scripts.Configurator import configure_stanford_parser
 from raw_converters import BookNewlineFileRawConverter
-from screenplay import ScreenplayJSONEncoder
 from screenwriters import PartOfSpeechSplitScreenwriter
+from serialization import dump
 
 
 def main():
@@ -31,7 +28,7 @@ def main():
 
     # output screenplay to file
     with open(output_screenplay_file_stem + ".json", "w") as output_file:
-        output_file.write(json.dumps(screenplay, cls=ScreenplayJSONEncoder, indent=4))
+        dump(screenplay, output_file, indent=4)
 
     pass
 